@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Shared API Client Registry for EVOLEA Image Generation
+
+Hands out long-lived, process-wide clients for Gemini, Anthropic and Replicate,
+keyed by backend and API key. Repeated calls (batch runs, the MCP server,
+image_agent re-importing generate-asset.py) reuse the same keep-alive
+connection pools instead of paying TLS and connection setup every time.
+
+Async clients are additionally keyed by event loop: an httpx connection pool
+is bound to the loop that opened it, so each loop gets its own pooled client.
+"""
+
+import asyncio
+import hashlib
+import threading
+import weakref
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Tuple
+
+# Connections kept open per host for the Replicate client. Sized for the
+# default variation concurrency plus downloads running alongside.
+REPLICATE_POOL_MAXSIZE = 16
+# The only host that gets the Replicate token; outputs are downloaded from CDNs
+REPLICATE_API_HOST = "api.replicate.com"
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+@dataclass
+class ClientStats:
+    """Handout counters for one backend."""
+    created: int = 0   # Clients built (each pays connection setup)
+    reused: int = 0    # Handouts served from an existing client/pool
+    connections_opened: int = 0  # TCP connects seen by traced HTTP clients
+    requests_sent: int = 0       # Requests sent through traced HTTP clients
+
+    @property
+    def connections_reused(self) -> int:
+        return max(0, self.requests_sent - self.connections_opened)
+
+
+def _fingerprint(api_key: str) -> str:
+    """Short, non-reversible key id so raw keys never appear in stats/logs."""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+
+class ClientRegistry:
+    """Thread-safe registry of long-lived API clients."""
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._stats: Dict[str, ClientStats] = {}
+        self._lock = threading.Lock()
+
+    def _backend_stats(self, backend: str) -> ClientStats:
+        return self._stats.setdefault(backend, ClientStats())
+
+    def get(self, backend: str, api_key: str, factory: Callable[[], Any]) -> Any:
+        """Return the pooled client for (backend, api_key), creating it once."""
+        key = (backend, _fingerprint(api_key))
+        with self._lock:
+            return self._get_or_create(self._clients, key, backend, factory)
+
+    def get_for_loop(self, backend: str, api_key: str, factory: Callable[[], Any]) -> Any:
+        """Return the pooled async client for (backend, api_key) on the running loop."""
+        loop = asyncio.get_running_loop()
+        key = (backend, _fingerprint(api_key))
+        with self._lock:
+            clients = self._loop_clients.setdefault(loop, {})
+            return self._get_or_create(clients, key, backend, factory)
+
+    def _get_or_create(self, clients: Dict, key: Tuple[str, str], backend: str, factory) -> Any:
+        stats = self._backend_stats(backend)
+        client = clients.get(key)
+        if client is None:
+            client = factory()
+            clients[key] = client
+            stats.created += 1
+        else:
+            stats.reused += 1
+        return client
+
+    def record_request(self, backend: str) -> None:
+        with self._lock:
+            self._backend_stats(backend).requests_sent += 1
+
+    def record_connection(self, backend: str) -> None:
+        with self._lock:
+            self._backend_stats(backend).connections_opened += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-backend handout counters, plus real connection counts where traced."""
+        with self._lock:
+            result = {}
+            for backend, s in self._stats.items():
+                entry = asdict(s)
+                entry["connections_reused"] = s.connections_reused
+                result[backend] = entry
+            return result
+
+    def close_all(self) -> None:
+        """Close every pooled client (used on shutdown)."""
+        with self._lock:
+            for client in self._clients.values():
+                close = getattr(client, "close", None)
+                if callable(close):
+                    try:
+                        close()
+                    except Exception:
+                        pass
+            self._clients.clear()
+
+
+def _traced_event_hooks(backend: str) -> Dict[str, list]:
+    """
+    httpx event hooks that count requests and new TCP connections.
+
+    httpcore reports every fresh connect through the "trace" request extension,
+    so requests_sent - connections_opened is the number of requests that rode an
+    already-open keep-alive connection.
+    """
+    async def trace(event_name: str, info: Dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            CLIENTS.record_connection(backend)
+
+    async def on_request(request) -> None:
+        CLIENTS.record_request(backend)
+        request.extensions["trace"] = trace
+
+    return {"request": [on_request]}
+
+
+CLIENTS = ClientRegistry()
+
+
+# ============================================================================
+# BACKEND FACTORIES
+# ============================================================================
+
+def get_gemini_client(api_key: str):
+    """Pooled google.genai client for api_key."""
+    from google import genai
+    return CLIENTS.get("gemini", api_key, lambda: genai.Client(api_key=api_key))
+
+
+def get_anthropic_client(api_key: str):
+    """Pooled Anthropic client for api_key."""
+    import anthropic
+    return CLIENTS.get("anthropic", api_key, lambda: anthropic.Anthropic(api_key=api_key))
+
+
+def get_async_gemini_client(api_key: str):
+    """Pooled async google.genai client (client.aio) for the running event loop."""
+    from google import genai
+    # Keep the parent Client pooled: its __del__ would close the shared transport
+    return CLIENTS.get_for_loop("gemini_async", api_key, lambda: genai.Client(api_key=api_key)).aio
+
+
+def get_async_anthropic_client(api_key: str):
+    """Pooled AsyncAnthropic client for the running event loop."""
+    import anthropic
+    return CLIENTS.get_for_loop("anthropic_async", api_key, lambda: anthropic.AsyncAnthropic(api_key=api_key))
+
+
+def get_async_replicate_client(api_key: str):
+    """
+    Pooled httpx.AsyncClient for the Replicate API (running loop). The token is
+    added per request, and only to requests for REPLICATE_API_HOST, so output
+    downloads from the delivery CDN through the same pool never carry it.
+    """
+    def authorize(request):
+        if request.url.host == REPLICATE_API_HOST:
+            request.headers["Authorization"] = f"Bearer {api_key}"
+        return request
+
+    def factory():
+        import httpx
+
+        return httpx.AsyncClient(
+            auth=authorize,
+            headers={"Content-Type": "application/json"},
+            limits=httpx.Limits(
+                max_connections=REPLICATE_POOL_MAXSIZE,
+                max_keepalive_connections=REPLICATE_POOL_MAXSIZE,
+            ),
+            timeout=httpx.Timeout(120.0, connect=15.0),
+            follow_redirects=True,
+            event_hooks=_traced_event_hooks("replicate"),
+        )
+
+    return CLIENTS.get_for_loop("replicate", api_key, factory)
+
+
+def client_stats() -> Dict[str, Dict[str, int]]:
+    """Connection-reuse counters for every backend used in this process."""
+    return CLIENTS.stats()
+
+
+def format_client_stats() -> str:
+    """One-line summary of client reuse, for end-of-run logging."""
+    parts = []
+    for backend, s in sorted(client_stats().items()):
+        part = f"{backend}: {s['created']} created/{s['reused']} reused"
+        if s["requests_sent"]:
+            part += f", {s['connections_reused']}/{s['requests_sent']} requests on warm connections"
+        parts.append(part)
+    return "; ".join(parts) or "no API clients used"
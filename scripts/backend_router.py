@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Backend Routing, Latency Tracking and Hedged Requests for EVOLEA Image Generation
+
+Keeps per-route health for each image backend and model ("gemini/<model>",
+"replicate/<model>"): EWMAs of latency, success rate and rate-limit frequency,
+plus a cooldown after errors that say the backend is unusable for a while.
+Errors are read through error_handling.classify_error, so a route that starts
+returning 429s or 5xx is avoided before it burns the caller's retries. Each
+route also has a circuit breaker (error_handling.get_circuit_breaker, shared
+with retry_with_backoff): while it is open, calls to the route fail at once
+with CircuitOpenError, so callers fail over instead of waiting on it.
+
+State is persisted to a small JSON file, so routing decisions carry over
+between runs. The same latency history drives hedged calls: if the primary
+route has not answered within a latency percentile of its recent calls, the
+request is also sent to a secondary route, whichever finishes first wins,
+and the other is cancelled.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict, fields
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from error_handling import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ErrorCategory,
+    classify_error,
+    get_circuit_breaker,
+)
+
+T = TypeVar("T")
+
+DEFAULT_STATE_FILE = Path(__file__).parent.parent / ".cache" / "backend_router.json"
+
+# Recent call latencies kept per route (for hedge percentiles)
+LATENCY_WINDOW = 50
+# Below this many samples a percentile is noise; callers use their default delay
+MIN_SAMPLES = 5
+# Weight of the newest observation in every EWMA
+EWMA_ALPHA = 0.3
+# A route is unhealthy below this success EWMA or above this rate-limit EWMA
+MIN_SUCCESS = 0.5
+MAX_RATE_LIMITED = 0.5
+# Unhealthy routes get probed again once their last observation is this old
+PROBE_AFTER_SECONDS = 600
+# How long to skip a route after a fatal auth error
+AUTH_COOLDOWN_SECONDS = 3600
+
+# Failures that say nothing about the backend itself (bad input, bad payload)
+_REQUEST_ERRORS = {
+    ErrorCategory.VALIDATION,
+    ErrorCategory.API_ERROR,
+    ErrorCategory.MEDIA_TYPE,
+    ErrorCategory.IMAGE_CORRUPT,
+}
+
+
+def _ewma(current: float, sample: float) -> float:
+    return EWMA_ALPHA * sample + (1 - EWMA_ALPHA) * current
+
+
+def _circuit_open(route: str) -> bool:
+    return get_circuit_breaker(route).state == CircuitBreaker.OPEN
+
+
+@dataclass
+class RouteHealth:
+    """Smoothed health of one backend/model route."""
+    latency: Optional[float] = None   # EWMA seconds of successful calls
+    success: float = 1.0              # EWMA of success (1) vs. backend failure (0)
+    rate_limited: float = 0.0         # EWMA of rate-limit responses
+    calls: int = 0
+    cooldown_until: float = 0.0       # Unix time before which the route is skipped
+    last_error: Optional[str] = None  # ErrorCategory value of the latest failure
+    updated: float = 0.0              # Unix time of the latest observation
+
+    def healthy(self, now: float) -> bool:
+        if now < self.cooldown_until:
+            return False
+        if self.success >= MIN_SUCCESS and self.rate_limited <= MAX_RATE_LIMITED:
+            return True
+        # Degraded, but it has been quiet long enough to deserve another probe
+        return now - self.updated >= PROBE_AFTER_SECONDS
+
+
+@dataclass
+class HedgeStats:
+    """Counters for hedged calls in this process."""
+    requests: int = 0        # Calls made in hedged mode
+    hedged: int = 0          # Calls where the secondary route was fired
+    secondary_wins: int = 0  # Hedges the secondary route won
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.requests if self.requests else 0.0
+
+
+class BackendRouter:
+    """Health-ranked routing, latency history and hedged execution across routes."""
+
+    def __init__(self, state_file: Optional[Path] = None, window: int = LATENCY_WINDOW):
+        self.state_file = Path(state_file) if state_file else None
+        self._window = window
+        self._health: Dict[str, RouteHealth] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self.hedge = HedgeStats()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    # -- persistence ---------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        """Read persisted state once. Caller holds the lock."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.state_file or not self.state_file.exists():
+            return
+        try:
+            data = json.loads(self.state_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return  # Corrupt or unreadable state just means starting fresh
+        known = {f.name for f in fields(RouteHealth)}
+        for route, entry in data.get("routes", {}).items():
+            self._health[route] = RouteHealth(**{k: v for k, v in entry.items() if k in known})
+            self._latencies[route] = deque(entry.get("latencies", []), maxlen=self._window)
+
+    def save(self) -> None:
+        """Atomically write current state to state_file (best-effort)."""
+        if not self.state_file:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            routes = {}
+            for route, health in self._health.items():
+                entry = asdict(health)
+                entry["latencies"] = [round(x, 3) for x in self._latencies.get(route, ())]
+                routes[route] = entry
+        payload = json.dumps({"version": 1, "routes": routes}, indent=2)
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.state_file.parent, prefix=".tmp-router-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, self.state_file)
+        except OSError:
+            pass
+
+    # -- observations --------------------------------------------------------
+
+    def _route_health(self, route: str) -> RouteHealth:
+        self._ensure_loaded()
+        return self._health.setdefault(route, RouteHealth())
+
+    def record(self, route: str, latency: float) -> None:
+        """Add one call's latency (seconds) for route."""
+        with self._lock:
+            health = self._route_health(route)
+            health.latency = latency if health.latency is None else _ewma(health.latency, latency)
+            self._latencies.setdefault(route, deque(maxlen=self._window)).append(latency)
+
+    def record_outcome(self, route: str, latency: float, error: Optional[Exception] = None) -> None:
+        """Fold one finished call into route's health, classifying any error."""
+        if error is None:
+            self.record(route, latency)
+            get_circuit_breaker(route).record(None)
+        now = time.time()
+        with self._lock:
+            health = self._route_health(route)
+            health.calls += 1
+            health.updated = now
+            if error is None:
+                health.success = _ewma(health.success, 1.0)
+                health.rate_limited = _ewma(health.rate_limited, 0.0)
+                return
+
+            info = classify_error(error)
+            get_circuit_breaker(route).record(info.category)
+            health.last_error = info.category.value
+            if info.category in _REQUEST_ERRORS:
+                return
+
+            health.success = _ewma(health.success, 0.0)
+            if info.category == ErrorCategory.RATE_LIMIT:
+                health.rate_limited = _ewma(health.rate_limited, 1.0)
+                health.cooldown_until = max(health.cooldown_until, now + (info.retry_after or 60))
+            elif info.category == ErrorCategory.AUTH:
+                health.cooldown_until = max(health.cooldown_until, now + AUTH_COOLDOWN_SECONDS)
+            elif health.success < MIN_SUCCESS:
+                health.cooldown_until = max(health.cooldown_until, now + (info.retry_after or 5))
+
+    def mark_unavailable(self, route: str, seconds: float, reason: str) -> None:
+        """Skip route for the next `seconds` (e.g. the backend is blocked in this region)."""
+        now = time.time()
+        with self._lock:
+            health = self._route_health(route)
+            health.cooldown_until = max(health.cooldown_until, now + seconds)
+            health.last_error = reason
+            health.updated = now
+
+    async def timed(self, route: str, make: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await make(), recording its latency and outcome for route.
+
+        make() wraps each real API request in route_request(route); only
+        calls that sent one are recorded, timed from the first, so a result
+        served entirely from cache neither counts as latency nor touches the
+        circuit breaker. While the breaker is open, route_request raises
+        CircuitOpenError instead.
+        """
+        attempt = _Attempt(route)
+        token = _ATTEMPT.set(attempt)
+        try:
+            result = await make()
+        except Exception as e:
+            if attempt.started is not None:
+                self.record_outcome(route, time.monotonic() - attempt.started, e)
+                await asyncio.to_thread(self.save)
+            raise
+        finally:
+            _ATTEMPT.reset(token)
+        if attempt.started is not None:
+            self.record_outcome(route, time.monotonic() - attempt.started)
+            await asyncio.to_thread(self.save)
+        return result
+
+    # -- decisions -----------------------------------------------------------
+
+    def rank(self, routes: List[str]) -> List[str]:
+        """
+        Order routes for trying: healthy ones fastest first, then degraded ones.
+
+        Healthy routes with no latency history yet come after measured ones, so
+        the caller's preference holds until there is evidence; ties keep the
+        caller's order.
+        """
+        now = time.time()
+        with self._lock:
+            health = {route: self._route_health(route) for route in routes}
+
+        def key(item: Tuple[int, str]) -> Tuple[bool, float, int]:
+            idx, route = item
+            h = health[route]
+            latency = h.latency if h.latency is not None else float("inf")
+            return (not h.healthy(now) or _circuit_open(route), latency, idx)
+
+        return [route for _, route in sorted(enumerate(routes), key=key)]
+
+    def is_healthy(self, route: str) -> bool:
+        with self._lock:
+            return self._route_health(route).healthy(time.time()) and not _circuit_open(route)
+
+    def percentile(self, route: str, q: float) -> Optional[float]:
+        """q-th quantile (0..1) of recent latencies, or None without enough samples."""
+        with self._lock:
+            self._ensure_loaded()
+            samples = sorted(self._latencies.get(route, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        idx = min(len(samples) - 1, max(0, round(q * (len(samples) - 1))))
+        return samples[idx]
+
+    def hedge_delay(self, route: str, q: float, default: float) -> float:
+        """How long to wait on route before hedging: its q-th latency percentile."""
+        p = self.percentile(route, q)
+        return default if p is None else p
+
+    async def hedged(
+        self,
+        primary: str,
+        secondary: str,
+        make: Callable[[str], Awaitable[T]],
+        delay: float,
+    ) -> Tuple[str, T]:
+        """
+        Run make(primary); if it has not succeeded after delay seconds (or fails
+        sooner), also run make(secondary). Returns (route, result) for the first
+        call to succeed and cancels the other. Raises the primary's error if both fail.
+
+        make is expected to record its own latency (e.g. through timed()). A loser
+        cancelled here records nothing: its elapsed time is not a latency.
+        """
+        with self._lock:
+            self.hedge.requests += 1
+
+        tasks: Dict[asyncio.Task, str] = {asyncio.create_task(make(primary)): primary}
+        pending = set(tasks)
+        first_error: Optional[BaseException] = None
+        hedge_fired = False
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=None if hedge_fired else delay,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None:
+                        route = tasks[task]
+                        if route == secondary:
+                            with self._lock:
+                                self.hedge.secondary_wins += 1
+                        return route, task.result()
+                    first_error = first_error or task.exception()
+
+                if not hedge_fired:
+                    # Primary is slower than usual (or already failed): hedge
+                    hedge_fired = True
+                    with self._lock:
+                        self.hedge.hedged += 1
+                    task = asyncio.create_task(make(secondary))
+                    tasks[task] = secondary
+                    pending.add(task)
+
+            raise first_error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    # -- reporting -----------------------------------------------------------
+
+    def summary(self) -> Dict[str, Any]:
+        """Health and latency percentiles per route plus hedge counters."""
+        result: Dict[str, Any] = {"routes": {}}
+        now = time.time()
+        with self._lock:
+            self._ensure_loaded()
+            health = {route: RouteHealth(**asdict(h)) for route, h in self._health.items()}
+            hedge = asdict(self.hedge)
+        for route, h in health.items():
+            entry = asdict(h)
+            entry["healthy"] = h.healthy(now) and not _circuit_open(route)
+            entry["circuit"] = get_circuit_breaker(route).summary()
+            entry["p50"] = self.percentile(route, 0.5)
+            entry["p90"] = self.percentile(route, 0.9)
+            result["routes"][route] = entry
+        hedge["hedge_rate"] = round(self.hedge.hedge_rate, 3)
+        result["hedge"] = hedge
+        return result
+
+    def format_stats(self) -> str:
+        """One-line route health and hedge summary for end-of-run logging."""
+        now = time.time()
+        parts = []
+        with self._lock:
+            for route, h in sorted(self._health.items()):
+                latency = f"{h.latency:.1f}s" if h.latency is not None else "n/a"
+                if _circuit_open(route):
+                    state = "circuit open"
+                else:
+                    state = "ok" if h.healthy(now) else f"degraded ({h.last_error})"
+                parts.append(f"{route}: {latency}, {h.success:.0%} ok, {state}")
+        h = self.hedge
+        if h.requests:
+            parts.append(f"{h.hedged}/{h.requests} hedged ({h.hedge_rate:.0%}), "
+                         f"secondary won {h.secondary_wins}")
+        return "; ".join(parts) or "no backend calls"
+
+
+
+@dataclass
+class _Attempt:
+    """One BackendRouter.timed() call, shared with the tasks make() spawns."""
+    route: str
+    started: Optional[float] = None  # time.monotonic() of the first real request
+    admitted: bool = False  # The breaker let this attempt's requests through
+    rejected_for: Optional[float] = None  # Breaker's retry_after when it refused a request
+    probe: Optional[asyncio.Event] = None  # Set once this attempt's half-open probe has finished
+
+
+_ATTEMPT: contextvars.ContextVar[Optional[_Attempt]] = contextvars.ContextVar("route_attempt", default=None)
+
+
+@contextlib.asynccontextmanager
+async def route_request(route: Optional[str]):
+    """
+    Wrap one real API request to route.
+
+    Inside BackendRouter.timed() for the same route, the first request asks
+    the route's circuit breaker for admission (raising CircuitOpenError while
+    it is open) and starts the latency clock. If the breaker is half-open that
+    request is its probe: the attempt's other requests wait for it, go out once
+    it succeeds and fail with CircuitOpenError if it re-opens the breaker.
+    Elsewhere this does nothing.
+    """
+    attempt = _ATTEMPT.get()
+    if attempt is None or attempt.route != route:
+        yield
+        return
+    while attempt.probe is not None:
+        await attempt.probe.wait()
+    if attempt.rejected_for is not None:
+        raise CircuitOpenError(route, attempt.rejected_for)
+    if attempt.admitted:
+        yield
+        return
+
+    breaker = get_circuit_breaker(route)
+    admitted = breaker.admit()
+    if admitted is None:
+        attempt.rejected_for = breaker.retry_after()
+        raise CircuitOpenError(route, attempt.rejected_for)
+    if attempt.started is None:
+        attempt.started = time.monotonic()
+    if admitted == CircuitBreaker.CLOSED:
+        attempt.admitted = True
+        yield
+        return
+
+    # This request is the probe: report it as soon as it finishes, so the
+    # requests waiting on it can go (timed() still records the whole attempt)
+    done = attempt.probe = asyncio.Event()
+    try:
+        yield
+    except asyncio.CancelledError:
+        breaker.release()  # A waiting request may take over the probe
+        raise
+    except Exception as e:
+        breaker.record(classify_error(e).category)
+        if breaker.state == CircuitBreaker.CLOSED:
+            attempt.admitted = True
+        else:
+            attempt.rejected_for = breaker.retry_after()
+        raise
+    else:
+        breaker.record(None)
+        attempt.admitted = True
+    finally:
+        attempt.probe = None
+        done.set()
+
+
+_default_router: Optional[BackendRouter] = None
+_default_lock = threading.Lock()
+
+
+def get_router() -> BackendRouter:
+    """Process-wide router, persisted to EVOLEA_ROUTER_STATE or DEFAULT_STATE_FILE."""
+    global _default_router
+    with _default_lock:
+        if _default_router is None:
+            state_file = os.environ.get("EVOLEA_ROUTER_STATE") or DEFAULT_STATE_FILE
+            _default_router = BackendRouter(Path(state_file))
+        return _default_router
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+EVOLEA Batch Image Generation
+=============================
+Runs a manifest of generation jobs as one bounded-parallel run: every job
+shares a single global budget of API requests in flight (and optionally per
+minute), progress is reported while it runs, and a JSON summary is written
+at the end.
+
+Usage:
+    python scripts/batch_generate.py manifest.json
+    python scripts/batch_generate.py manifest.yaml --concurrency 8 --rate 60
+    python scripts/batch_generate.py manifest.json --summary - > summary.json
+
+Manifest (JSON, or YAML with PyYAML installed):
+    {
+      "defaults": {"category": "programs", "aspect": "16:9", "count": 4},
+      "jobs": [
+        {"name": "mini-garten-hero", "prompt": "...", "auto_select": true},
+        {"name": "mini-projekte-hero", "prompt": "...", "size": "2K"}
+      ]
+    }
+
+A bare list of jobs is accepted too. Job fields: name and prompt (required);
+category, aspect, size, count, auto_select, backend (optional).
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from datetime import datetime
+from dataclasses import dataclass, asdict, field, fields
+from typing import Optional, List, Dict, Any
+
+# Add scripts directory to path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from generate_image import (
+    CONFIG,
+    REQUEST_BUDGET,
+    RequestBudget,
+    agenerate_and_select,
+    log,
+)
+from api_clients import client_stats, format_client_stats
+from backend_router import get_router
+from evaluation_cache import get_evaluation_cache
+from generation_cache import get_default_cache
+
+DEFAULT_SUMMARY_DIR = Path(__file__).parent.parent / ".cache" / "batch"
+
+# =============================================================================
+# MANIFEST
+# =============================================================================
+
+@dataclass
+class BatchJob:
+    """One generate-and-select job from the manifest."""
+    name: str
+    prompt: str
+    category: str = "programs"
+    aspect: str = "16:9"
+    size: Optional[str] = None  # Gemini image_size ("1K", "2K", "4K")
+    count: int = 4
+    auto_select: bool = False
+    backend: str = "auto"
+
+
+# Accepted types per field; checked at load so a quoted "4" fails here, not mid-run
+FIELD_TYPES: Dict[str, tuple] = {
+    "name": (str,),
+    "prompt": (str,),
+    "category": (str,),
+    "aspect": (str,),
+    "size": (str, type(None)),
+    "count": (int,),
+    "auto_select": (bool,),
+    "backend": (str,),
+}
+
+
+def _check_types(idx: int, merged: Dict[str, Any]) -> None:
+    """Reject manifest values of the wrong type (bools are not counts)."""
+    for name, value in merged.items():
+        expected = FIELD_TYPES[name]
+        if not isinstance(value, expected) or (isinstance(value, bool) and bool not in expected):
+            wanted = " or ".join("null" if t is type(None) else t.__name__ for t in expected)
+            raise ValueError(f"Job {idx}: '{name}' must be {wanted}, got {type(value).__name__} {value!r}")
+    if merged.get("count", 1) < 1:
+        raise ValueError(f"Job {idx}: 'count' must be at least 1, got {merged['count']}")
+
+
+def load_manifest(path: Path) -> List[BatchJob]:
+    """Parse a JSON/YAML manifest into jobs, with defaults applied."""
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("YAML manifests need PyYAML: pip install pyyaml")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+
+    defaults: Dict[str, Any] = {}
+    if isinstance(data, dict):
+        defaults = data.get("defaults") or {}
+        data = data.get("jobs")
+    if not isinstance(data, list) or not data:
+        raise ValueError("Manifest must be a list of jobs or an object with a non-empty 'jobs' list")
+
+    known = {f.name for f in fields(BatchJob)}
+    jobs: List[BatchJob] = []
+    seen = set()
+    for idx, entry in enumerate(data, 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Job {idx}: expected an object, got {type(entry).__name__}")
+        merged = {**defaults, **entry}
+        unknown = set(merged) - known
+        if unknown:
+            raise ValueError(f"Job {idx}: unknown field(s) {', '.join(sorted(unknown))}")
+        if not merged.get("name") or not merged.get("prompt"):
+            raise ValueError(f"Job {idx}: 'name' and 'prompt' are required")
+        _check_types(idx, merged)
+        job = BatchJob(**merged)
+        key = (job.category, job.name)
+        if key in seen:
+            raise ValueError(f"Job {idx}: duplicate name '{job.name}' in category '{job.category}'")
+        seen.add(key)
+        jobs.append(job)
+    return jobs
+
+
+# =============================================================================
+# RUNNER
+# =============================================================================
+
+@dataclass
+class JobResult:
+    """Outcome of one job, as written to the summary."""
+    name: str
+    category: str
+    status: str = "pending"  # ok | failed
+    seconds: float = 0.0
+    images: int = 0
+    generated: List[str] = field(default_factory=list)
+    grid: Optional[str] = None
+    final: Optional[str] = None
+    error: Optional[str] = None
+
+
+class Progress:
+    """Live throughput counters for a batch run."""
+
+    def __init__(self, total_jobs: int, budget: RequestBudget):
+        self.total_jobs = total_jobs
+        self.budget = budget
+        self.started = time.monotonic()
+        self.done = 0
+        self.failed = 0
+        self.running = 0
+        self.images = 0
+
+    def line(self) -> str:
+        elapsed = time.monotonic() - self.started
+        rate = self.images / elapsed * 60 if elapsed > 0 else 0.0
+        line = (f"[BATCH] {self.done + self.failed}/{self.total_jobs} jobs"
+                f" ({self.failed} failed), {self.running} running"
+                f" | {self.images} images, {rate:.1f} img/min"
+                f" | {self.budget.requests} requests | {_fmt_duration(elapsed)} elapsed")
+        finished = self.done + self.failed
+        if finished and finished < self.total_jobs:
+            eta = elapsed / finished * (self.total_jobs - finished)
+            line += f", ETA ~{_fmt_duration(eta)}"
+        return line
+
+
+def _fmt_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    return f"{minutes}m{secs:02d}s" if minutes else f"{secs}s"
+
+
+async def _report_progress(progress: Progress, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        log(progress.line())
+
+
+async def arun_batch(
+    jobs: List[BatchJob],
+    concurrency: int,
+    per_minute: Optional[float] = None,
+    max_jobs: Optional[int] = None,
+    use_cache: bool = True,
+    progress_interval: float = 10.0,
+) -> Dict[str, Any]:
+    """
+    Run every job under one RequestBudget and return the summary dict.
+
+    concurrency bounds API requests in flight across all jobs; max_jobs bounds
+    how many jobs are in progress at once (default: concurrency). A failing job
+    is recorded and never stops the others.
+    """
+    budget = RequestBudget(concurrency, per_minute)
+    REQUEST_BUDGET.set(budget)  # Inherited by every task started below
+    job_slots = asyncio.Semaphore(max(1, max_jobs or concurrency))
+    progress = Progress(len(jobs), budget)
+    started_at = datetime.now()
+
+    async def run_job(job: BatchJob) -> JobResult:
+        result = JobResult(name=job.name, category=job.category)
+        async with job_slots:
+            progress.running += 1
+            start = time.monotonic()
+            try:
+                outcome = await agenerate_and_select(
+                    prompt=job.prompt,
+                    name=job.name,
+                    category=job.category,
+                    count=job.count,
+                    aspect_ratio=job.aspect,
+                    auto_select=job.auto_select,
+                    use_cache=use_cache,
+                    backend=job.backend,
+                    image_size=job.size,
+                )
+                result.status = "ok"
+                result.generated = outcome["generated"]
+                result.images = len(result.generated)
+                result.grid = outcome["grid"]
+                result.final = outcome["final"]
+                progress.done += 1
+                progress.images += result.images
+            except Exception as e:
+                result.status = "failed"
+                result.error = str(e)
+                progress.failed += 1
+                log(f"\n[BATCH] [ERROR] {job.name}: {e}")
+            finally:
+                progress.running -= 1
+                result.seconds = round(time.monotonic() - start, 2)
+        log(progress.line())
+        return result
+
+    log(f"[BATCH] {len(jobs)} jobs, {budget.concurrency} requests in flight"
+        + (f", {per_minute:g}/min" if per_minute else ""))
+    reporter = asyncio.create_task(_report_progress(progress, progress_interval))
+    try:
+        results = await asyncio.gather(*(run_job(job) for job in jobs))
+    finally:
+        reporter.cancel()
+
+    elapsed = time.monotonic() - progress.started
+    return {
+        "started": started_at.isoformat(),
+        "finished": datetime.now().isoformat(),
+        "seconds": round(elapsed, 2),
+        "concurrency": budget.concurrency,
+        "rate_per_minute": per_minute,
+        "jobs_total": len(jobs),
+        "jobs_ok": progress.done,
+        "jobs_failed": progress.failed,
+        "images": progress.images,
+        "requests": budget.requests,
+        "images_per_minute": round(progress.images / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "jobs": [asdict(r) for r in results],
+        "cache": get_default_cache().summary(),
+        "evaluation_cache": get_evaluation_cache().summary(),
+        "clients": client_stats(),
+        "router": get_router().summary(),
+    }
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a manifest of EVOLEA image generation jobs in parallel",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__[__doc__.index("Usage:"):],
+    )
+    parser.add_argument("manifest", type=Path, help="JSON or YAML manifest of jobs")
+    parser.add_argument("--concurrency", type=int, default=CONFIG.default_concurrency,
+                       help=f"Max API requests in flight across all jobs (default: {CONFIG.default_concurrency})")
+    parser.add_argument("--rate", type=float, default=None,
+                       help="Max API requests started per minute across all jobs (default: unlimited)")
+    parser.add_argument("--jobs", type=int, default=None,
+                       help="Max jobs in progress at once (default: --concurrency)")
+    parser.add_argument("--summary", default=None,
+                       help="Where to write the JSON summary ('-' for stdout; "
+                            "default: .cache/batch/batch_<timestamp>.json)")
+    parser.add_argument("--progress-interval", type=float, default=10.0,
+                       help="Seconds between progress lines (default: 10)")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Always call the API, bypassing the generation cache")
+
+    args = parser.parse_args()
+
+    try:
+        jobs = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        log(f"[ERROR] Invalid manifest: {e}")
+        sys.exit(2)
+
+    if args.no_cache:
+        get_default_cache().enabled = False
+        get_evaluation_cache().enabled = False
+
+    summary = asyncio.run(arun_batch(
+        jobs,
+        concurrency=args.concurrency,
+        per_minute=args.rate,
+        max_jobs=args.jobs,
+        use_cache=not args.no_cache,
+        progress_interval=args.progress_interval,
+    ))
+
+    log(f"\n[POOL] {format_client_stats()}")
+    log(f"[CACHE] {get_default_cache().format_stats()}")
+    log(f"[EVAL CACHE] {get_evaluation_cache().format_stats()}")
+    log(f"[ROUTER] {get_router().format_stats()}")
+
+    payload = json.dumps(summary, indent=2)
+    if args.summary == "-":
+        print(payload)
+    else:
+        summary_path = Path(args.summary) if args.summary else (
+            DEFAULT_SUMMARY_DIR / f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        summary_path.parent.mkdir(parents=True, exist_ok=True)
+        summary_path.write_text(payload, encoding="utf-8")
+        log(f"[BATCH] Summary: {summary_path}")
+
+    log(f"[BATCH] Done: {summary['jobs_ok']}/{summary['jobs_total']} jobs, "
+        f"{summary['images']} images in {_fmt_duration(summary['seconds'])}")
+    sys.exit(1 if summary["jobs_failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
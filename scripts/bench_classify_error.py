@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Error Classification Benchmark
+==============================
+Classifies a corpus of error strings with the legacy substring chain (kept
+here as the baseline) and with error_handling.classify_error, then reports
+the time per call and every string the two disagree on.
+
+The corpus is every raw error message found in scripts/error_logs/*.json
+(written by generate-asset.py and ErrorLogger). When there are no logs yet, a
+built-in set of messages as the SDKs actually format them is used instead.
+
+Usage:
+    python scripts/bench_classify_error.py
+    python scripts/bench_classify_error.py --logs path/to/error_logs --repeat 2000 --rounds 10
+    python scripts/bench_classify_error.py --builtin      # ignore error_logs/
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Iterable, List
+
+# Add scripts directory to path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from error_handling import (
+    ErrorCategory,
+    ErrorInfo,
+    ErrorSeverity,
+    _extract_retry_after,
+    classify_error,
+)
+
+DEFAULT_LOG_DIR = Path(__file__).parent / "error_logs"
+
+BUILTIN_CORPUS = [
+    # anthropic
+    "Error code: 429 - {'type': 'error', 'error': {'type': 'rate_limit_error', 'message': "
+    "'Number of request tokens has exceeded your per-minute rate limit'}}",
+    "Error code: 400 - {'type': 'error', 'error': {'type': 'invalid_request_error', 'message': "
+    "'messages.0.content.1.image.source.base64.data: Image does not match the provided media type image/png'}}",
+    "Error code: 400 - {'type': 'error', 'error': {'type': 'invalid_request_error', 'message': "
+    "'messages.0.content.0.image.source.base64: image exceeds 5 MB maximum: 5308416 bytes > 5242880 bytes'}}",
+    "Error code: 401 - {'type': 'error', 'error': {'type': 'authentication_error', 'message': 'invalid x-api-key'}}",
+    "Error code: 500 - {'type': 'error', 'error': {'type': 'api_error', 'message': 'Internal server error'}}",
+    "Error code: 529 - {'type': 'error', 'error': {'type': 'overloaded_error', 'message': 'Overloaded'}}",
+    "Connection error.",
+    "Request timed out.",
+    # google-genai
+    "429 RESOURCE_EXHAUSTED. {'error': {'code': 429, 'message': 'You exceeded your current quota, "
+    "please check your plan and billing details.', 'status': 'RESOURCE_EXHAUSTED'}}",
+    "400 INVALID_ARGUMENT. {'error': {'code': 400, 'message': 'Request contains an invalid argument.', "
+    "'status': 'INVALID_ARGUMENT'}}",
+    "400 FAILED_PRECONDITION. {'error': {'code': 400, 'message': 'User location is not supported for the API use.', "
+    "'status': 'FAILED_PRECONDITION'}}",
+    "403 PERMISSION_DENIED. {'error': {'code': 403, 'message': 'API key not valid. Please pass a valid API key.', "
+    "'status': 'PERMISSION_DENIED'}}",
+    "503 UNAVAILABLE. {'error': {'code': 503, 'message': 'The model is overloaded. Please try again later.', "
+    "'status': 'UNAVAILABLE'}}",
+    "504 DEADLINE_EXCEEDED. {'error': {'code': 504, 'message': 'Deadline expired before operation could complete.', "
+    "'status': 'DEADLINE_EXCEEDED'}}",
+    "No image data in response (finish_reason=SAFETY)",
+    # requests / httpx (Replicate)
+    "500 Server Error: Internal Server Error for url: https://api.replicate.com/v1/predictions",
+    "Client error '422 Unprocessable Entity' for url 'https://api.replicate.com/v1/models/black-forest-labs/"
+    "flux-1.1-pro-ultra/predictions'",
+    "Server error '502 Bad Gateway' for url 'https://api.replicate.com/v1/predictions/8x2k4b1h5drm80cj'",
+    "HTTPSConnectionPool(host='api.replicate.com', port=443): Max retries exceeded with url: /v1/predictions "
+    "(Caused by NewConnectionError('<urllib3.connection.HTTPSConnection object at 0x7f3a2c1d5e50>: "
+    "Failed to establish a new connection: [Errno -3] Temporary failure in name resolution'))",
+    "HTTPSConnectionPool(host='replicate.delivery', port=443): Read timed out. (read timeout=60)",
+    # Replicate REST client (ReplicateEngine)
+    "API error: 429 - ",
+    "API error: 502 - ",
+    "API error: 503 - <html><head><title>503 Service Temporarily Unavailable</title></head></html>",
+    "API error: 401 - {\"title\":\"Unauthenticated\",\"detail\":\"You did not pass a valid authentication token\"}",
+    "Download failed (503): https://replicate.delivery/xezq/8x2k4b1h5drm80cj/out-0.webp",
+    "Prediction 8x2k4b1h5drm80cj failed: NSFW content detected. Try running it again, or try a different prompt.",
+    # local failures that merely contain numbers
+    "Replicate prediction did not finish within 1500s",
+    "Image too small: 504 bytes",
+    "cannot identify image file 'public/images/generated/pending/hero_v2_500x500.png'",
+    "Downloaded 2503 bytes, expected 18429; digest mismatch",
+    "[Errno 28] No space left on device: 'public/images/generated/candidates/hero_v4.png'",
+    "Invalid image data: PNG truncated after 4096 bytes",
+]
+
+
+def legacy_extract_json(error_str: str):
+    """The previous _extract_json_from_error, part of the baseline."""
+    try:
+        if "{" in error_str and "}" in error_str:
+            start = error_str.find("{")
+            end = error_str.rfind("}") + 1
+            return json.loads(error_str[start:end])
+    except (json.JSONDecodeError, ValueError):
+        pass
+    return None
+
+
+def legacy_classify_error(error) -> ErrorInfo:
+    """The previous classify_error substring chain, kept here as the baseline."""
+    error_str = str(error)
+    error_lower = error_str.lower()
+    parsed_json = legacy_extract_json(error_str)
+    original = error if isinstance(error, Exception) else None
+
+    def info(category, severity, message, details, retryable=True, retry_after=None):
+        return ErrorInfo(category=category, severity=severity, message=message, original_error=original,
+                         details=details, is_retryable=retryable, retry_after=retry_after)
+
+    if "does not match the provided media type" in error_str:
+        return info(ErrorCategory.MEDIA_TYPE, ErrorSeverity.RECOVERABLE,
+                    "Image data doesn't match declared media type",
+                    {"raw_error": error_str, "parsed_json": parsed_json,
+                     "suggestion": "Image may be corrupt or wrong format. Will try to re-encode."}, retry_after=1)
+    if "rate_limit" in error_lower or "429" in error_str or "too many requests" in error_lower:
+        return info(ErrorCategory.RATE_LIMIT, ErrorSeverity.RECOVERABLE, "Rate limited by API",
+                    {"raw_error": error_str, "parsed_json": parsed_json},
+                    retry_after=_extract_retry_after(error_str, parsed_json) or 60)
+    if "401" in error_str or "unauthorized" in error_lower or "invalid api key" in error_lower:
+        return info(ErrorCategory.AUTH, ErrorSeverity.FATAL, "Authentication failed - check API key",
+                    {"raw_error": error_str}, retryable=False)
+    if "500" in error_str or "502" in error_str or "503" in error_str or "504" in error_str:
+        return info(ErrorCategory.SERVER, ErrorSeverity.RECOVERABLE, "Server error - API may be experiencing issues",
+                    {"raw_error": error_str, "parsed_json": parsed_json}, retry_after=5)
+    if "timeout" in error_lower or "timed out" in error_lower:
+        return info(ErrorCategory.TIMEOUT, ErrorSeverity.RECOVERABLE, "Operation timed out",
+                    {"raw_error": error_str}, retry_after=2)
+    if "connection" in error_lower or "network" in error_lower or "dns" in error_lower:
+        return info(ErrorCategory.NETWORK, ErrorSeverity.RECOVERABLE, "Network connection error",
+                    {"raw_error": error_str}, retry_after=3)
+    if "400" in error_str or "bad request" in error_lower or "invalid_request" in error_lower:
+        return info(ErrorCategory.API_ERROR, ErrorSeverity.RECOVERABLE, "Bad request - check input parameters",
+                    {"raw_error": error_str, "parsed_json": parsed_json}, retry_after=1)
+    return info(ErrorCategory.UNKNOWN, ErrorSeverity.RECOVERABLE, f"Unexpected error: {error_str[:200]}",
+                {"raw_error": error_str, "parsed_json": parsed_json}, retry_after=2)
+
+
+def _messages(node) -> Iterable[str]:
+    """Error strings anywhere in a logged JSON document."""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in ("raw_error", "error", "message") and isinstance(value, str) and value:
+                yield value
+            else:
+                yield from _messages(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _messages(item)
+
+
+def load_corpus(log_dir: Path) -> List[str]:
+    """Unique error strings from log_dir, in file order."""
+    seen = {}
+    for path in sorted(log_dir.glob("*.json")):
+        try:
+            document = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        for message in _messages(document):
+            seen.setdefault(message, None)
+    return list(seen)
+
+
+def sdk_exceptions(corpus: List[str]) -> List[Exception]:
+    """The corpus as SDK-shaped exceptions: same messages, with a class name and status_code attached."""
+    shapes = {
+        "rate_limit": ("RateLimitError", 429),
+        "auth": ("AuthenticationError", 401),
+        "server": ("InternalServerError", 500),
+        "api_error": ("BadRequestError", 400),
+        "media_type": ("BadRequestError", 400),
+    }
+    errors = []
+    for message in corpus:
+        name, code = shapes.get(legacy_classify_error(message).category.value, ("APIConnectionError", None))
+        errors.append(type(name, (Exception,), {"status_code": code})(message))
+    return errors
+
+
+def _time_per_call(fn, corpus: List, repeat: int, rounds: int) -> float:
+    """Best of rounds timings, each of repeat passes over the corpus."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for message in corpus:
+                fn(message)
+        best = min(best, time.perf_counter() - start)
+    return best / (repeat * len(corpus))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark and diff error classification",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__[__doc__.index("Usage:"):],
+    )
+    parser.add_argument("--logs", type=Path, default=DEFAULT_LOG_DIR, help="Directory of error log JSON files")
+    parser.add_argument("--builtin", action="store_true", help="Use the built-in corpus even if logs exist")
+    parser.add_argument("--repeat", type=int, default=500, help="Passes over the corpus per timing (default: 500)")
+    parser.add_argument("--rounds", type=int, default=5, help="Timings per classifier, best one kept (default: 5)")
+    args = parser.parse_args()
+
+    corpus = [] if args.builtin or not args.logs.is_dir() else load_corpus(args.logs)
+    source = f"{args.logs} ({len(corpus)} messages)"
+    if not corpus:
+        corpus = BUILTIN_CORPUS
+        source = f"built-in corpus ({len(corpus)} messages)"
+    print(f"Corpus: {source}")
+
+    exceptions = sdk_exceptions(corpus)
+    print(f"\n{'classifier':<12} {'strings':>10} {'exceptions':>11}  (us/call)")
+    for label, fn in (("legacy", legacy_classify_error), ("rules", classify_error)):
+        strings = _time_per_call(fn, corpus, args.repeat, args.rounds)
+        structured = _time_per_call(fn, exceptions, args.repeat, args.rounds)
+        print(f"{label:<12} {strings * 1e6:>10.2f} {structured * 1e6:>11.2f}")
+
+    changed = [(m, legacy_classify_error(m).category.value, classify_error(m).category.value) for m in corpus]
+    changed = [row for row in changed if row[1] != row[2]]
+    print(f"\n{len(changed)} of {len(corpus)} messages classified differently")
+    for message, old, new in changed:
+        short = message if len(message) <= 90 else message[:87] + "..."
+        print(f"  {old:>10} -> {new:<10} {short}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Comparison-Grid Memory Benchmark
+================================
+Renders the same review grid two ways and reports peak memory and wall time:
+
+  legacy    every image opened at full size, copied and thumbnailed into a
+            canvas sized to the largest image (the old create_comparison_grid)
+  bounded   image_grid.render_grid: lazy decode with draft/reduce, one image
+            in memory at a time, output width capped
+
+Each run happens in a fresh process so ru_maxrss is that run's own peak.
+
+Usage:
+    python scripts/bench_grid.py                       # 4 x 4K PNG candidates
+    python scripts/bench_grid.py --count 16 --format jpeg
+    python scripts/bench_grid.py --size 2048x1152 --max-width 1600
+"""
+
+import sys
+import time
+import math
+import argparse
+import resource
+import tempfile
+import multiprocessing
+from pathlib import Path
+from typing import Dict, List
+
+# Add scripts directory to path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from PIL import Image
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _make_candidates(directory: Path, count: int, size, fmt: str) -> None:
+    """Synthetic candidates with real-image-like (incompressible) content."""
+    for i in range(count):
+        noise = Image.effect_noise(size, 30 + i)
+        img = Image.merge("RGB", (noise, noise.rotate(90, expand=False), noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+        path = directory / f"candidate_v{i + 1}.{'jpg' if fmt == 'jpeg' else fmt}"
+        img.save(path, quality=90) if fmt == "jpeg" else img.save(path)
+
+
+def _legacy_grid(image_paths: List[Path], output_path: Path) -> None:
+    """The previous create_comparison_grid strategy, kept here as the baseline."""
+    images = [Image.open(p) for p in image_paths]
+    max_w = max(img.width for img in images)
+    max_h = max(img.height for img in images)
+    cols, rows = 2, math.ceil(len(images) / 2)
+    padding, label_height = 10, 30
+    grid = Image.new("RGB", (cols * max_w + (cols + 1) * padding,
+                             rows * (max_h + label_height) + (rows + 1) * padding), "white")
+    for idx, img in enumerate(images):
+        row, col = idx // cols, idx % cols
+        img_resized = img.copy()
+        img_resized.thumbnail((max_w, max_h), Image.Resampling.LANCZOS)
+        grid.paste(img_resized, (padding + col * (max_w + padding),
+                                 padding + row * (max_h + label_height + padding)))
+    grid.save(output_path)
+
+
+def _run(mode: str, image_paths: List[Path], output_path: Path, max_width: int, queue) -> None:
+    from image_grid import render_grid
+
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "legacy":
+        _legacy_grid(image_paths, output_path)
+    else:
+        render_grid(image_paths, output_path, max_width=max_width,
+                    labels=[f"Image {i}" for i in range(1, len(image_paths) + 1)])
+    elapsed = time.perf_counter() - start
+    with Image.open(output_path) as grid:
+        grid_size = grid.size
+    queue.put({
+        "mode": mode,
+        "seconds": elapsed,
+        "peak_mb": _peak_rss_mb(),
+        "baseline_mb": baseline,
+        "grid": grid_size,
+        "bytes": output_path.stat().st_size,
+    })
+
+
+def measure(mode: str, image_paths: List[Path], output_path: Path, max_width: int) -> Dict:
+    """Run one renderer in a fresh process and return its measurements."""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(mode, image_paths, output_path, max_width, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark peak memory of comparison-grid rendering",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__[__doc__.index("Usage:"):],
+    )
+    parser.add_argument("--count", type=int, default=4, help="Number of candidate images (default: 4)")
+    parser.add_argument("--size", default="3840x2160", help="Candidate size WxH (default: 3840x2160)")
+    parser.add_argument("--format", default="png", choices=["png", "jpeg", "webp"],
+                       help="Candidate file format (default: png)")
+    parser.add_argument("--max-width", type=int, default=2400, help="Grid width cap for the bounded renderer")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only measure the bounded renderer")
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+
+    with tempfile.TemporaryDirectory(prefix="evolea-bench-grid-") as tmp:
+        tmp = Path(tmp)
+        print(f"Creating {args.count} x {size[0]}x{size[1]} {args.format} candidates...")
+        # In a child too: ru_maxrss survives fork+exec, so this process must stay small
+        ctx = multiprocessing.get_context("spawn")
+        maker = ctx.Process(target=_make_candidates, args=(tmp, args.count, size, args.format))
+        maker.start()
+        maker.join()
+        ext = "jpg" if args.format == "jpeg" else args.format
+        paths = [tmp / f"candidate_v{i + 1}.{ext}" for i in range(args.count)]
+
+        modes = ["bounded"] if args.skip_legacy else ["legacy", "bounded"]
+        results = [measure(mode, paths, tmp / f"grid_{mode}.png", args.max_width) for mode in modes]
+
+    print(f"\n{'mode':<9} {'peak MB':>9} {'+MB':>8} {'seconds':>8}  grid")
+    for r in results:
+        print(f"{r['mode']:<9} {r['peak_mb']:>9.1f} {r['peak_mb'] - r['baseline_mb']:>8.1f} "
+              f"{r['seconds']:>8.2f}  {r['grid'][0]}x{r['grid'][1]} ({r['bytes'] / 1024 / 1024:.1f} MB)")
+    if len(results) == 2:
+        legacy, bounded = results
+        saved = (legacy["peak_mb"] - legacy["baseline_mb"]) / max(bounded["peak_mb"] - bounded["baseline_mb"], 0.1)
+        print(f"\nBounded renderer uses {saved:.1f}x less memory above baseline, "
+              f"{legacy['seconds'] / max(bounded['seconds'], 1e-6):.1f}x the legacy speed")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,16 +6,22 @@ This module provides foolproof error handling for image generation operations,
 including validation, retry logic, and graceful degradation.
 """
 
+import asyncio
 import base64
 import io
 import json
+import math
+import os
+import random
+import re
+import threading
 import time
 import traceback
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum, auto
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, TypeVar, Union
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, Union
 
 # ============================================================================
 # ERROR TYPES
@@ -40,6 +46,7 @@ class ErrorCategory(Enum):
     TIMEOUT = "timeout"              # Operation timed out
     AUTH = "auth"                    # Authentication issues
     SERVER = "server"                # Server-side errors (5xx)
+    CIRCUIT_OPEN = "circuit_open"    # Not attempted: the backend's circuit breaker is open
     UNKNOWN = "unknown"              # Unclassified errors
 
 
@@ -147,6 +154,256 @@ class OperationResult:
 # ============================================================================
 # ERROR CLASSIFICATION
 # ============================================================================
+#
+# Classification is table driven. Structured information on the exception is
+# checked first (SDK exception types, HTTP status codes); only when that is
+# inconclusive is the message scanned, once, by a single precompiled regex
+# built from the phrase rules below. When several rules match, the rule
+# listed first wins.
+
+# Per-category result: (severity, message, is_retryable, retry_after, include parsed_json)
+_CATEGORY_RESULTS: Dict[ErrorCategory, tuple] = {
+    ErrorCategory.MEDIA_TYPE: (ErrorSeverity.RECOVERABLE, "Image data doesn't match declared media type", True, 1, True),
+    ErrorCategory.RATE_LIMIT: (ErrorSeverity.RECOVERABLE, "Rate limited by API", True, 60, True),
+    ErrorCategory.AUTH: (ErrorSeverity.FATAL, "Authentication failed - check API key", False, None, False),
+    ErrorCategory.SERVER: (ErrorSeverity.RECOVERABLE, "Server error - API may be experiencing issues", True, 5, True),
+    ErrorCategory.TIMEOUT: (ErrorSeverity.RECOVERABLE, "Operation timed out", True, 2, False),
+    ErrorCategory.NETWORK: (ErrorSeverity.RECOVERABLE, "Network connection error", True, 3, False),
+    ErrorCategory.API_ERROR: (ErrorSeverity.RECOVERABLE, "Bad request - check input parameters", True, 1, True),
+    ErrorCategory.CIRCUIT_OPEN: (ErrorSeverity.RECOVERABLE, "Backend circuit open - failing fast", False, None, False),
+}
+
+MEDIA_TYPE_MARKER = "does not match the provided media type"
+
+# HTTP status code -> category (other 5xx are SERVER, other 4xx API_ERROR)
+STATUS_CATEGORIES: Dict[int, ErrorCategory] = {
+    401: ErrorCategory.AUTH,
+    403: ErrorCategory.AUTH,
+    408: ErrorCategory.TIMEOUT,
+    429: ErrorCategory.RATE_LIMIT,
+}
+
+
+def _category_for_status(code: int) -> Optional[ErrorCategory]:
+    if code in STATUS_CATEGORIES:
+        return STATUS_CATEGORIES[code]
+    if 500 <= code <= 599:
+        return ErrorCategory.SERVER
+    if 400 <= code <= 499:
+        return ErrorCategory.API_ERROR
+    return None
+
+
+# Exception class name (anywhere in the MRO) -> category. Names rather than
+# imports, so none of the SDKs has to be installed for this table to load.
+EXCEPTION_CATEGORIES: Dict[str, ErrorCategory] = {
+    # anthropic
+    "RateLimitError": ErrorCategory.RATE_LIMIT,
+    "AuthenticationError": ErrorCategory.AUTH,
+    "PermissionDeniedError": ErrorCategory.AUTH,
+    "InternalServerError": ErrorCategory.SERVER,
+    "APITimeoutError": ErrorCategory.TIMEOUT,
+    "APIConnectionError": ErrorCategory.NETWORK,
+    # google-genai (ClientError carries .code, read as a status below)
+    "ServerError": ErrorCategory.SERVER,
+    # requests / httpx / urllib3
+    "Timeout": ErrorCategory.TIMEOUT,
+    "TimeoutException": ErrorCategory.TIMEOUT,
+    "ReadTimeoutError": ErrorCategory.TIMEOUT,
+    "ConnectError": ErrorCategory.NETWORK,
+    "NetworkError": ErrorCategory.NETWORK,
+    "NewConnectionError": ErrorCategory.NETWORK,
+    # this module
+    "CircuitOpenError": ErrorCategory.CIRCUIT_OPEN,
+    # builtins (asyncio.TimeoutError is TimeoutError on 3.11+)
+    "TimeoutError": ErrorCategory.TIMEOUT,
+    "ConnectionError": ErrorCategory.NETWORK,
+}
+
+# Message rules in priority order: (name, category, phrases). Phrases are
+# matched against the lower-cased message with "_" read as a space. The
+# "status" rule is special: its phrases only count when followed by an HTTP
+# status code ("Error code: 500", "'code': 429", "Server error '503 ..."),
+# and a code that starts the message ("429 RESOURCE_EXHAUSTED") counts too.
+# Bare numbers never do, so "took 1500ms" or "hero_500x500.png" is no 5xx.
+_TEXT_RULES: List[tuple] = [
+    ("media_type", ErrorCategory.MEDIA_TYPE, (MEDIA_TYPE_MARKER,)),
+    # "code" also covers "Error code: 500" and "status_code=503"; "(" covers
+    # "Download failed (503): ..." (the code must follow it directly)
+    ("status", None, ("status", "code", "http", "server error", "client error", "api error", "(")),
+    ("rate_limit", ErrorCategory.RATE_LIMIT,
+     ("rate limit", "ratelimit", "too many requests", "resource exhausted", "quota exceeded")),
+    ("auth", ErrorCategory.AUTH,
+     ("unauthorized", "invalid api key", "api key not valid", "authentication error", "permission denied")),
+    ("server", ErrorCategory.SERVER,
+     ("internal server error", "bad gateway", "service unavailable", "overloaded")),
+    ("timeout", ErrorCategory.TIMEOUT, ("timeout", "timed out", "deadline exceeded")),
+    ("network", ErrorCategory.NETWORK,
+     ("connection", "network", "dns", "name or service not known", "getaddrinfo", "name resolution")),
+    ("bad_request", ErrorCategory.API_ERROR, ("bad request", "invalid request", "invalid argument")),
+]
+
+_STATUS_CODE = r"[1-5]\d\d(?![\w.]\d|\w)"
+_STATUS_SEPARATOR = r"\s*[\"']?\s*[:=]?\s*"
+# A status at the start ("429 RESOURCE_EXHAUSTED", "Error code: 529 - ", "API error: 502 - ")
+_LEADING_STATUS = re.compile(rf"\s*(?:(?:api )?error(?: code)?\s*:?\s*)?(?P<code>{_STATUS_CODE})")
+_LEADING_CHARS = " \t\n12345ae"  # First characters _LEADING_STATUS can match
+_CODE_AFTER = re.compile(rf"{_STATUS_SEPARATOR}(?P<code>{_STATUS_CODE})")
+
+_phrase_rank: Dict[str, int] = {}
+_status_rank = 0
+_code_categories: Dict[str, Optional[ErrorCategory]] = {}  # "429" -> category, for codes matched in text
+_rank_patterns: List[Optional["re.Pattern[str]"]] = []  # [rank]: phrases of the rules ranked above it
+
+
+def _trie_pattern(phrases, leaf: Callable[[str], str] = lambda phrase: "") -> str:
+    """
+    Regex alternation of phrases, factored on shared prefixes (re tries each
+    branch per position). leaf(phrase) is appended where a phrase ends;
+    longer phrases are tried first.
+    """
+    trie: Dict[str, dict] = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = leaf(phrase)
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if "" in node:
+            branches.append(node[""])
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+
+def _compile_rules() -> None:
+    global _phrase_rank, _status_rank, _code_categories, _rank_patterns
+    _code_categories = {str(code): _category_for_status(code) for code in range(100, 600)}
+    _phrase_rank = {}
+    for rank, (name, _, phrases) in enumerate(_TEXT_RULES):
+        if name == "status":
+            _status_rank = rank
+        for phrase in phrases:
+            _phrase_rank.setdefault(phrase, rank)
+    # Status phrases only match when a code follows, so re skips the rest without a round trip
+    status_leaf = rf"(?={_STATUS_SEPARATOR}{_STATUS_CODE})"
+
+    def leaf(phrase: str) -> str:
+        return status_leaf if _phrase_rank[phrase] == _status_rank else ""
+
+    _rank_patterns = []
+    for rank in range(len(_TEXT_RULES) + 1):
+        above = [phrase for phrase, r in _phrase_rank.items() if r < rank]
+        _rank_patterns.append(re.compile(_trie_pattern(above, leaf)) if above else None)
+
+
+_compile_rules()
+
+
+def register_error_rule(name: str, category: ErrorCategory, phrases, before: Optional[str] = None) -> None:
+    """
+    Add a message rule to the classifier.
+
+    phrases are lower-case literals ("_" written as a space). The rule is
+    tried before the existing rule named `before`, or after all of them.
+    """
+    if category not in _CATEGORY_RESULTS:
+        raise ValueError(f"No result defined for category {category}")
+    names = [rule[0] for rule in _TEXT_RULES]
+    if name in names:
+        raise ValueError(f"Rule {name!r} already registered")
+    position = names.index(before) if before else len(_TEXT_RULES)
+    _TEXT_RULES.insert(position, (name, category, tuple(p.lower().replace("_", " ") for p in phrases)))
+    _compile_rules()
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """HTTP status carried by the exception (anthropic, google-genai, requests, httpx)."""
+    response = getattr(error, "response", None)
+    for value in (getattr(error, "status_code", None), getattr(error, "code", None),
+                  getattr(response, "status_code", None)):
+        if isinstance(value, int) and not isinstance(value, bool) and 100 <= value <= 599:
+            return value
+    return None
+
+
+def _error_chain(error: BaseException) -> Iterator[BaseException]:
+    """error, then the exceptions it was raised from or while handling."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or (None if error.__suppress_context__ else error.__context__)
+
+
+def _structured_category(error: BaseException) -> Tuple[Optional[ErrorCategory], Optional[int]]:
+    """
+    Category from the exception's type or status code, if either is
+    conclusive, and the first HTTP status in the chain. Wrappers such as
+    _collect_saved's RuntimeError are looked through to the error they were
+    raised from.
+    """
+    category = status = None
+    for link in _error_chain(error):
+        code = _status_code(link)
+        if status is None:
+            status = code
+        if category is None:
+            for cls in type(link).__mro__:
+                category = EXCEPTION_CATEGORIES.get(cls.__name__)
+                if category is not None:
+                    break
+            else:
+                if code is not None:
+                    category = _category_for_status(code)
+        if category is not None and status is not None:
+            break
+    return category, status
+
+
+def _text_category(error_str: str) -> Optional[ErrorCategory]:
+    """
+    Highest-priority message rule matching error_str, in one left-to-right
+    scan: after each hit only the rules ranked above it are searched for in
+    the rest of the string, so the search gets narrower as it goes.
+    """
+    text = error_str.lower().replace("_", " ")
+    best_rank, best, pos = len(_TEXT_RULES), None, 0
+
+    if text[:1] in _LEADING_CHARS:
+        leading = _LEADING_STATUS.match(text)
+        if leading:
+            best = _code_categories[leading["code"]]
+            if best is not None:
+                best_rank, pos = _status_rank, leading.end()
+
+    pattern = _rank_patterns[best_rank]
+    while pattern is not None:
+        match = pattern.search(text, pos)
+        if match is None:
+            break
+        pos = match.end()
+        rank = _phrase_rank[match[0]]
+        if rank == _status_rank:
+            category = _code_categories[_CODE_AFTER.match(text, pos)["code"]]
+            if category is None:
+                continue
+        else:
+            category = _TEXT_RULES[rank][1]
+        best_rank, best, pattern = rank, category, _rank_patterns[rank]
+    return best
+
+
+def _retry_after_header(error: BaseException) -> Optional[int]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        value = headers.get("retry-after") if headers is not None else None
+        return int(float(value)) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
 
 def classify_error(error: Union[Exception, str]) -> ErrorInfo:
     """
@@ -154,115 +411,69 @@ def classify_error(error: Union[Exception, str]) -> ErrorInfo:
     This is the main entry point for error classification.
     """
     error_str = str(error)
-    error_lower = error_str.lower()
+    exception = error if isinstance(error, BaseException) else None
 
-    # Extract JSON from error if present
-    parsed_json = _extract_json_from_error(error_str)
+    category = status = None
+    if exception is not None:
+        category, status = _structured_category(exception)
+        # Media type mismatches arrive as plain 400s, so that message beats the status
+        if category is not None and MEDIA_TYPE_MARKER in error_str.lower():
+            category = None
+    if category is None:
+        category = _text_category(error_str)
 
-    # Check for specific error patterns
-    if "does not match the provided media type" in error_str:
-        return ErrorInfo(
-            category=ErrorCategory.MEDIA_TYPE,
-            severity=ErrorSeverity.RECOVERABLE,
-            message="Image data doesn't match declared media type",
-            original_error=error if isinstance(error, Exception) else None,
-            details={
-                "raw_error": error_str,
-                "parsed_json": parsed_json,
-                "suggestion": "Image may be corrupt or wrong format. Will try to re-encode."
-            },
-            is_retryable=True,
-            retry_after=1
-        )
+    original = error if isinstance(error, Exception) else None
 
-    if "rate_limit" in error_lower or "429" in error_str or "too many requests" in error_lower:
-        retry_after = _extract_retry_after(error_str, parsed_json)
+    if category is None:
         return ErrorInfo(
-            category=ErrorCategory.RATE_LIMIT,
-            severity=ErrorSeverity.RECOVERABLE,
-            message="Rate limited by API",
-            original_error=error if isinstance(error, Exception) else None,
-            details={"raw_error": error_str, "parsed_json": parsed_json},
-            is_retryable=True,
-            retry_after=retry_after or 60
-        )
-
-    if "401" in error_str or "unauthorized" in error_lower or "invalid api key" in error_lower:
-        return ErrorInfo(
-            category=ErrorCategory.AUTH,
-            severity=ErrorSeverity.FATAL,
-            message="Authentication failed - check API key",
-            original_error=error if isinstance(error, Exception) else None,
-            details={"raw_error": error_str},
-            is_retryable=False
-        )
-
-    if "500" in error_str or "502" in error_str or "503" in error_str or "504" in error_str:
-        return ErrorInfo(
-            category=ErrorCategory.SERVER,
-            severity=ErrorSeverity.RECOVERABLE,
-            message="Server error - API may be experiencing issues",
-            original_error=error if isinstance(error, Exception) else None,
-            details={"raw_error": error_str, "parsed_json": parsed_json},
-            is_retryable=True,
-            retry_after=5
-        )
-
-    if "timeout" in error_lower or "timed out" in error_lower:
-        return ErrorInfo(
-            category=ErrorCategory.TIMEOUT,
+            category=ErrorCategory.UNKNOWN,
             severity=ErrorSeverity.RECOVERABLE,
-            message="Operation timed out",
-            original_error=error if isinstance(error, Exception) else None,
-            details={"raw_error": error_str},
+            message=f"Unexpected error: {error_str[:200]}",
+            original_error=original,
+            details={"raw_error": error_str, "parsed_json": _extract_json_from_error(error_str)},
             is_retryable=True,
             retry_after=2
         )
 
-    if "connection" in error_lower or "network" in error_lower or "dns" in error_lower:
-        return ErrorInfo(
-            category=ErrorCategory.NETWORK,
-            severity=ErrorSeverity.RECOVERABLE,
-            message="Network connection error",
-            original_error=error if isinstance(error, Exception) else None,
-            details={"raw_error": error_str},
-            is_retryable=True,
-            retry_after=3
-        )
-
-    if "400" in error_str or "bad request" in error_lower or "invalid_request" in error_lower:
-        return ErrorInfo(
-            category=ErrorCategory.API_ERROR,
-            severity=ErrorSeverity.RECOVERABLE,
-            message="Bad request - check input parameters",
-            original_error=error if isinstance(error, Exception) else None,
-            details={"raw_error": error_str, "parsed_json": parsed_json},
-            is_retryable=True,  # May be retryable with modified input
-            retry_after=1
-        )
+    severity, message, retryable, retry_after, with_json = _CATEGORY_RESULTS[category]
+    parsed_json = _extract_json_from_error(error_str) if with_json else None
+    details: Dict[str, Any] = {"raw_error": error_str}
+    if with_json:
+        details["parsed_json"] = parsed_json
+    if category is ErrorCategory.MEDIA_TYPE:
+        details["suggestion"] = "Image may be corrupt or wrong format. Will try to re-encode."
+    elif category is ErrorCategory.CIRCUIT_OPEN:
+        retry_after = getattr(exception, "retry_after", None)
+    elif category is ErrorCategory.RATE_LIMIT:
+        headers = (_retry_after_header(link) for link in _error_chain(exception)) if exception is not None else ()
+        retry_after = _extract_retry_after(error_str, parsed_json) or next(filter(None, headers), None) or retry_after
+    if status is not None:
+        details["status_code"] = status
 
-    # Default case
     return ErrorInfo(
-        category=ErrorCategory.UNKNOWN,
-        severity=ErrorSeverity.RECOVERABLE,
-        message=f"Unexpected error: {error_str[:200]}",
-        original_error=error if isinstance(error, Exception) else None,
-        details={"raw_error": error_str, "parsed_json": parsed_json},
-        is_retryable=True,
-        retry_after=2
+        category=category,
+        severity=severity,
+        message=message,
+        original_error=original,
+        details=details,
+        is_retryable=retryable,
+        retry_after=retry_after
     )
 
 
 def _extract_json_from_error(error_str: str) -> Optional[Dict]:
     """Try to extract JSON from error message."""
+    start = error_str.find("{")
+    if start < 0:
+        return None
+    end = error_str.rfind("}") + 1
+    # SDK messages mostly embed a Python dict repr ({'type': ...}): not JSON, so don't try
+    if error_str[start + 1:end].lstrip()[:1] not in ('"', "}"):
+        return None
     try:
-        if "{" in error_str and "}" in error_str:
-            start = error_str.find("{")
-            end = error_str.rfind("}") + 1
-            return json.loads(error_str[start:end])
+        return json.loads(error_str[start:end])
     except (json.JSONDecodeError, ValueError):
-        pass
-    return None
+        return None
 
 
 def _extract_retry_after(error_str: str, parsed_json: Optional[Dict]) -> Optional[int]:
@@ -556,17 +767,338 @@ def encode_image_for_api(
     )
 
 
+# ============================================================================
+# CIRCUIT BREAKER
+# ============================================================================
+
+# Failures that say the backend itself is down; any other response proves it is up
+BREAKER_FAILURES = {ErrorCategory.SERVER, ErrorCategory.NETWORK, ErrorCategory.TIMEOUT}
+BREAKER_WINDOW = 10          # Recent outcomes considered
+BREAKER_MIN_CALLS = 3        # Never open on fewer outcomes than this
+BREAKER_FAILURE_RATE = 0.5   # Open at this share of backend failures in the window
+BREAKER_OPEN_SECONDS = 30.0  # First open period; doubles after each failed probe
+BREAKER_MAX_OPEN_SECONDS = 300.0
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit open for {name}: not calling it for {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for one backend.
+
+    Closed: calls go through and their outcomes fill a sliding window. Once at
+    least BREAKER_FAILURE_RATE of it are SERVER, NETWORK or TIMEOUT failures
+    the breaker opens and calls fail fast with CIRCUIT_OPEN. After the open
+    period a single probe call is let through (half-open): success closes the
+    breaker, failure opens it again for twice as long.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        max_open_seconds: float = BREAKER_MAX_OPEN_SECONDS
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self._outcomes: List[bool] = []  # True = backend failure
+        self._state = self.CLOSED
+        self._open_seconds = open_seconds
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+        self.opened = 0    # Times the breaker tripped
+        self.rejected = 0  # Calls failed fast while open
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._advance(time.monotonic())
+            return self._state
+
+    def _advance(self, now: float) -> None:
+        if self._state == self.OPEN and now - self._opened_at >= self._open_seconds:
+            self._state = self.HALF_OPEN
+            self._probe_started = None
+
+    def _open(self, now: float) -> None:
+        self._state = self.OPEN
+        self._opened_at = now
+        self._probe_started = None
+        self.opened += 1
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a probe through (0 unless open)."""
+        with self._lock:
+            now = time.monotonic()
+            self._advance(now)
+            if self._state == self.OPEN:
+                return self._open_seconds - (now - self._opened_at)
+            return 0.0
+
+    def allow(self) -> bool:
+        """
+        May a call go out now? In half-open state only one probe is in flight
+        at a time (a probe that never reports back is replaced after an open
+        period).
+        """
+        return self.admit() is not None
+
+    def admit(self) -> Optional[str]:
+        """
+        Like allow(), but says how the call was let through: CLOSED for an
+        ordinary call, HALF_OPEN for the probe (the caller then owns it and
+        must record() or release() it), None when it was refused.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._advance(now)
+            if self._state == self.CLOSED:
+                return self.CLOSED
+            if self._state == self.HALF_OPEN and (
+                self._probe_started is None or now - self._probe_started >= self._open_seconds
+            ):
+                self._probe_started = now
+                return self.HALF_OPEN
+            self.rejected += 1
+            return None
+
+    def record(self, category: Optional[ErrorCategory] = None) -> None:
+        """Report a finished call: None for success, else its error category."""
+        failed = category in BREAKER_FAILURES
+        with self._lock:
+            now = time.monotonic()
+            self._advance(now)
+            if self._state == self.HALF_OPEN:
+                if failed:
+                    self._open_seconds = min(self._open_seconds * 2, self.max_open_seconds)
+                    self._open(now)
+                else:
+                    self._state = self.CLOSED
+                    self._open_seconds = self.base_open_seconds
+                    self._outcomes = []
+                return
+            if self._state == self.OPEN:
+                return  # Straggler from before the breaker opened
+            self._outcomes = (self._outcomes + [failed])[-self.window:]
+            failures = sum(self._outcomes)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._open(now)
+
+    def release(self) -> None:
+        """Give back a half-open probe that was cancelled without an outcome."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probe_started = None
+
+    def open_error(self) -> ErrorInfo:
+        """ErrorInfo for a call rejected while open."""
+        return classify_error(CircuitOpenError(self.name, self.retry_after()))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after(), 1),
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker for a backend route ("gemini/<model>", "replicate/<model>")."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def _breaker_record(breaker: Optional[CircuitBreaker], result: OperationResult) -> None:
+    if breaker is not None:
+        breaker.record(None if result.success or not result.error else result.error.category)
+
+
+def _circuit_open(breaker: CircuitBreaker, last_result: Optional[OperationResult], attempts: int) -> OperationResult:
+    result = OperationResult.fail(breaker.open_error())
+    result.metadata["circuit_open"] = True
+    result.metadata["total_attempts"] = attempts
+    if last_result is not None and last_result.error:
+        result.metadata["last_error"] = last_result.error.message
+    return result
+
+
 # ============================================================================
 # RETRY LOGIC
 # ============================================================================
 
+JITTER_MODES = ("none", "full", "decorrelated")
+
+
+# Default retry budget: this many retries per window seconds, process-wide
+DEFAULT_RETRY_BUDGET = 20
+DEFAULT_RETRY_WINDOW = 60.0
+
+
+class RetryBudget:
+    """
+    Token bucket of retries shared by concurrent operations.
+
+    Holds at most `retries` tokens and refills at retries/window per second.
+    Each retry (never a first attempt) takes a token; with the bucket empty
+    the operation gives up instead of retrying, so a sustained outage costs
+    at most about `retries` extra requests per window however many callers
+    are failing at once. Thread-safe and never blocks, so asyncio tasks can
+    share it too.
+    """
+
+    def __init__(self, retries: float = DEFAULT_RETRY_BUDGET, window: float = DEFAULT_RETRY_WINDOW):
+        if not (math.isfinite(retries) and retries >= 0):
+            raise ValueError(f"retries must be a finite number >= 0, got {retries!r}")
+        if not (math.isfinite(window) and window > 0):
+            raise ValueError(f"window must be a finite number > 0, got {window!r}")
+        self.capacity = float(retries)
+        self.rate = retries / window
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.denied = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Take one retry token; False when the budget is spent."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.granted += 1
+                return True
+            self.denied += 1
+            return False
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def summary(self) -> Dict[str, Any]:
+        """Counters for end-of-run logging."""
+        return {
+            "tokens": round(self.tokens, 2),
+            "capacity": self.capacity,
+            "granted": self.granted,
+            "denied": self.denied,
+        }
+
+
+_default_budget: Optional[RetryBudget] = None
+_default_budget_lock = threading.Lock()
+
+
+def get_retry_budget() -> RetryBudget:
+    """
+    Process-wide retry budget (EVOLEA_RETRY_BUDGET="retries/window_seconds"
+    overrides the default of 20 retries per 60 s; an unparsable or out of
+    range value is ignored).
+    """
+    global _default_budget
+    with _default_budget_lock:
+        if _default_budget is None:
+            spec = os.environ.get("EVOLEA_RETRY_BUDGET")
+            if spec:
+                try:
+                    retries_text, _, window_text = spec.partition("/")
+                    window = float(window_text) if window_text else DEFAULT_RETRY_WINDOW
+                    _default_budget = RetryBudget(float(retries_text), window)
+                except ValueError:
+                    pass
+            if _default_budget is None:
+                _default_budget = RetryBudget()
+        return _default_budget
+
+
+def _retry_delay(
+    error: ErrorInfo,
+    delay: float,
+    max_delay: float,
+    jitter: str = "none",
+    previous: float = 0.0,
+    base: float = 1.0
+) -> float:
+    """
+    Seconds to wait before the next attempt.
+
+    delay is the current exponential backoff step and previous the last wait
+    (for decorrelated jitter). A retry_after hint from the error is a floor:
+    jitter only adds up to half of it on top, so callers given the same hint
+    spread out instead of retrying in lockstep.
+    """
+    if error.retry_after:
+        hint = min(error.retry_after, max_delay)
+        return hint if jitter == "none" else hint + random.uniform(0, hint / 2)
+    if jitter == "full":
+        return random.uniform(0, min(delay, max_delay))
+    if jitter == "decorrelated":
+        return min(max_delay, random.uniform(base, max(base, previous * 3)))
+    return min(delay, max_delay)
+
+
+def _budget_spent(last_result: OperationResult, attempts: int) -> OperationResult:
+    last_result.metadata["retry_budget_exhausted"] = True
+    last_result.metadata["total_attempts"] = attempts
+    return last_result
+
+
+def _exhausted(last_result: Optional[OperationResult], attempts: int) -> OperationResult:
+    # A failed OperationResult is falsy, so test for None explicitly
+    if last_result is None:
+        return OperationResult.fail(ErrorInfo(
+            category=ErrorCategory.UNKNOWN,
+            severity=ErrorSeverity.FATAL,
+            message="All retries exhausted with no result",
+            is_retryable=False
+        ))
+    last_result.metadata["retries_exhausted"] = True
+    last_result.metadata["total_attempts"] = attempts
+    return last_result
+
+
 def retry_with_backoff(
     fn: Callable[[], OperationResult],
     max_retries: int = 3,
     initial_delay: float = 1.0,
     max_delay: float = 60.0,
     backoff_factor: float = 2.0,
-    on_retry: Callable[[int, ErrorInfo, float], None] = None
+    on_retry: Callable[[int, ErrorInfo, float], None] = None,
+    jitter: str = "full",
+    budget: Optional[RetryBudget] = None,
+    breaker: Optional[CircuitBreaker] = None
 ) -> OperationResult:
     """
     Execute a function with exponential backoff retry logic.
@@ -575,16 +1107,33 @@ def retry_with_backoff(
         fn: Function that returns OperationResult
         max_retries: Maximum number of retry attempts
         initial_delay: Initial delay in seconds
-        max_delay: Maximum delay between retries
+        max_delay: Maximum delay between retries (jitter on top of a
+            retry_after hint may exceed it, see _retry_delay)
         backoff_factor: Multiplier for delay after each retry
         on_retry: Optional callback called before each retry (attempt, error, delay)
+        jitter: "full" (uniform up to the backoff step), "decorrelated" or
+            "none" - see _retry_delay
+        budget: Optional RetryBudget shared with concurrent callers; when it
+            is spent the last failure is returned with
+            metadata["retry_budget_exhausted"]
+        breaker: Optional CircuitBreaker for the backend fn calls. Every
+            attempt's outcome is reported to it, and while it is open no
+            attempt is made: the result is a CIRCUIT_OPEN failure with
+            metadata["circuit_open"]
     """
+    if jitter not in JITTER_MODES:
+        raise ValueError(f"jitter must be one of {JITTER_MODES}")
     last_result = None
     delay = initial_delay
+    previous = initial_delay
 
     for attempt in range(max_retries + 1):
+        if breaker is not None and not breaker.allow():
+            return _circuit_open(breaker, last_result, attempt)
+
         try:
             result = fn()
+            _breaker_record(breaker, result)
 
             if result.success:
                 return result
@@ -595,44 +1144,139 @@ def retry_with_backoff(
 
             last_result = result
 
-            if attempt < max_retries:
-                # Use retry_after from error if provided, otherwise use backoff
-                actual_delay = result.error.retry_after or delay
-                actual_delay = min(actual_delay, max_delay)
+        except Exception as e:
+            last_result = OperationResult.fail(classify_error(e))
+            _breaker_record(breaker, last_result)
+
+            if not last_result.error.is_retryable:
+                return last_result
+
+        if attempt < max_retries:
+            if breaker is not None and breaker.state == CircuitBreaker.OPEN:
+                return _circuit_open(breaker, last_result, attempt + 1)  # Tripped: skip the wait
+            if budget is not None and not budget.try_acquire():
+                return _budget_spent(last_result, attempt + 1)
+
+            # Use retry_after from error if provided, otherwise use backoff
+            actual_delay = _retry_delay(last_result.error, delay, max_delay, jitter, previous, initial_delay)
+
+            if on_retry:
+                on_retry(attempt + 1, last_result.error, actual_delay)
+
+            time.sleep(actual_delay)
+            previous = actual_delay
+            delay = min(delay * backoff_factor, max_delay)
+
+    # All retries exhausted
+    return _exhausted(last_result, max_retries + 1)
+
+
+async def aretry_with_backoff(
+    fn: Callable[[], Awaitable[OperationResult]],
+    max_retries: int = 3,
+    initial_delay: float = 1.0,
+    max_delay: float = 60.0,
+    backoff_factor: float = 2.0,
+    on_retry: Callable[[int, ErrorInfo, float], None] = None,
+    deadline: Optional[float] = None,
+    attempt_timeout: Optional[float] = None,
+    jitter: str = "full",
+    budget: Optional[RetryBudget] = None,
+    breaker: Optional[CircuitBreaker] = None
+) -> OperationResult:
+    """
+    Async retry_with_backoff: same arguments and OperationResult contract,
+    but fn is a coroutine function and waits never block the event loop.
+
+    Args:
+        deadline: Overall budget in seconds for all attempts and waits. No
+            attempt (or wait before one) starts that the slowest attempt so
+            far says cannot finish within it, and the attempt in flight when
+            it runs out is cancelled. The result then carries
+            metadata["deadline_exceeded"].
+        attempt_timeout: Optional cap in seconds on each attempt.
+
+    Cancelling the caller cancels the attempt in flight (or the wait) and
+    propagates CancelledError; it is never turned into a failed result.
+    """
+    if jitter not in JITTER_MODES:
+        raise ValueError(f"jitter must be one of {JITTER_MODES}")
+    loop = asyncio.get_running_loop()
+    expires = loop.time() + deadline if deadline is not None else None
+    last_result = None
+    delay = initial_delay
+    previous = initial_delay
+    slowest = 0.0  # Longest attempt so far: the estimate for the next one
+
+    def out_of_time(result: Optional[OperationResult], attempts: int) -> OperationResult:
+        if result is None:
+            result = OperationResult.fail(ErrorInfo(
+                category=ErrorCategory.TIMEOUT,
+                severity=ErrorSeverity.RECOVERABLE,
+                message=f"Deadline of {deadline:.1f}s reached before an attempt could run"
+            ))
+        result.metadata["deadline_exceeded"] = True
+        result.metadata["total_attempts"] = attempts
+        return result
+
+    for attempt in range(max_retries + 1):
+        timeout = attempt_timeout
+        if expires is not None:
+            remaining = expires - loop.time()
+            if remaining <= 0 or remaining < slowest:
+                return out_of_time(last_result, attempt)
+            timeout = min(timeout, remaining) if timeout is not None else remaining
+        admitted = breaker.admit() if breaker is not None else CircuitBreaker.CLOSED
+        if admitted is None:
+            return _circuit_open(breaker, last_result, attempt)
+
+        started = loop.time()
+        try:
+            if timeout is None:
+                result = await fn()
+            else:
+                result = await asyncio.wait_for(fn(), timeout)
+            _breaker_record(breaker, result)
+
+            if result.success:
+                return result
 
-                if on_retry:
-                    on_retry(attempt + 1, result.error, actual_delay)
+            if not result.error or not result.error.is_retryable:
+                return result
 
-                time.sleep(actual_delay)
-                delay = min(delay * backoff_factor, max_delay)
+            last_result = result
 
+        except asyncio.CancelledError:
+            if admitted == CircuitBreaker.HALF_OPEN:
+                breaker.release()  # Only the probe's owner may hand it back
+            raise
         except Exception as e:
-            error_info = classify_error(e)
-            last_result = OperationResult.fail(error_info)
+            last_result = OperationResult.fail(classify_error(e))
+            _breaker_record(breaker, last_result)
 
-            if not error_info.is_retryable:
+            if not last_result.error.is_retryable:
                 return last_result
 
-            if attempt < max_retries:
-                actual_delay = error_info.retry_after or delay
-                actual_delay = min(actual_delay, max_delay)
+        slowest = max(slowest, loop.time() - started)
 
-                if on_retry:
-                    on_retry(attempt + 1, error_info, actual_delay)
+        if attempt < max_retries:
+            if breaker is not None and breaker.state == CircuitBreaker.OPEN:
+                return _circuit_open(breaker, last_result, attempt + 1)
+            actual_delay = _retry_delay(last_result.error, delay, max_delay, jitter, previous, initial_delay)
+            if expires is not None and loop.time() + actual_delay + slowest > expires:
+                # Waiting out the delay would leave no time for the retry itself
+                return out_of_time(last_result, attempt + 1)
+            if budget is not None and not budget.try_acquire():
+                return _budget_spent(last_result, attempt + 1)
 
-                time.sleep(actual_delay)
-                delay = min(delay * backoff_factor, max_delay)
+            if on_retry:
+                on_retry(attempt + 1, last_result.error, actual_delay)
 
-    # All retries exhausted
-    if last_result:
-        last_result.metadata["retries_exhausted"] = True
-        last_result.metadata["total_attempts"] = max_retries + 1
-    return last_result or OperationResult.fail(ErrorInfo(
-        category=ErrorCategory.UNKNOWN,
-        severity=ErrorSeverity.FATAL,
-        message="All retries exhausted with no result",
-        is_retryable=False
-    ))
+            await asyncio.sleep(actual_delay)
+            previous = actual_delay
+            delay = min(delay * backoff_factor, max_delay)
+
+    return _exhausted(last_result, max_retries + 1)
 
 
 # ============================================================================
@@ -717,8 +1361,7 @@ def is_rate_limit_error(error: Union[Exception, str, ErrorInfo]) -> bool:
     if isinstance(error, ErrorInfo):
         return error.category == ErrorCategory.RATE_LIMIT
 
-    error_str = str(error).lower()
-    return "429" in error_str or "rate_limit" in error_str or "too many requests" in error_str
+    return classify_error(error).category == ErrorCategory.RATE_LIMIT
 
 
 def is_retryable(error: Union[Exception, str, ErrorInfo]) -> bool:
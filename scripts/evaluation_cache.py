@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Persistent Evaluation Cache for EVOLEA Image Auto-Selection
+
+Stores Claude's per-image scores (score, strengths, weaknesses) on disk keyed
+by the image's content hash, the original prompt, the Claude model and a hash
+of the evaluation criteria. Re-selecting among images that were already
+scored (an --auto-select rerun, an A/B retrain) only sends the new candidates
+to the API; editing EVALUATION_CRITERIA or switching models invalidates every
+entry automatically.
+
+Entries are small JSON files written atomically, so several processes can
+share one cache directory.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / ".cache" / "evaluations"
+
+
+def criteria_hash(criteria: str) -> str:
+    """Short version id of an evaluation rubric."""
+    return hashlib.sha256(criteria.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def evaluation_key(image_sha256: str, prompt: str, model: str, criteria: str) -> str:
+    """Stable hash of everything that determines an image's evaluation."""
+    payload = json.dumps(
+        [image_sha256, prompt, model, criteria_hash(criteria)],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class EvaluationCacheStats:
+    """Hit/miss counters for this process."""
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class EvaluationCache:
+    """On-disk store of per-image evaluation results."""
+
+    def __init__(self, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR, enabled: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self.stats = EvaluationCacheStats()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached evaluation for key, or None on a miss (or when disabled)."""
+        if not self.enabled:
+            return None
+        try:
+            entry = json.loads(self._path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats.misses += 1
+            return None
+        with self._lock:
+            self.stats.hits += 1
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store an evaluation under key (best-effort, atomic)."""
+        if not self.enabled:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                os.replace(tmp, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+        except (OSError, TypeError, ValueError):
+            return  # Never fail a selection over caching
+        with self._lock:
+            self.stats.stores += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Process counters."""
+        with self._lock:
+            result = asdict(self.stats)
+        result["hit_rate"] = round(self.stats.hit_rate, 3)
+        result["enabled"] = self.enabled
+        return result
+
+    def format_stats(self) -> str:
+        """One-line hit/miss summary for end-of-run logging."""
+        if not self.enabled:
+            return "disabled"
+        s = self.stats
+        return f"{s.hits} hits / {s.misses} misses ({s.hit_rate:.0%}), {s.stores} stored"
+
+
+_default_cache: Optional[EvaluationCache] = None
+_default_lock = threading.Lock()
+
+
+def get_evaluation_cache() -> EvaluationCache:
+    """Process-wide evaluation cache (EVOLEA_EVAL_CACHE_DIR overrides the location)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            cache_dir = os.environ.get("EVOLEA_EVAL_CACHE_DIR") or DEFAULT_CACHE_DIR
+            _default_cache = EvaluationCache(Path(cache_dir))
+        return _default_cache
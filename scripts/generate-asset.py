@@ -37,6 +37,8 @@ from error_handling import (
     ErrorSeverity,
     ErrorLogger,
     classify_error,
+    get_circuit_breaker,
+    get_retry_budget,
     retry_with_backoff,
     validate_image_data,
     fix_image_data,
@@ -45,6 +47,10 @@ from error_handling import (
     is_rate_limit_error,
     safe_execute,
 )
+from api_clients import get_gemini_client
+from rate_limiter import get_rate_limiter
+from generation_cache import cache_key, get_default_cache
+from generation_journal import GenerationJournal, prune_journals
 
 # Project paths
 SCRIPT_DIR = Path(__file__).parent
@@ -418,10 +424,9 @@ def setup_api_key():
 
 
 def get_client(api_key: str):
-    """Initialize the Google GenAI client."""
+    """Get the process-wide pooled Google GenAI client for api_key."""
     try:
-        from google import genai
-        return genai.Client(api_key=api_key)
+        return get_gemini_client(api_key)
     except ImportError:
         print("\nERROR: google-genai package not installed")
         print("Please run: pip install google-genai pillow")
@@ -526,6 +531,19 @@ def generate_image(client, prompt: str, output_name: str, aspect_ratio: str = "1
     print(f"Generating: {output_name}")
     print(f"Model: {MODEL} (Nano Banana Pro)")
     print(f"Size: {image_size}, Aspect: {aspect_ratio}")
+
+    # Unchanged prompt/aspect/size: reuse the stored image instead of regenerating
+    cache = get_default_cache()
+    key = cache_key("gemini", MODEL, prompt, aspect_ratio, image_size, 0)
+    cached = cache.get(key)
+    if cached is not None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath = OUTPUT_BASE / f"{output_name}_{timestamp}.png"
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        filepath.write_bytes(cached)
+        print(f"\n  CACHE HIT! Saved: {filepath}")
+        return OperationResult.ok(value=filepath, source="cache")
+
     print("This may take 30-60 seconds...")
     print(f"{'=' * 50}")
 
@@ -534,9 +552,16 @@ def generate_image(client, prompt: str, output_name: str, aspect_ratio: str = "1
         print(f"\n  Retry {attempt}: {error.message}")
         print(f"  Waiting {delay:.1f}s before next attempt...")
 
+    route = f"gemini/{MODEL}"
+    limiter = get_rate_limiter()
+
     def single_generation_attempt() -> OperationResult:
         """Single attempt at image generation."""
         try:
+            # Shared with every other generating process on this machine
+            waited = limiter.acquire(route)
+            if waited >= 1:
+                print(f"  Paced {waited:.1f}s to stay under the {route} rate limit")
             response = client.models.generate_content(
                 model=MODEL,
                 contents=prompt,
@@ -655,6 +680,7 @@ def generate_image(client, prompt: str, output_name: str, aspect_ratio: str = "1
             ))
 
         except Exception as e:
+            limiter.observe(route, e)
             error_info = classify_error(e)
 
             # Special handling for media type mismatch - try with modified settings
@@ -674,7 +700,9 @@ def generate_image(client, prompt: str, output_name: str, aspect_ratio: str = "1
         initial_delay=RETRY_DELAY_SECONDS,
         max_delay=60.0,
         backoff_factor=2.0,
-        on_retry=on_retry
+        on_retry=on_retry,
+        budget=get_retry_budget(),
+        breaker=get_circuit_breaker(route)
     )
 
     # Handle final result
@@ -690,6 +718,7 @@ def generate_image(client, prompt: str, output_name: str, aspect_ratio: str = "1
             filepath.parent.mkdir(parents=True, exist_ok=True)
 
             image.save(str(filepath))
+            cache.put(key, filepath.read_bytes())
             print(f"\n  SUCCESS! Saved: {filepath}")
 
             if result.warnings:
@@ -715,7 +744,12 @@ def generate_image(client, prompt: str, output_name: str, aspect_ratio: str = "1
         if result.error:
             error_logger.log(result.error, f"generate:{output_name}")
 
-        print(f"\n  FAILED after all attempts")
+        if result.metadata.get("circuit_open"):
+            print(f"\n  FAILED FAST - {route} keeps failing, circuit open (next probe in {result.error.retry_after}s)")
+        elif result.metadata.get("retry_budget_exhausted"):
+            print(f"\n  FAILED - retry budget spent (too many failures across this run), not retrying")
+        else:
+            print(f"\n  FAILED after all attempts")
         print(f"  Error: {result.error.message if result.error else 'Unknown error'}")
         print(f"  Check error logs in: {ERROR_LOG_DIR}")
 
@@ -766,6 +800,41 @@ def _print_generation_summary(results: list):
     print("=" * 60)
 
 
+def _generate_all(client, label: str, jobs: list, resume: Optional[str] = None) -> list:
+    """
+    Generate a set of (name, prompt, output_name, aspect, size) jobs under a
+    run journal, so an interrupted "all" run can continue with --resume.
+
+    Items whose file still exists with its recorded hash are skipped.
+    """
+    kind = f"generate-asset:{label}"
+    if resume:
+        try:
+            journal = GenerationJournal.resume(resume, kind=kind)
+        except ValueError as e:
+            print(f"Cannot resume: {e}")
+            sys.exit(1)
+    else:
+        journal = GenerationJournal.create(kind, {"label": label})
+    print(f"Run id: {journal.run_id} (continue with --resume {journal.run_id})")
+
+    results = []
+    for name, prompt, output_name, aspect, size in jobs:
+        path = journal.completed_file(output_name)
+        if path:
+            print(f"[SKIP] {name}: already generated ({path})")
+            results.append((name, OperationResult.ok(value=path, source="journal")))
+            continue
+        result = generate_image(client, prompt, output_name, aspect, size)
+        if result.success:
+            journal.record(output_name, result.value)
+        results.append((name, result))
+
+    journal.finish()
+    prune_journals(journal.path.parent)
+    return results
+
+
 # ============================================================================
 # MAIN COMMANDS
 # ============================================================================
@@ -788,9 +857,8 @@ def cmd_logo(args):
 
     results = []
     if variant == "all":
-        for name, prompt in LOGO_PROMPTS.items():
-            result = generate_image(client, prompt, f"logo/{name}", "1:1", "2K")
-            results.append((name, result))
+        jobs = [(name, prompt, f"logo/{name}", "1:1", "2K") for name, prompt in LOGO_PROMPTS.items()]
+        results = _generate_all(client, "logo", jobs, args.resume)
     elif variant in LOGO_PROMPTS:
         result = generate_image(client, LOGO_PROMPTS[variant], f"logo/{variant}", "1:1", "2K")
         results.append((variant, result))
@@ -826,11 +894,12 @@ def cmd_illustration(args):
 
     results = []
     if program == "all":
+        jobs = []
         for name, prompt in ILLUSTRATION_PROMPTS.items():
             asp = "16:9" if name in ["hero", "about"] else "4:3"
             sz = "4K" if name == "hero" else "2K"
-            result = generate_image(client, prompt, f"illustrations/{name}", asp, sz)
-            results.append((name, result))
+            jobs.append((name, prompt, f"illustrations/{name}", asp, sz))
+        results = _generate_all(client, "illustration", jobs, args.resume)
     elif program in ILLUSTRATION_PROMPTS:
         result = generate_image(client, ILLUSTRATION_PROMPTS[program], f"illustrations/{program}", aspect, size)
         results.append((program, result))
@@ -854,9 +923,8 @@ def cmd_icon(args):
 
     results = []
     if name == "all":
-        for icon_name, prompt in ICON_PROMPTS.items():
-            result = generate_image(client, prompt, f"icons/{icon_name}", "1:1", "1K")
-            results.append((icon_name, result))
+        jobs = [(icon_name, prompt, f"icons/{icon_name}", "1:1", "1K") for icon_name, prompt in ICON_PROMPTS.items()]
+        results = _generate_all(client, "icon", jobs, args.resume)
     elif name in ICON_PROMPTS:
         result = generate_image(client, ICON_PROMPTS[name], f"icons/{name}", "1:1", "1K")
         results.append((name, result))
@@ -880,9 +948,9 @@ def cmd_pattern(args):
 
     results = []
     if name == "all":
-        for pattern_name, prompt in PATTERN_PROMPTS.items():
-            result = generate_image(client, prompt, f"patterns/{pattern_name}", "1:1", "2K")
-            results.append((pattern_name, result))
+        jobs = [(pattern_name, prompt, f"patterns/{pattern_name}", "1:1", "2K")
+                for pattern_name, prompt in PATTERN_PROMPTS.items()]
+        results = _generate_all(client, "pattern", jobs, args.resume)
     elif name in PATTERN_PROMPTS:
         result = generate_image(client, PATTERN_PROMPTS[name], f"patterns/{name}", "1:1", "2K")
         results.append((name, result))
@@ -1083,9 +1151,15 @@ Examples:
     parser.add_argument("--prompt", type=str, help="Custom prompt text")
     parser.add_argument("--aspect", type=str, default="1:1", help="Aspect ratio")
     parser.add_argument("--size", type=str, default="2K", help="Image size (1K/2K/4K)")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API, bypassing the generation cache")
+    parser.add_argument("--resume", type=str, metavar="RUN_ID",
+                        help="Continue an interrupted 'all' run, skipping assets already generated")
 
     args = parser.parse_args()
 
+    if args.no_cache:
+        get_default_cache().enabled = False
+
     print("\n" + "=" * 60)
     print("EVOLEA Asset Generator")
     print("Powered by Nano Banana Pro (Gemini 3 Pro Image)")
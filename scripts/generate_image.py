@@ -34,9 +34,19 @@ import base64
 import argparse
 import subprocess
 import re
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import secrets
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable, Sequence, NamedTuple
 from dataclasses import dataclass, asdict, field
 
 # =============================================================================
@@ -51,6 +61,7 @@ def check_dependencies():
         'anthropic': 'anthropic',
         'dotenv': 'python-dotenv',
         'requests': 'requests',
+        'httpx': 'httpx',
     }
 
     missing = []
@@ -70,12 +81,36 @@ def check_dependencies():
 
 check_dependencies()
 
-from google import genai
 from google.genai import types
 from PIL import Image
-import anthropic
 from dotenv import load_dotenv
 
+# Add scripts directory to path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from api_clients import (
+    get_async_gemini_client,
+    get_async_anthropic_client,
+    get_async_replicate_client,
+    format_client_stats,
+)
+from generation_cache import cache_key, get_default_cache
+from generation_journal import GenerationJournal, file_sha256, prune_journals
+from evaluation_cache import evaluation_key, get_evaluation_cache
+from generation_history import get_history
+from training_store import get_training_store
+from backend_router import get_router, route_request
+from rate_limiter import get_rate_limiter
+from image_grid import render_grid
+from error_handling import (
+    ErrorCategory,
+    classify_error,
+    detect_image_format,
+    format_to_mime,
+    is_rate_limit_error,
+    validate_image_data,
+)
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -104,23 +139,47 @@ class Config:
     project_root: Path = Path(__file__).parent.parent
     generated_dir: Path = None  # Set in __post_init__
     final_dir: Path = None
-    log_file: Path = None
+    log_file: Path = None  # Legacy generation_log.json, imported into the history once
 
     # RL Skill paths
     rl_skill_dir: Path = None
     learnings_file: Path = None
-    training_log_file: Path = None
+    training_log_file: Path = None  # JSON export / legacy log, imported into the store once
+    training_db_file: Path = None
     style_profiles_dir: Path = None
 
     # Generation settings
     default_count: int = 4
     default_aspect: str = "16:9"
+    # Max variation requests in flight at once (per generate_images call)
+    default_concurrency: int = 4
     # Image generation model - always use Gemini 3 Pro
     gemini_model: str = "gemini-3-pro-image-preview"  # Gemini 3 Pro (default)
     claude_model: str = "claude-sonnet-4-20250514"
+    # Candidates sent to Claude are downscaled to this long edge and re-encoded
+    # (the API resizes anything larger itself, so full-resolution bytes are waste)
+    eval_max_edge: int = int(os.environ.get("EVOLEA_EVAL_MAX_EDGE", 1024))
+    eval_format: str = os.environ.get("EVOLEA_EVAL_FORMAT", "jpeg")  # jpeg | webp | png
+    eval_quality: int = 90
+    # Candidates judged per Claude request; larger sets run as a tournament
+    eval_bracket_size: int = int(os.environ.get("EVOLEA_EVAL_BRACKET", 4))
+    # Comparison grids are downscaled to at most this width
+    grid_max_width: int = int(os.environ.get("EVOLEA_GRID_MAX_WIDTH", 2400))
 
     # Replicate settings (fallback when Gemini is blocked)
     replicate_model: str = "black-forest-labs/flux-schnell"  # Fast, high quality
+    replicate_wait_seconds: int = 60     # "Prefer: wait" hold on submit (Replicate max is 60)
+    replicate_poll_initial: float = 0.5  # First poll interval for predictions still running
+    replicate_poll_max: float = 5.0      # Poll interval ceiling while nothing changes
+    replicate_timeout: float = 120.0     # Give up on (and cancel) predictions after this long
+    replicate_max_outputs: int = 4       # num_outputs cap per prediction (1 disables multi-output)
+
+    # Hedged backend mode: fire the secondary backend once the primary is
+    # slower than this percentile of its recent calls
+    hedge_percentile: float = 0.9
+    hedge_default_delay: float = 30.0  # Seconds, until enough latency samples exist
+    # How long "auto" routing skips Gemini after a region block
+    region_block_cooldown: float = 24 * 3600
 
     def __post_init__(self):
         self.generated_dir = self.project_root / "public" / "images" / "generated"
@@ -131,6 +190,7 @@ class Config:
         self.rl_skill_dir = self.project_root / ".claude" / "skills" / "image-generation-rl"
         self.learnings_file = self.rl_skill_dir / "LEARNINGS.md"
         self.training_log_file = self.rl_skill_dir / "training-log.json"
+        self.training_db_file = self.rl_skill_dir / "training.sqlite"
         self.style_profiles_dir = self.rl_skill_dir / "style-profiles"
 
 
@@ -222,49 +282,106 @@ class Learnings:
     strong_negative: List[str] = field(default_factory=list)   # -3
 
 
-def load_learnings() -> Learnings:
-    """Load and parse learnings from LEARNINGS.md file."""
+# Precompiled once: load_learnings runs for every A/B generation and batch job
+_LEARNING_SECTIONS = {
+    key: re.compile(pattern, re.DOTALL | re.IGNORECASE)
+    for key, pattern in {
+        'strong_positive': r'### STRONG POSITIVE \(\+3\).*?(?=###|\Z)',
+        'positive': r'### POSITIVE \(\+1\).*?(?=###|\Z)',
+        'neutral': r'### NEUTRAL \(0\).*?(?=###|\Z)',
+        'negative': r'### NEGATIVE \(-1\).*?(?=###|\Z)',
+        'strong_negative': r'### STRONG NEGATIVE \(-3\).*?(?=###|\Z)',
+    }.items()
+}
+_TABLE_CELL = re.compile(r'\|\s*([^|]+?)\s*\|')
+_HEADER_CELLS = ('Pattern', '---', 'Source', 'Date', 'Reason', 'Notes')
+
+# Parsed learnings per file, keyed on (mtime_ns, size)
+_learnings_cache: Dict[Path, Tuple[Tuple[int, int], Learnings]] = {}
+_learnings_lock = threading.Lock()
+
+
+def _parse_learnings(content: str) -> Learnings:
+    """Parse the pattern tables of LEARNINGS.md."""
     learnings = Learnings()
+    for key, pattern in _LEARNING_SECTIONS.items():
+        match = pattern.search(content)
+        if match:
+            # Extract patterns from table rows (| Pattern | ... |), minus headers and empty values
+            cells = (p.strip() for p in _TABLE_CELL.findall(match.group(0)))
+            setattr(learnings, key, [p for p in cells if len(p) > 3 and not p.startswith(_HEADER_CELLS)])
+    return learnings
 
-    if not CONFIG.learnings_file.exists():
-        log("[INFO] No learnings file found, using defaults")
-        return learnings
 
+def _learnings_sidecar(source: Path) -> Path:
+    """JSON sidecar holding the parsed form of source (kept out of the repo)."""
+    digest = hashlib.sha256(str(source.resolve()).encode("utf-8")).hexdigest()[:12]
+    return CONFIG.project_root / ".cache" / "learnings" / f"{source.stem}-{digest}.json"
+
+
+def _read_learnings_sidecar(source: Path, stamp: Tuple[int, int]) -> Optional[Learnings]:
     try:
-        content = CONFIG.learnings_file.read_text(encoding='utf-8')
+        data = json.loads(_learnings_sidecar(source).read_text(encoding="utf-8"))
+        if (data["mtime_ns"], data["size"]) != stamp:
+            return None
+        return Learnings(**data["learnings"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
 
-        # Parse sections using regex
-        sections = {
-            'strong_positive': r'### STRONG POSITIVE \(\+3\).*?(?=###|\Z)',
-            'positive': r'### POSITIVE \(\+1\).*?(?=###|\Z)',
-            'neutral': r'### NEUTRAL \(0\).*?(?=###|\Z)',
-            'negative': r'### NEGATIVE \(-1\).*?(?=###|\Z)',
-            'strong_negative': r'### STRONG NEGATIVE \(-3\).*?(?=###|\Z)',
-        }
 
-        for key, pattern in sections.items():
-            match = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
-            if match:
-                section_text = match.group(0)
-                # Extract patterns from table rows (| Pattern | ... |)
-                patterns = re.findall(r'\|\s*([^|]+?)\s*\|', section_text)
-                # Filter out headers and empty values
-                patterns = [p.strip() for p in patterns
-                           if p.strip() and not p.strip().startswith('Pattern')
-                           and not p.strip().startswith('---')
-                           and not p.strip().startswith('Source')
-                           and not p.strip().startswith('Date')
-                           and not p.strip().startswith('Reason')
-                           and not p.strip().startswith('Notes')
-                           and len(p.strip()) > 3]
-                setattr(learnings, key, patterns)
-
-        log(f"[RL] Loaded learnings: +3:{len(learnings.strong_positive)}, +1:{len(learnings.positive)}, -1:{len(learnings.negative)}, -3:{len(learnings.strong_negative)}")
+def _write_learnings_sidecar(source: Path, stamp: Tuple[int, int], learnings: Learnings) -> None:
+    sidecar = _learnings_sidecar(source)
+    payload = {"source": str(source), "mtime_ns": stamp[0], "size": stamp[1], "learnings": asdict(learnings)}
+    try:
+        sidecar.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=sidecar.parent, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, sidecar)
+    except OSError:
+        pass  # The sidecar is only a shortcut
 
-    except Exception as e:
-        log(f"[WARNING] Could not parse learnings: {e}")
 
-    return learnings
+def load_learnings() -> Learnings:
+    """
+    Load and parse learnings from LEARNINGS.md file.
+
+    Parsed once per process for each (mtime, size) of the file; the parsed
+    form is also written to a JSON sidecar so later processes skip the
+    Markdown parsing until the file changes.
+    """
+    source = CONFIG.learnings_file
+    try:
+        st = source.stat()
+    except OSError:
+        log("[INFO] No learnings file found, using defaults")
+        return Learnings()
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    with _learnings_lock:
+        cached = _learnings_cache.get(source)
+        if cached and cached[0] == stamp:
+            return _copy_learnings(cached[1])
+
+        learnings = _read_learnings_sidecar(source, stamp)
+        origin = "sidecar"
+        if learnings is None:
+            origin = "LEARNINGS.md"
+            try:
+                learnings = _parse_learnings(source.read_text(encoding='utf-8'))
+            except Exception as e:
+                log(f"[WARNING] Could not parse learnings: {e}")
+                return Learnings()
+            _write_learnings_sidecar(source, stamp, learnings)
+        _learnings_cache[source] = (stamp, learnings)
+
+    log(f"[RL] Loaded learnings from {origin}: +3:{len(learnings.strong_positive)}, +1:{len(learnings.positive)}, -1:{len(learnings.negative)}, -3:{len(learnings.strong_negative)}")
+    return _copy_learnings(learnings)
+
+
+def _copy_learnings(learnings: Learnings) -> Learnings:
+    """Independent copy, so callers can't alter the cached instance."""
+    return Learnings(**{key: list(values) for key, values in asdict(learnings).items()})
 
 
 def apply_learnings_to_prompt(base_prompt: str, learnings: Learnings) -> Tuple[str, str]:
@@ -321,74 +438,18 @@ Style enhancements (from learnings + modifiers):
 def create_ab_comparison_grid(image_a: Path, image_b: Path, output_dir: Path, base_name: str) -> Path:
     """Create a side-by-side A|B comparison grid with labels."""
     try:
-        img_a = Image.open(image_a)
-        img_b = Image.open(image_b)
-
-        # Standardize sizes
-        max_w = max(img_a.width, img_b.width)
-        max_h = max(img_a.height, img_b.height)
-
-        # Create grid with labels
-        padding = 20
-        label_height = 50
-        divider_width = 10
-
-        grid_w = 2 * max_w + 3 * padding + divider_width
-        grid_h = max_h + label_height + 2 * padding
-
-        grid = Image.new('RGB', (grid_w, grid_h), 'white')
-
-        # Resize images to fit
-        img_a_resized = img_a.copy()
-        img_a_resized.thumbnail((max_w, max_h), Image.Resampling.LANCZOS)
-
-        img_b_resized = img_b.copy()
-        img_b_resized.thumbnail((max_w, max_h), Image.Resampling.LANCZOS)
-
-        # Paste images
-        x_a = padding
-        x_b = padding + max_w + divider_width + padding
-        y_img = padding + label_height
-
-        # Center images in their cells
-        paste_x_a = x_a + (max_w - img_a_resized.width) // 2
-        paste_y_a = y_img + (max_h - img_a_resized.height) // 2
-        grid.paste(img_a_resized, (paste_x_a, paste_y_a))
-
-        paste_x_b = x_b + (max_w - img_b_resized.width) // 2
-        paste_y_b = y_img + (max_h - img_b_resized.height) // 2
-        grid.paste(img_b_resized, (paste_x_b, paste_y_b))
-
-        # Add labels (using PIL's basic text if ImageDraw available)
-        try:
-            from PIL import ImageDraw, ImageFont
-
-            draw = ImageDraw.Draw(grid)
-
-            # Try to get a font, fallback to default
-            try:
-                font = ImageFont.truetype("arial.ttf", 36)
-            except:
-                font = ImageFont.load_default()
-
-            # Draw labels
-            label_y = padding + 5
-            draw.text((x_a + max_w//2 - 50, label_y), "OPTION A", fill='#DD48E0', font=font)
-            draw.text((x_b + max_w//2 - 50, label_y), "OPTION B", fill='#7BEDD5', font=font)
-
-            # Draw divider line
-            divider_x = padding + max_w + padding // 2
-            draw.line([(divider_x, padding), (divider_x, grid_h - padding)], fill='#CCCCCC', width=2)
-
-        except Exception as e:
-            log(f"[INFO] Could not add labels: {e}")
-
-        # Save grid
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        grid_path = output_dir / f"{base_name}_AB_GRID_{timestamp}.png"
-        grid.save(grid_path)
-
-        return grid_path
+        return render_grid(
+            [image_a, image_b],
+            output_dir / f"{base_name}_AB_GRID_{timestamp}.png",
+            cols=2,
+            max_width=CONFIG.grid_max_width,
+            labels=["OPTION A", "OPTION B"],
+            label_colors=["#DD48E0", "#7BEDD5"],
+            padding=20,
+            label_height=50,
+            dividers=True,
+        )
 
     except Exception as e:
         log(f"[ERROR] Could not create comparison grid: {e}")
@@ -437,28 +498,9 @@ def log_training_session(
     final_image: Optional[Path],
     learnings_added: List[str]
 ) -> None:
-    """Log a training session to training-log.json."""
-    if not CONFIG.training_log_file.exists():
-        log = {"version": "1.0", "created": datetime.now().isoformat(), "sessions": []}
-    else:
-        with open(CONFIG.training_log_file) as f:
-            log = json.load(f)
-
-    log["sessions"].append({
-        "id": session_id,
-        "timestamp": datetime.now().isoformat(),
-        "target": target,
-        "rounds": rounds,
-        "final_image": str(final_image) if final_image else None,
-        "learnings_added": learnings_added
-    })
-
-    log["last_updated"] = datetime.now().isoformat()
-    log["total_sessions"] = len(log["sessions"])
-    log["total_rounds"] = sum(len(s.get("rounds", [])) for s in log["sessions"])
-
-    with open(CONFIG.training_log_file, 'w') as f:
-        json.dump(log, f, indent=2)
+    """Log a training session to the training store (export with training_store.py export)."""
+    store = get_training_store(CONFIG.training_db_file, legacy_json=CONFIG.training_log_file)
+    store.log_session(session_id, target, rounds, final_image, learnings_added)
 
 
 # =============================================================================
@@ -477,21 +519,516 @@ Color palette: {BRAND_COLORS}
 """
 
 
-def generate_images_gemini(
+def _variation_prompt(prompt: str, i: int) -> str:
+    """Add the per-variation instruction (i is 0-indexed)."""
+    return f"""{prompt}
+
+Variation {i+1}: Create a unique interpretation while maintaining the core concept and style."""
+
+
+# =============================================================================
+# ASYNC RUNTIME
+# =============================================================================
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Long-lived event loop on a daemon thread, shared by every sync wrapper.
+
+    Keeping one loop for the whole process lets the pooled async clients (which
+    are bound to the loop that created them) survive across sync calls.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="generate-image-loop", daemon=True).start()
+        return _loop
+
+
+def _run_sync(coro):
+    """Run a coroutine on the background loop and wait for it (Ctrl+C cancels it)."""
+    future = asyncio.run_coroutine_threadsafe(coro, _background_loop())
+    try:
+        return future.result()
+    except BaseException:
+        future.cancel()
+        raise
+
+
+class RequestBudget:
+    """
+    Cap on API requests in flight (and optionally per minute) shared by every
+    generation running under it, e.g. all jobs of a batch run.
+
+    Install it with REQUEST_BUDGET.set(budget); tasks started afterwards inherit
+    it through their context, so nested calls need no extra arguments.
+    """
+
+    def __init__(self, concurrency: int, per_minute: Optional[float] = None):
+        self.concurrency = max(1, concurrency)
+        self.per_minute = per_minute
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_start = 0.0
+        self.requests = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Hold one request slot, pacing starts to the per-minute rate."""
+        async with self._semaphore:
+            if self._interval:
+                now = asyncio.get_running_loop().time()
+                start = max(now, self._next_start)
+                self._next_start = start + self._interval
+                if start > now:
+                    await asyncio.sleep(start - now)
+            self.requests += 1
+            yield
+
+
+REQUEST_BUDGET: contextvars.ContextVar[Optional[RequestBudget]] = contextvars.ContextVar(
+    "request_budget", default=None
+)
+
+
+@contextlib.asynccontextmanager
+async def _paced(route: Optional[str]):
+    """Wait for route's shared rate limiter, and report a rate-limited response back to it."""
+    if route is None:
+        yield
+        return
+    limiter = get_rate_limiter()
+    waited = await limiter.aacquire(route)
+    if waited >= 1:
+        log(f"   [RATE] Waited {waited:.1f}s for {route}")
+    try:
+        yield
+    except Exception as e:
+        await asyncio.to_thread(limiter.observe, route, e)
+        raise
+
+
+@contextlib.asynccontextmanager
+async def _request_slot(route: Optional[str] = None):
+    """
+    Take a slot from the active RequestBudget, if any, around one API request,
+    paced by the cross-process rate limiter for route ("backend/model").
+    Inside router.timed() the route's circuit breaker is consulted first.
+
+    Pacing comes first, so a request waiting for its rate-limit turn does not
+    hold a budget slot that a request to another route could use. Errors
+    raised inside the block are reported to the limiter, so callers raise
+    on error responses before leaving it.
+    """
+    budget = REQUEST_BUDGET.get()
+    async with route_request(route), _paced(route):
+        if budget is None:
+            yield
+        else:
+            async with budget.slot():
+                yield
+
+
+class SavedImage(NamedTuple):
+    """A variation written to disk, with the sha256 of its bytes when known."""
+    path: Path
+    sha256: Optional[str] = None
+
+
+# Called with (variation index, saved path, sha256 or None) as soon as each
+# variation is on disk, so later steps need not re-read the file to hash it
+OnSaved = Callable[[int, Path, Optional[str]], None]
+
+
+async def _afan_out(
+    worker: Callable[[int], Awaitable[Optional[SavedImage]]],
+    count: int,
+    concurrency: Optional[int] = None,
+    indices: Optional[Sequence[int]] = None,
+    on_saved: Optional[OnSaved] = None,
+) -> List[Path]:
+    """
+    Await worker(i) for every variation index with bounded concurrency.
+
+    Results are returned in variation order (v1, v2, ...) regardless of which
+    request finishes first; variations that fail or return None are dropped.
+    Raises only when every variation failed, chaining the last error so callers
+    can still inspect it (e.g. the Gemini region check in agenerate_images).
+    Cancelling the caller cancels every in-flight variation.
+
+    indices restricts the run to a subset of range(count) (e.g. the variations
+    a resumed run still lacks); on_saved is told about each saved variation.
+    """
+    wanted = range(count) if indices is None else sorted(indices)
+    semaphore = asyncio.Semaphore(max(1, min(len(wanted), concurrency or CONFIG.default_concurrency)))
+    errors: List[Exception] = []
+
+    async def run(i: int) -> Optional[Path]:
+        async with semaphore:
+            try:
+                saved = await worker(i)
+            except Exception as e:
+                log(f"   [v{i+1}] [ERROR] Failed: {e}")
+                errors.append(e)
+                return None
+        if saved is None:
+            return None
+        if on_saved:
+            on_saved(i, saved.path, saved.sha256)
+        return saved.path
+
+    results = await asyncio.gather(*(run(i) for i in wanted))
+    return _collect_saved(results, errors)
+
+
+def _collect_saved(results: List[Optional[Path]], errors: List[Exception]) -> List[Path]:
+    """Drop failed variations; raise (chaining the last error) if none succeeded."""
+    saved_paths = [p for p in results if p is not None]
+    if not saved_paths:
+        if errors:
+            raise RuntimeError(f"No images were generated successfully: {errors[-1]}") from errors[-1]
+        raise RuntimeError("No images were generated successfully")
+
+    return saved_paths
+
+
+# File suffix for each format detect_image_format can report
+IMAGE_SUFFIXES = {
+    "png": ".png",
+    "jpeg": ".jpg",
+    "webp": ".webp",
+    "gif": ".gif",
+    "bmp": ".bmp",
+}
+
+
+def _image_path(stem: Path, data: bytes) -> Path:
+    """stem plus the suffix matching the image bytes (".png" if unrecognised)."""
+    return stem.with_name(stem.name + IMAGE_SUFFIXES.get(detect_image_format(data), ".png"))
+
+
+def _convert_image(data: bytes, output_format: str) -> bytes:
+    """Decode and re-encode data as output_format (only when a conversion is requested)."""
+    import io
+
+    fmt = "jpeg" if output_format.lower() == "jpg" else output_format.lower()
+    if detect_image_format(data) == fmt:
+        return data
+
+    img = Image.open(io.BytesIO(data))
+    if fmt == "jpeg" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    out = io.BytesIO()
+    img.save(out, format=fmt.upper())
+    return out.getvalue()
+
+
+def _write_image(stem: Path, data: bytes, output_format: Optional[str] = None) -> SavedImage:
+    """Write image bytes as-is under their true extension, converting only on request."""
+    if output_format:
+        data = _convert_image(data, output_format)
+    filepath = _image_path(stem, data)
+    filepath.write_bytes(data)
+    return SavedImage(filepath, hashlib.sha256(data).hexdigest())
+
+
+async def _acache_lookup(cache, key: str, stem: Path, output_format: Optional[str] = None) -> Optional[SavedImage]:
+    """Write a cached image next to stem; returns it on a hit."""
+    if not cache:
+        return None
+    cached = await asyncio.to_thread(cache.get, key)
+    if cached is None:
+        return None
+    return await asyncio.to_thread(_write_image, stem, cached, output_format)
+
+
+async def _asave(
+    stem: Path,
+    data: bytes,
+    cache=None,
+    key: Optional[str] = None,
+    output_format: Optional[str] = None,
+) -> SavedImage:
+    """
+    Write image bytes off the event loop and return the file and its sha256.
+
+    The bytes are written exactly as the API returned them, named after their
+    real format (so a JPEG payload is never saved as .png). The cache always
+    keeps the original bytes; output_format conversion is applied per write.
+    """
+    saved = await asyncio.to_thread(_write_image, stem, data, output_format)
+    if cache:
+        await asyncio.to_thread(cache.put, key, data)
+    return saved
+
+
+_DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+
+async def _astream_download(
+    client,
+    url: str,
+    filepath: Path,
+    cache=None,
+    key: Optional[str] = None,
+    timeout: float = 30,
+) -> Tuple[str, int]:
+    """
+    Stream url to filepath in chunks, hashing as it goes; returns (sha256, bytes).
+
+    The body is written to a temporary file next to filepath and renamed into
+    place only once complete, so an interrupted download never leaves a
+    truncated image behind and the full image is never held in memory.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp = await asyncio.to_thread(
+        tempfile.mkstemp, dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".part"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async with client.stream("GET", url, timeout=timeout) as response:
+                if response.status_code != 200:
+                    raise RuntimeError(f"Download failed ({response.status_code}): {url}")
+                async for chunk in response.aiter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    await asyncio.to_thread(f.write, chunk)
+        await asyncio.to_thread(os.replace, tmp, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+    sha256 = digest.hexdigest()
+    if cache:
+        await asyncio.to_thread(cache.put_file, key, filepath, size)
+    return sha256, size
+
+
+# =============================================================================
+# REPLICATE PREDICTION ENGINE
+# =============================================================================
+
+REPLICATE_API_BASE = "https://api.replicate.com/v1"
+_REPLICATE_RUNNING = ("starting", "processing")
+# Seconds to wait for server-side cancels when run() itself is cancelled
+REPLICATE_CANCEL_TIMEOUT = 10
+
+# Models seen rejecting or ignoring num_outputs in this process
+_REPLICATE_SINGLE_OUTPUT_MODELS: set = set()
+
+
+def _multi_output_unsupported(error: Exception) -> bool:
+    """
+    True if a submit error means the model does not accept num_outputs: a
+    validation error (422) whose body names the field. Any other 422 is a
+    real input error and fails the batch instead of retrying per variation.
+    """
+    text = str(error).lower()
+    return "api error: 422" in text and "num_outputs" in text
+
+
+class ReplicateEngine:
+    """
+    Runs a batch of Replicate predictions side by side.
+
+    Every prediction is submitted up front. A lone prediction is sent with
+    "Prefer: wait" so a fast model answers inline; a batch is not, because a
+    held-open request keeps its request slot for the whole wait. Predictions
+    still running after that are polled together in one loop. The poll
+    interval grows while nothing changes and resets as soon as any
+    prediction finishes. Each prediction is handed to on_success the moment
+    it succeeds, so downloads overlap with the ones still generating.
+    """
+
+    def __init__(
+        self,
+        client,
+        model: str,
+        concurrency: Optional[int] = None,
+        wait_seconds: Optional[int] = None,
+        poll_initial: Optional[float] = None,
+        poll_max: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.client = client
+        self.model = model
+        self.concurrency = concurrency or CONFIG.default_concurrency
+        self.wait_seconds = wait_seconds if wait_seconds is not None else CONFIG.replicate_wait_seconds
+        self.poll_initial = poll_initial or CONFIG.replicate_poll_initial
+        self.poll_max = poll_max or CONFIG.replicate_poll_max
+        self.timeout = timeout or CONFIG.replicate_timeout
+
+    async def _submit(self, payload: Dict[str, Any], wait_seconds: int = 0) -> Dict[str, Any]:
+        """Create one prediction, holding the request open for up to wait_seconds."""
+        headers = {"Prefer": f"wait={wait_seconds}"} if wait_seconds else {}
+        async with _request_slot(f"replicate/{self.model}"):
+            response = await self.client.post(
+                f"{REPLICATE_API_BASE}/models/{self.model}/predictions",
+                headers=headers,
+                json={"input": payload},
+            )
+            if response.status_code not in (200, 201):
+                raise RuntimeError(f"API error: {response.status_code} - {response.text}")
+        return response.json()
+
+    async def _poll(self, prediction: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch the latest state of a running prediction (unchanged on a transient error)."""
+        url = prediction.get("urls", {}).get("get")
+        if not url:
+            url = f"{REPLICATE_API_BASE}/predictions/{prediction['id']}"
+        response = await self.client.get(url, timeout=30)
+        if response.status_code == 429:
+            raise RuntimeError(f"API error: 429 - {response.text}")
+        if response.status_code != 200:
+            return prediction
+        return response.json()
+
+    async def _cancel(self, prediction: Dict[str, Any]) -> None:
+        """Best-effort server-side cancel so abandoned predictions stop billing."""
+        url = prediction.get("urls", {}).get("cancel")
+        if not url:
+            return
+        try:
+            await self.client.post(url, timeout=10)
+        except Exception:
+            pass
+
+    async def run(
+        self,
+        inputs: Dict[int, Dict[str, Any]],
+        on_success: Callable[[int, Dict[str, Any]], Awaitable[None]],
+    ) -> Dict[int, Exception]:
+        """
+        Run one prediction per entry in inputs ({variation index: model input}).
+
+        Returns {index: error} for the predictions that did not succeed; callers
+        decide whether a partial batch is acceptable. Cancelling run() cancels
+        the remaining predictions on Replicate as well.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        semaphore = asyncio.Semaphore(max(1, min(len(inputs), self.concurrency)))
+        running: Dict[int, Dict[str, Any]] = {}
+        deliveries: List[asyncio.Task] = []
+        failures: Dict[int, Exception] = {}
+        wait_seconds = self.wait_seconds if len(inputs) == 1 else 0
+
+        def fail(i: int, error: Exception) -> None:
+            log(f"   [v{i+1}] [ERROR] Failed: {error}")
+            failures[i] = error
+
+        async def deliver(i: int, prediction: Dict[str, Any]) -> None:
+            try:
+                await on_success(i, prediction)
+            except Exception as e:
+                fail(i, e)
+
+        def settle(i: int, prediction: Dict[str, Any]) -> None:
+            status = prediction.get("status")
+            if status == "succeeded":
+                deliveries.append(asyncio.create_task(deliver(i, prediction)))
+            elif status in _REPLICATE_RUNNING:
+                running[i] = prediction
+            else:
+                fail(i, RuntimeError(f"Generation {status}: {prediction.get('error')}"))
+
+        async def submit(i: int, payload: Dict[str, Any]) -> None:
+            async with semaphore:
+                log(f"   [v{i+1}] Submitting prediction...")
+                try:
+                    prediction = await self._submit(payload, wait_seconds)
+                except Exception as e:
+                    fail(i, e)
+                    return
+            settle(i, prediction)
+
+        try:
+            await asyncio.gather(*(submit(i, payload) for i, payload in inputs.items()))
+
+            delay = self.poll_initial
+            while running and loop.time() < deadline:
+                await asyncio.sleep(min(delay, max(0.0, deadline - loop.time())))
+                indices = list(running)
+                polled = await asyncio.gather(
+                    *(self._poll(running[i]) for i in indices), return_exceptions=True
+                )
+
+                changed = False
+                throttled = False
+                for i, prediction in zip(indices, polled):
+                    if isinstance(prediction, Exception):
+                        throttled = throttled or is_rate_limit_error(prediction)
+                        continue
+                    if prediction.get("status") in _REPLICATE_RUNNING:
+                        running[i] = prediction
+                        continue
+                    del running[i]
+                    settle(i, prediction)
+                    changed = True
+
+                if throttled:
+                    delay = self.poll_max
+                elif changed:
+                    delay = self.poll_initial
+                else:
+                    delay = min(delay * 1.5, self.poll_max)
+
+            for i, prediction in running.items():
+                fail(i, TimeoutError(f"Prediction still {prediction.get('status')} after {self.timeout:.0f}s"))
+            await asyncio.gather(*(self._cancel(p) for p in running.values()))
+
+            await asyncio.gather(*deliveries)
+        except asyncio.CancelledError:
+            for task in deliveries:
+                task.cancel()
+            # Cancel on Replicate too, but never hold up the caller's cancellation for long
+            cancels = [loop.create_task(self._cancel(p)) for p in running.values()]
+            if cancels:
+                await asyncio.wait(cancels, timeout=REPLICATE_CANCEL_TIMEOUT)
+            raise
+
+        return failures
+
+
+# =============================================================================
+# IMAGE GENERATION BACKENDS
+# =============================================================================
+
+async def agenerate_images_gemini(
     prompt: str,
     output_dir: Path,
     base_name: str,
     count: int = 4,
     aspect_ratio: str = "16:9",
     use_pro: bool = False,
+    concurrency: Optional[int] = None,
+    image_size: Optional[str] = None,
+    use_cache: bool = True,
+    output_format: Optional[str] = None,
+    indices: Optional[Sequence[int]] = None,
+    on_saved: Optional[OnSaved] = None,
 ) -> List[Path]:
-    """Generate images using Gemini image generation API."""
+    """
+    Generate images using Gemini image generation API (async).
+
+    Returned image bytes are saved untouched, with the extension of their
+    actual format; pass output_format ("png", "jpeg", "webp") to convert.
+    indices/on_saved work as in _afan_out.
+    """
 
     if not CONFIG.gemini_key:
         raise ValueError("GEMINI_API_KEY or GOOGLE_API_KEY environment variable not set")
 
-    # Initialize the new google.genai client
-    client = genai.Client(api_key=CONFIG.gemini_key)
+    # Pooled async client for this event loop (keep-alive connections survive across calls)
+    client = get_async_gemini_client(CONFIG.gemini_key)
 
     # Select model based on quality preference
     # Always use Gemini 3 Pro for best quality
@@ -500,96 +1037,99 @@ def generate_images_gemini(
 
     output_dir.mkdir(parents=True, exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-    saved_paths = []
+    cache = get_default_cache() if use_cache else None
 
     log(f"\n[GEN] Generating {count} images...")
     log(f"[PROMPT] {prompt[:150]}...")
 
-    for i in range(count):
-        log(f"   Generating variation {i+1}/{count}...", end=" ", flush=True)
+    async def generate_variation(i: int) -> Optional[SavedImage]:
+        stem = output_dir / f"{base_name}_{timestamp}_v{i+1}"
 
-        try:
-            # Add variation instruction
-            variation_prompt = f"""{prompt}
+        key = cache_key("gemini", model_id, prompt, aspect_ratio, image_size, i)
+        hit = await _acache_lookup(cache, key, stem, output_format)
+        if hit:
+            log(f"   [v{i+1}] [CACHE] {hit.path.name}")
+            return hit
 
-Variation {i+1}: Create a unique interpretation while maintaining the core concept and style."""
+        log(f"   [v{i+1}] Generating variation {i+1}/{count}...")
 
-            # Use Gemini's generate_content with image output
-            # Using the correct image generation model and config
-            response = client.models.generate_content(
+        # Use Gemini's generate_content with image output
+        # Using the correct image generation model and config
+        async with _request_slot(f"gemini/{model_id}"):
+            response = await client.models.generate_content(
                 model=model_id,
-                contents=variation_prompt,
+                contents=_variation_prompt(prompt, i),
                 config=types.GenerateContentConfig(
                     response_modalities=["IMAGE", "TEXT"],
+                    image_config=types.ImageConfig(
+                        aspect_ratio=aspect_ratio,
+                        image_size=image_size,
+                    ),
                 )
             )
 
-            # Extract image from response
-            image_saved = False
-            if response.candidates:
-                for part in response.candidates[0].content.parts:
-                    if hasattr(part, 'inline_data') and part.inline_data:
-                        if 'image' in part.inline_data.mime_type:
-                            # Decode and save the image
-                            image_data = part.inline_data.data
-                            if isinstance(image_data, str):
-                                image_data = base64.b64decode(image_data)
-
-                            filename = f"{base_name}_{timestamp}_v{i+1}.png"
-                            filepath = output_dir / filename
-
-                            with open(filepath, 'wb') as f:
-                                f.write(image_data)
-
-                            saved_paths.append(filepath)
-                            log(f"[OK] {filename}")
-                            image_saved = True
-                            break
-
-            if not image_saved:
-                # Try alternative: check for image attribute directly
-                for part in response.candidates[0].content.parts:
-                    if hasattr(part, 'image') and part.image:
-                        img = part.image
-                        filename = f"{base_name}_{timestamp}_v{i+1}.png"
-                        filepath = output_dir / filename
-
-                        if hasattr(img, 'save'):
-                            img.save(str(filepath))
-                        elif hasattr(img, 'image_bytes'):
-                            with open(filepath, 'wb') as f:
-                                f.write(img.image_bytes)
-
-                        saved_paths.append(filepath)
-                        log(f"[OK] {filename}")
-                        image_saved = True
-                        break
-
-            if not image_saved:
-                log("[WARNING] No image in response")
-
-        except Exception as e:
-            log(f"[ERROR] Failed: {e}")
-            import traceback
-            traceback.print_exc()
-
-    if not saved_paths:
-        raise RuntimeError("No images were generated successfully")
+        # Extract image from response
+        if response.candidates:
+            for part in response.candidates[0].content.parts:
+                if hasattr(part, 'inline_data') and part.inline_data:
+                    if 'image' in part.inline_data.mime_type:
+                        # The SDK already hands back raw bytes; only a
+                        # JSON-transported payload arrives as a base64 string
+                        image_data = part.inline_data.data
+                        if isinstance(image_data, str):
+                            image_data = base64.b64decode(image_data)
+
+                        saved = await _asave(stem, image_data, cache, key, output_format)
+                        log(f"   [v{i+1}] [OK] {saved.path.name}")
+                        return saved
+
+            # Try alternative: check for image attribute directly
+            for part in response.candidates[0].content.parts:
+                if hasattr(part, 'image') and part.image:
+                    img = part.image
+
+                    if getattr(img, 'image_bytes', None):
+                        saved = await _asave(stem, img.image_bytes, cache, key, output_format)
+                    elif hasattr(img, 'save'):
+                        # PIL image: no original bytes, so this path has to encode
+                        saved = SavedImage(stem.with_name(stem.name + ".png"))
+                        await asyncio.to_thread(img.save, str(saved.path))
+                        if cache:
+                            await asyncio.to_thread(cache.put_file, key, saved.path)
+                    else:
+                        continue
+
+                    log(f"   [v{i+1}] [OK] {saved.path.name}")
+                    return saved
+
+        log(f"   [v{i+1}] [WARNING] No image in response")
+        return None
 
-    return saved_paths
+    return await _afan_out(generate_variation, count, concurrency, indices, on_saved)
 
 
-def generate_images_replicate(
+async def agenerate_images_replicate(
     prompt: str,
     output_dir: Path,
     base_name: str,
     count: int = 4,
     aspect_ratio: str = "16:9",
+    concurrency: Optional[int] = None,
+    image_size: Optional[str] = None,
+    use_cache: bool = True,
+    indices: Optional[Sequence[int]] = None,
+    on_saved: Optional[OnSaved] = None,
 ) -> List[Path]:
-    """Generate images using Replicate API (Flux model) - works globally."""
-    import requests
-    import time
+    """
+    Generate images using Replicate API (Flux model) - works globally (async).
+
+    All uncached variations are submitted at once through ReplicateEngine, so
+    wall time approaches the slowest single prediction instead of the sum.
+    Variations are requested as num_outputs of as few predictions as the model
+    allows (CONFIG.replicate_max_outputs per prediction); models that reject or
+    ignore num_outputs fall back to one prediction per variation.
+    indices/on_saved work as in _afan_out.
+    """
 
     if not CONFIG.replicate_key:
         raise ValueError("REPLICATE_API_TOKEN environment variable not set")
@@ -597,8 +1137,6 @@ def generate_images_replicate(
     output_dir.mkdir(parents=True, exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    saved_paths = []
-
     log(f"\n[GEN] Generating {count} images with Replicate (Flux)...")
     log(f"[PROMPT] {prompt[:150]}...")
 
@@ -611,169 +1149,311 @@ def generate_images_replicate(
         "3:4": "3:4",
     }
     replicate_aspect = aspect_map.get(aspect_ratio, "16:9")
+    cache = get_default_cache() if use_cache else None
 
-    headers = {
-        "Authorization": f"Bearer {CONFIG.replicate_key}",
-        "Content-Type": "application/json",
-        "Prefer": "wait=60",  # Wait up to 60 seconds for result
+    # Shared keep-alive async client (token sent only to the API host, not the CDN)
+    client = get_async_replicate_client(CONFIG.replicate_key)
+
+    filepaths = [output_dir / f"{base_name}_{timestamp}_v{i+1}.png" for i in range(count)]
+    base_input = {
+        "aspect_ratio": replicate_aspect,
+        "output_format": "png",
+        "output_quality": 90,
     }
 
-    for i in range(count):
-        log(f"   Generating variation {i+1}/{count}...", end=" ", flush=True)
+    wanted = list(range(count)) if indices is None else sorted(indices)
 
-        try:
-            # Add variation instruction
-            variation_prompt = f"""{prompt}
+    # Ask for several outputs per prediction unless this model is known not to support it
+    batched = (
+        len(wanted) > 1
+        and CONFIG.replicate_max_outputs > 1
+        and CONFIG.replicate_model not in _REPLICATE_SINGLE_OUTPUT_MODELS
+    )
 
-Variation {i+1}: Create a unique interpretation while maintaining the core concept and style."""
+    def key_for(i: int, multi_output: bool) -> str:
+        # Flux takes no image_size input, so it is not part of the key. Multi-output
+        # predictions share one prompt, so they are keyed apart from per-variation ones.
+        backend = "replicate-multi" if multi_output else "replicate"
+        return cache_key(backend, CONFIG.replicate_model, prompt, replicate_aspect, None, i)
 
-            # Request to Replicate API
-            response = requests.post(
-                f"https://api.replicate.com/v1/models/{CONFIG.replicate_model}/predictions",
-                headers=headers,
-                json={
-                    "input": {
-                        "prompt": variation_prompt,
-                        "aspect_ratio": replicate_aspect,
-                        "output_format": "png",
-                        "output_quality": 90,
-                    }
-                },
-                timeout=120,
-            )
+    keys = [key_for(i, batched) for i in range(count)]
+    results: List[Optional[Path]] = [None] * count
 
-            if response.status_code != 200 and response.status_code != 201:
-                log(f"[ERROR] API error: {response.status_code} - {response.text}")
+    def saved(i: int, path: Path, sha256: Optional[str]) -> None:
+        results[i] = path
+        if on_saved:
+            on_saved(i, path, sha256)
+
+    hits = await asyncio.gather(
+        *(_acache_lookup(cache, keys[i], filepaths[i].with_suffix("")) for i in wanted)
+    )
+    for i, hit in zip(wanted, hits):
+        if hit:
+            log(f"   [v{i+1}] [CACHE] {hit.path.name}")
+            saved(i, *hit)
+    pending = [i for i in wanted if results[i] is None]
+
+    def output_urls(prediction: Dict[str, Any]) -> List[str]:
+        output = prediction.get("output")
+        if not output:
+            raise RuntimeError(f"No output in response: {prediction.get('status', 'unknown')}")
+        # Output is usually a URL or list of URLs
+        return output if isinstance(output, list) else [output]
+
+    async def download(i: int, image_url: str) -> None:
+        sha256, size = await _astream_download(client, image_url, filepaths[i], cache, keys[i])
+        log(f"   [v{i+1}] [OK] {filepaths[i].name} ({size // 1024} KB)")
+        saved(i, filepaths[i], sha256)
+
+    engine = ReplicateEngine(client, CONFIG.replicate_model, concurrency=concurrency)
+    failures: Dict[int, Exception] = {}
+
+    if batched and pending:
+        # One prediction per chunk of up to replicate_max_outputs variations,
+        # keyed by the chunk's first variation index
+        size = CONFIG.replicate_max_outputs
+        chunks = {pending[n]: pending[n:n + size] for n in range(0, len(pending), size)}
+
+        async def save_outputs(first: int, prediction: Dict[str, Any]) -> None:
+            chunk = chunks[first]
+            urls = output_urls(prediction)
+            if len(urls) < len(chunk):
+                # Model ignored num_outputs; the rest go through per-variation predictions
+                _REPLICATE_SINGLE_OUTPUT_MODELS.add(CONFIG.replicate_model)
+            saved = await asyncio.gather(
+                *(download(i, url) for i, url in zip(chunk, urls)), return_exceptions=True
+            )
+            for i, outcome in zip(chunk, saved):
+                if isinstance(outcome, Exception):
+                    log(f"   [v{i+1}] [ERROR] Failed: {outcome}")
+                    failures[i] = outcome
+
+        log(f"   Requesting {len(pending)} outputs in {len(chunks)} prediction(s)...")
+        chunk_failures = await engine.run(
+            {first: {**base_input, "prompt": prompt, "num_outputs": len(chunk)}
+             for first, chunk in chunks.items()},
+            save_outputs,
+        )
+        for first, error in chunk_failures.items():
+            if _multi_output_unsupported(error):
+                _REPLICATE_SINGLE_OUTPUT_MODELS.add(CONFIG.replicate_model)
                 continue
+            for i in chunks[first]:
+                failures.setdefault(i, error)
 
-            result = response.json()
-
-            # If we got a prediction ID but no output yet, poll for result
-            if result.get("status") == "starting" or result.get("status") == "processing":
-                prediction_url = result.get("urls", {}).get("get")
-                if prediction_url:
-                    # Poll for completion
-                    for _ in range(30):  # Max 30 attempts (60 seconds)
-                        time.sleep(2)
-                        poll_response = requests.get(prediction_url, headers=headers)
-                        if poll_response.status_code == 200:
-                            result = poll_response.json()
-                            if result.get("status") == "succeeded":
-                                break
-                            elif result.get("status") == "failed":
-                                log(f"[ERROR] Generation failed: {result.get('error')}")
-                                break
-
-            # Check for output
-            output = result.get("output")
-            if output:
-                # Output is usually a URL or list of URLs
-                image_urls = output if isinstance(output, list) else [output]
-
-                for idx, image_url in enumerate(image_urls):
-                    # Download the image
-                    img_response = requests.get(image_url, timeout=30)
-                    if img_response.status_code == 200:
-                        filename = f"{base_name}_{timestamp}_v{i+1}.png"
-                        filepath = output_dir / filename
-
-                        with open(filepath, 'wb') as f:
-                            f.write(img_response.content)
-
-                        saved_paths.append(filepath)
-                        log(f"[OK] {filename}")
-                        break  # Only save first image per variation
-            else:
-                log(f"[WARNING] No output in response: {result.get('status', 'unknown')}")
+        # Whatever the model did not return falls back to one prediction per variation
+        pending = [i for i in pending if results[i] is None and i not in failures]
+        if pending:
+            log(f"[INFO] Falling back to per-variation predictions for {len(pending)} image(s)")
+            for i in pending:
+                keys[i] = key_for(i, False)
 
-        except Exception as e:
-            log(f"[ERROR] Failed: {e}")
-            import traceback
-            traceback.print_exc()
+    if pending:
+        async def save_output(i: int, prediction: Dict[str, Any]) -> None:
+            await download(i, output_urls(prediction)[0])  # Only save first image per variation
 
-    if not saved_paths:
-        raise RuntimeError("No images were generated successfully")
+        failures.update(await engine.run(
+            {i: {**base_input, "prompt": _variation_prompt(prompt, i)} for i in pending},
+            save_output,
+        ))
 
-    return saved_paths
+    return _collect_saved([results[i] for i in wanted], list(failures.values()))
 
 
-def generate_images(
+async def agenerate_images(
     prompt: str,
     output_dir: Path,
     base_name: str,
     count: int = 4,
     aspect_ratio: str = "16:9",
     backend: str = "auto",
+    concurrency: Optional[int] = None,
+    image_size: Optional[str] = None,
+    use_cache: bool = True,
+    output_format: Optional[str] = None,
+    indices: Optional[Sequence[int]] = None,
+    on_saved: Optional[OnSaved] = None,
 ) -> List[Path]:
     """
-    Generate images using the best available backend.
+    Generate images using the best available backend (async).
+
+    Safe to run many of these concurrently on one event loop; cancelling the
+    awaiting task cancels every in-flight request. Every backend checks the
+    content-addressed generation cache per variation, so an unchanged
+    prompt/aspect/size returns stored bytes without an API call.
 
     Args:
-        backend: "auto" (try Gemini then Replicate), "gemini", or "replicate"
+        backend: "auto" (fastest healthy backend per the persisted router state,
+            falling back to the other on backend errors), "gemini", "replicate",
+            or "hedged" (Gemini, plus Replicate if Gemini is slower than usual)
+        concurrency: Max variation requests in flight (default: CONFIG.default_concurrency)
+        image_size: Gemini output size ("1K", "2K", "4K"); None uses the model default
+        use_cache: Set False to bypass the generation cache for this call
+        output_format: Convert Gemini output to "png", "jpeg" or "webp" (default:
+            keep the returned bytes and format; Replicate always returns PNG)
+        indices: Only generate these variation indices (0-based, < count)
+        on_saved: Called with (index, path, sha256) as each variation is saved
     """
-    if backend == "replicate" or (backend == "auto" and CONFIG.replicate_key and not CONFIG.gemini_key):
-        return generate_images_replicate(prompt, output_dir, base_name, count, aspect_ratio)
-
-    if backend == "gemini" or backend == "auto":
-        try:
-            return generate_images_gemini(prompt, output_dir, base_name, count, aspect_ratio)
-        except Exception as e:
-            error_str = str(e).lower()
-            # Check if Gemini is blocked (country restriction or other API error)
-            if "not available in your country" in error_str or "failed_precondition" in error_str:
-                log("\n[INFO] Gemini blocked in your region, falling back to Replicate...")
-                if CONFIG.replicate_key:
-                    return generate_images_replicate(prompt, output_dir, base_name, count, aspect_ratio)
-                else:
-                    raise ValueError(
-                        "Gemini is blocked in your country and REPLICATE_API_TOKEN is not set.\n"
-                        "Get a Replicate API token at: https://replicate.com/account/api-tokens"
-                    )
-            raise
+    opts = dict(concurrency=concurrency, image_size=image_size, use_cache=use_cache, indices=indices)
+    router = get_router()
+    routes = _backend_routes()
+
+    def run(name: str, target_dir: Path = output_dir, notify: Optional[OnSaved] = on_saved) -> Awaitable[List[Path]]:
+        call_opts = {**opts, "on_saved": notify}
+        if name == "gemini":
+            make = lambda: agenerate_images_gemini(
+                prompt, target_dir, base_name, count, aspect_ratio, output_format=output_format, **call_opts
+            )
+        else:
+            make = lambda: agenerate_images_replicate(prompt, target_dir, base_name, count, aspect_ratio, **call_opts)
+        return router.timed(routes[name], make)
+
+    if backend == "hedged":
+        if CONFIG.gemini_key and CONFIG.replicate_key:
+            return await _agenerate_hedged(run, output_dir, on_saved)
+        log("[INFO] Hedged mode needs both Gemini and Replicate keys; using auto")
+        backend = "auto"
+
+    if backend in ("gemini", "replicate"):
+        return await run(backend)
+
+    if backend == "auto":
+        available = [name for name, key in (("gemini", CONFIG.gemini_key), ("replicate", CONFIG.replicate_key)) if key]
+        if not available:
+            raise ValueError("No image backend configured: set GEMINI_API_KEY or REPLICATE_API_TOKEN")
+
+        # Fastest healthy route first; degraded ones only as a last resort
+        by_route = {routes[name]: name for name in available}
+        order = [by_route[route] for route in router.rank(list(by_route))]
+        if order[0] != available[0]:
+            log(f"[ROUTER] {available[0]} is slower or degraded, routing to {order[0]}")
+
+        last_error: Optional[Exception] = None
+        for name in order:
+            try:
+                return await run(name)
+            except Exception as e:
+                last_error = e
+                if name == "gemini" and _gemini_region_blocked(e):
+                    router.mark_unavailable(routes[name], CONFIG.region_block_cooldown, "region_blocked")
+                    if "replicate" not in available:
+                        raise ValueError(
+                            "Gemini is blocked in your country and REPLICATE_API_TOKEN is not set.\n"
+                            "Get a Replicate API token at: https://replicate.com/account/api-tokens"
+                        ) from e
+                    log("\n[INFO] Gemini blocked in your region, falling back to Replicate...")
+                    continue
+
+                category = classify_error(e).category
+                if category in (ErrorCategory.API_ERROR, ErrorCategory.VALIDATION):
+                    raise  # The request itself is bad; another backend will not help
+                if name != order[-1]:
+                    log(f"\n[ROUTER] {name} failed ({category.value}), trying next backend...")
+        raise last_error
 
     raise ValueError(f"Unknown backend: {backend}")
 
 
+def _backend_routes() -> Dict[str, str]:
+    """Router key ("backend/model") for each image backend."""
+    return {
+        "gemini": f"gemini/{CONFIG.gemini_model}",
+        "replicate": f"replicate/{CONFIG.replicate_model}",
+    }
+
+
+def _gemini_region_blocked(error: Exception) -> bool:
+    """True if Gemini refused the request because of the caller's region."""
+    error_str = str(error).lower()
+    return "not available in your country" in error_str or "failed_precondition" in error_str
+
+
+async def _agenerate_hedged(
+    run: Callable[..., Awaitable[List[Path]]],
+    output_dir: Path,
+    on_saved: Optional[OnSaved] = None,
+    primary: str = "gemini",
+    secondary: str = "replicate",
+) -> List[Path]:
+    """
+    Hedged generation: start primary, and if it has not answered within its
+    usual latency (CONFIG.hedge_percentile), start secondary too; keep
+    whichever finishes first and cancel the other.
+
+    Each leg writes into its own hidden directory so a cancelled loser can never
+    clobber or leave files next to the winner's; the winner's files are moved
+    into output_dir, and only then reported to on_saved.
+    """
+    import shutil
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    router = get_router()
+    routes = _backend_routes()
+    names = {routes[primary]: primary, routes[secondary]: secondary}
+    delay = router.hedge_delay(routes[primary], CONFIG.hedge_percentile, CONFIG.hedge_default_delay)
+    log(f"[HEDGE] {primary} first, {secondary} if no answer within {delay:.1f}s")
+
+    leg_dirs: List[Path] = []
+    saved: Dict[Path, Tuple[int, Optional[str]]] = {}  # Leg file -> (index, sha256), for on_saved once moved
+
+    def remember(i: int, path: Path, sha256: Optional[str]) -> None:
+        saved[path] = (i, sha256)
+
+    async def leg(route: str) -> List[Path]:
+        name = names[route]
+        leg_dir = Path(await asyncio.to_thread(tempfile.mkdtemp, dir=output_dir, prefix=f".hedge-{name}-"))
+        leg_dirs.append(leg_dir)
+        if name == secondary:
+            log(f"[HEDGE] {primary} is slow, firing {secondary}")
+        return await run(name, leg_dir, remember)
+
+    try:
+        winner_route, paths = await router.hedged(routes[primary], routes[secondary], leg, delay)
+        winner = names[winner_route]
+        moved = []
+        for path in paths:
+            target = output_dir / path.name
+            await asyncio.to_thread(os.replace, path, target)
+            if on_saved and path in saved:
+                i, sha256 = saved[path]
+                on_saved(i, target, sha256)
+            moved.append(target)
+        log(f"[HEDGE] {winner} answered first")
+        return moved
+    finally:
+        for leg_dir in leg_dirs:
+            await asyncio.to_thread(shutil.rmtree, leg_dir, True)
+
+
+def generate_images_gemini(*args, **kwargs) -> List[Path]:
+    """Sync wrapper around agenerate_images_gemini."""
+    return _run_sync(agenerate_images_gemini(*args, **kwargs))
+
+
+def generate_images_replicate(*args, **kwargs) -> List[Path]:
+    """Sync wrapper around agenerate_images_replicate."""
+    return _run_sync(agenerate_images_replicate(*args, **kwargs))
+
+
+def generate_images(*args, **kwargs) -> List[Path]:
+    """Sync wrapper around agenerate_images (same arguments)."""
+    return _run_sync(agenerate_images(*args, **kwargs))
+
+
 def create_comparison_grid(image_paths: List[Path], output_dir: Path) -> Optional[Path]:
-    """Create a 2x2 comparison grid of all images."""
+    """Create a labelled comparison grid of all images (width capped at CONFIG.grid_max_width)."""
     if len(image_paths) < 2:
         return None
     
     try:
-        images = [Image.open(p) for p in image_paths]
-        
-        # Standardize sizes
-        max_w = max(img.width for img in images)
-        max_h = max(img.height for img in images)
-        
-        # Create grid
-        cols, rows = 2, (len(images) + 1) // 2
-        padding = 10
-        label_height = 30
-        
-        grid_w = cols * max_w + (cols + 1) * padding
-        grid_h = rows * (max_h + label_height) + (rows + 1) * padding
-        
-        grid = Image.new('RGB', (grid_w, grid_h), 'white')
-        
-        for idx, img in enumerate(images):
-            row, col = idx // cols, idx % cols
-            x = padding + col * (max_w + padding)
-            y = padding + row * (max_h + label_height + padding)
-            
-            # Resize to fit
-            img_resized = img.copy()
-            img_resized.thumbnail((max_w, max_h), Image.Resampling.LANCZOS)
-            
-            # Center in cell
-            paste_x = x + (max_w - img_resized.width) // 2
-            paste_y = y + (max_h - img_resized.height) // 2
-            grid.paste(img_resized, (paste_x, paste_y))
-        
-        # Save grid
         grid_path = output_dir / f"{image_paths[0].stem.rsplit('_v', 1)[0]}_GRID.png"
-        grid.save(grid_path)
-        return grid_path
+        return render_grid(
+            image_paths,
+            grid_path,
+            cols=2 if len(image_paths) <= 4 else None,
+            max_width=CONFIG.grid_max_width,
+            labels=[f"Image {idx}" for idx in range(1, len(image_paths) + 1)],
+        )
         
     except Exception as e:
         log(f"[WARNING] Could not create grid: {e}")
@@ -784,25 +1464,148 @@ def create_comparison_grid(image_paths: List[Path], output_dir: Path) -> Optiona
 # AUTO-SELECTION WITH CLAUDE
 # =============================================================================
 
-def auto_select_best(
+# Claude downsizes images whose long edge exceeds this, and bills roughly
+# width * height / 750 tokens for what remains
+CLAUDE_IMAGE_MAX_EDGE = 1568
+CLAUDE_PIXELS_PER_TOKEN = 750
+
+
+def _image_tokens(width: int, height: int) -> int:
+    """Estimated Claude input tokens for an image of this size."""
+    scale = min(1.0, CLAUDE_IMAGE_MAX_EDGE / max(width, height, 1))
+    return int(width * scale * height * scale / CLAUDE_PIXELS_PER_TOKEN)
+
+
+@dataclass
+class EvalImage:
+    """One candidate prepared for the evaluation request."""
+    media_type: str
+    data: str            # base64
+    original_bytes: int
+    original_size: Tuple[int, int]
+    size: Tuple[int, int]
+
+    @property
+    def payload_bytes(self) -> int:
+        return len(self.data)
+
+
+def _prepare_eval_image(path: Path, max_edge: int, fmt: str, quality: int) -> EvalImage:
+    """
+    Downscale an image to max_edge and re-encode it for the evaluation request.
+
+    Runs in a worker process. Falls back to the original bytes when they are
+    already small enough and no larger than the re-encoded version.
+    """
+    import io
+
+    data = Path(path).read_bytes()
+    fmt = "jpeg" if fmt.lower() == "jpg" else fmt.lower()
+    with Image.open(io.BytesIO(data)) as img:
+        original_size = img.size
+        img.load()
+        if max(img.size) > max_edge:
+            img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        if fmt == "jpeg" and img.mode not in ("RGB", "L"):
+            # Flatten transparency onto the brand cream background
+            rgba = img.convert("RGBA")
+            img = Image.new("RGB", rgba.size, (255, 251, 247))
+            img.paste(rgba, mask=rgba.getchannel("A"))
+        out = io.BytesIO()
+        img.save(out, format=fmt.upper(), quality=quality, optimize=True)
+        encoded, size = out.getvalue(), img.size
+
+    if size == original_size and len(data) <= len(encoded):
+        encoded, fmt = data, detect_image_format(data) or "png"
+    return EvalImage(
+        media_type=format_to_mime(fmt),
+        data=base64.standard_b64encode(encoded).decode("utf-8"),
+        original_bytes=len(data),
+        original_size=original_size,
+        size=size,
+    )
+
+
+_eval_pool: Optional[ProcessPoolExecutor] = None
+_eval_pool_lock = threading.Lock()
+
+
+def _get_eval_pool() -> ProcessPoolExecutor:
+    """Process pool for image preprocessing (decode/resize/encode is CPU-bound)."""
+    global _eval_pool
+    with _eval_pool_lock:
+        if _eval_pool is None:
+            _eval_pool = ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+        return _eval_pool
+
+
+_eval_pool_unavailable = False
+
+
+async def _aprepare_eval_image(path: Path) -> EvalImage:
+    """Prepare one candidate in a worker process (threads where processes are unavailable)."""
+    global _eval_pool_unavailable
+    args = (CONFIG.eval_max_edge, CONFIG.eval_format, CONFIG.eval_quality)
+    if not _eval_pool_unavailable:
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_get_eval_pool(), _prepare_eval_image, path, *args)
+        except (BrokenProcessPool, NotImplementedError, PermissionError) as e:
+            # Sandboxes without multiprocessing support: same work in threads
+            log(f"[WARNING] Process pool unavailable ({e}), preprocessing in threads")
+            _eval_pool_unavailable = True
+    return await asyncio.to_thread(_prepare_eval_image, path, *args)
+
+
+async def _aprepare_eval_images(
     image_paths: List[Path],
-    original_prompt: str,
-) -> Tuple[Path, Dict[str, Any]]:
-    """Use Claude to evaluate and select the best image."""
-    
-    if not CONFIG.anthropic_key:
-        raise ValueError("ANTHROPIC_API_KEY required for auto-selection")
-    
-    log(f"\n🤖 Evaluating {len(image_paths)} images with Claude...")
-    
-    client = anthropic.Anthropic(api_key=CONFIG.anthropic_key)
+    ready: Optional[Dict[Path, EvalImage]] = None,
+) -> List[EvalImage]:
+    """Prepare all candidates in parallel, reusing any already in ready."""
+    ready = ready or {}
+
+    async def prepare(path: Path) -> EvalImage:
+        return ready.get(path) or await _aprepare_eval_image(path)
+
+    return list(await asyncio.gather(*(prepare(p) for p in image_paths)))
+
+
+def _format_mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+def _parse_evaluation(response_text: str) -> Dict[str, Any]:
+    """Parse Claude's JSON evaluation, tolerating markdown fences and stray text."""
+    response_text = response_text.strip()
+
+    # Clean JSON if wrapped in markdown
+    if response_text.startswith("```"):
+        response_text = response_text.split("```")[1]
+        if response_text.startswith("json"):
+            response_text = response_text[4:]
     
-    # Prepare images for Claude
+    try:
+        return json.loads(response_text)
+    except json.JSONDecodeError:
+        # Fallback: extract selection number
+        import re
+        match = re.search(r'"selected":\s*(\d+)', response_text)
+        if match:
+            return {"selected": int(match.group(1)), "reasoning": response_text}
+        log("[WARNING] Could not parse evaluation, defaulting to image 1")
+        return {"selected": 1, "reasoning": "Parse error, defaulted to first"}
+
+
+async def _aevaluate_bracket(
+    client,
+    image_paths: List[Path],
+    prepared: List[EvalImage],
+    original_prompt: str,
+    label: str = "",
+) -> Tuple[int, Dict[str, Any]]:
+    """One Claude request over a set of candidates; returns (0-based winner, evaluation)."""
     content = []
-    for idx, path in enumerate(image_paths, 1):
-        with open(path, 'rb') as f:
-            image_data = base64.standard_b64encode(f.read()).decode('utf-8')
-        
+    for idx, (path, image) in enumerate(zip(image_paths, prepared), 1):
         content.append({
             "type": "text",
             "text": f"**Image {idx}:** {path.name}"
@@ -811,8 +1614,8 @@ def auto_select_best(
             "type": "image",
             "source": {
                 "type": "base64",
-                "media_type": "image/png",
-                "data": image_data,
+                "media_type": image.media_type,
+                "data": image.data,
             }
         })
     
@@ -831,35 +1634,259 @@ Respond with ONLY the JSON object, no other text.
     })
     
     # Call Claude
-    response = client.messages.create(
-        model=CONFIG.claude_model,
-        max_tokens=1500,
-        messages=[{"role": "user", "content": content}]
-    )
+    start = time.monotonic()
+    async with _request_slot(f"anthropic/{CONFIG.claude_model}"):
+        response = await client.messages.create(
+            model=CONFIG.claude_model,
+            max_tokens=1500,
+            messages=[{"role": "user", "content": content}]
+        )
+    usage = getattr(response, "usage", None)
+    log(f"[EVAL] {label}Claude responded in {time.monotonic() - start:.1f}s"
+        + (f" ({usage.input_tokens:,} input / {usage.output_tokens:,} output tokens)" if usage else ""))
     
-    # Parse response
-    response_text = response.content[0].text.strip()
+    evaluation = _parse_evaluation(response.content[0].text)
+    count = len(image_paths)
+    rankings = evaluation.get("rankings")
+    if isinstance(rankings, list):
+        evaluation["rankings"] = _valid_rankings(rankings, count)
+        if len(evaluation["rankings"]) < len(rankings):
+            log(f"[WARNING] {label}Dropped rankings for images outside 1-{count}")
+    selected_idx = _selected_index(evaluation, count)
+    evaluation["selected"] = selected_idx + 1  # _renumber maps only valid numbers
+    return selected_idx, evaluation
+
+
+def _image_number(n: Any, count: int) -> Optional[int]:
+    """n as a 1-based image number of a bracket of count images, or None if it is not one."""
+    if isinstance(n, str) and n.strip().isdigit():
+        n = int(n)
+    if isinstance(n, int) and not isinstance(n, bool) and 1 <= n <= count:
+        return n
+    return None
+
+
+def _valid_rankings(rankings: Any, count: int) -> List[Dict[str, Any]]:
+    """The ranking entries that name an image of a count-image bracket (numbers as ints)."""
+    valid = []
+    for ranking in rankings if isinstance(rankings, list) else []:
+        number = _image_number(ranking.get("image"), count) if isinstance(ranking, dict) else None
+        if number is not None:
+            valid.append({**ranking, "image": number})
+    return valid
+
+
+def _selected_index(evaluation: Dict[str, Any], count: int) -> int:
+    """
+    0-based winner of a bracket of count images. A missing or out-of-range
+    "selected" falls back to the best-scored valid ranking, then to image 1.
+    """
+    selected = evaluation.get("selected")
+    number = _image_number(selected, count)
+    if number is not None:
+        return number - 1
+    rankings = _valid_rankings(evaluation.get("rankings"), count)
+    if rankings:
+        best = max(rankings, key=_score)
+        log(f"[WARNING] Claude selected image {selected!r} of {count}; using top-ranked image {best['image']}")
+        return best["image"] - 1
+    log(f"[WARNING] Claude selected image {selected!r} of {count}; using image 1")
+    return 0
+
+
+def _renumber(evaluation: Dict[str, Any], indices: List[int]) -> Dict[str, Any]:
+    """
+    Map a bracket's 1-based image numbers back to positions in the full
+    candidate list. Rankings naming no image of the bracket are dropped.
+    """
+    def to_global(n) -> Optional[int]:
+        number = _image_number(n, len(indices))
+        return indices[number - 1] + 1 if number is not None else None
+
+    evaluation = dict(evaluation)
+    evaluation["selected"] = to_global(evaluation.get("selected")) or indices[0] + 1
+    if "rankings" in evaluation:
+        evaluation["rankings"] = [
+            {**r, "image": to_global(r["image"])} for r in _valid_rankings(evaluation["rankings"], len(indices))
+        ]
+    return evaluation
+
+
+def _score(ranking: Optional[Dict[str, Any]]) -> float:
+    """Numeric score of a ranking entry (missing or malformed scores rank last)."""
+    try:
+        return float((ranking or {}).get("score"))
+    except (TypeError, ValueError):
+        return float("-inf")
+
+
+async def _atournament(
+    client,
+    image_paths: List[Path],
+    prepared: List[EvalImage],
+    original_prompt: str,
+    bracket_size: int,
+) -> Tuple[int, Dict[str, Any], Dict[int, Dict[str, Any]]]:
+    """
+    Judge candidates in brackets of bracket_size until one bracket is left.
+
+    Returns (0-based winner, final evaluation, latest ranking per candidate).
+    Each ranking carries the id of the request ("batch") that scored it, since
+    scores are only comparable within one request.
+    """
+    def judge(indices: List[int], label: str = ""):
+        return _aevaluate_bracket(
+            client,
+            [image_paths[i] for i in indices],
+            [prepared[i] for i in indices],
+            original_prompt,
+            label,
+        )
+
+    scores: Dict[int, Dict[str, Any]] = {}
+
+    def remember(evaluation: Dict[str, Any]) -> None:
+        """Keep the rankings of an evaluation already renumbered to global positions."""
+        batch = secrets.token_hex(4)
+        for ranking in _valid_rankings(evaluation.get("rankings"), len(image_paths)):
+            scores[ranking["image"] - 1] = {**ranking, "batch": batch}
+
+    # Tournament rounds until the remaining candidates fit one bracket
+    remaining = list(range(len(image_paths)))
+    rounds: List[List[Dict[str, Any]]] = []
+    while len(remaining) > bracket_size:
+        # Spread candidates evenly so no bracket is left with a lone image
+        n_brackets = -(-len(remaining) // bracket_size)
+        brackets = [remaining[b::n_brackets] for b in range(n_brackets)]
+        round_no = len(rounds) + 1
+        log(f"[EVAL] Round {round_no}: {len(remaining)} candidates in {n_brackets} brackets")
+        outcomes = await asyncio.gather(*(
+            judge(bracket, f"Round {round_no} bracket {b}: ")
+            for b, bracket in enumerate(brackets, 1)
+        ))
+        rounds.append([
+            {"candidates": [i + 1 for i in bracket], "winner": bracket[won] + 1,
+             "reasoning": evaluation.get("reasoning", "")}
+            for bracket, (won, evaluation) in zip(brackets, outcomes)
+        ])
+        for bracket, (_, evaluation) in zip(brackets, outcomes):
+            remember(_renumber(evaluation, bracket))
+        remaining = [bracket[won] for bracket, (won, _) in zip(brackets, outcomes)]
+
+    won, evaluation = await judge(remaining, "Final: " if rounds else "")
+    evaluation = _renumber(evaluation, remaining)
+    remember(evaluation)
+    if rounds:
+        evaluation["tournament"] = rounds
+    return remaining[won], evaluation, scores
+
+
+async def aauto_select_best(
+    image_paths: List[Path],
+    original_prompt: str,
+    bracket_size: Optional[int] = None,
+    use_cache: bool = True,
+    payloads: Optional[Dict[Path, EvalImage]] = None,
+    digests: Optional[Dict[Path, str]] = None,
+) -> Tuple[Path, Dict[str, Any]]:
+    """
+    Use Claude to evaluate and select the best image (async).
+
+    Up to bracket_size candidates (CONFIG.eval_bracket_size) are judged in one
+    request. Larger sets run as a tournament: brackets of that size are judged
+    concurrently and their winners advance until one bracket is left, so every
+    request stays the same size and wall time grows with the number of rounds.
+
+    Per-image scores are cached by image content, prompt, model and criteria,
+    together with the request that gave them. Scores from different requests
+    are not comparable, so only candidates without a cached score are sent to
+    Claude, plus the best cached candidate of each earlier request they must
+    be compared with; when every candidate was scored in one earlier request
+    no request is made. payloads may hold evaluation images already prepared
+    for some candidates, digests the sha256 of some candidates' files.
+    """
     
-    # Clean JSON if wrapped in markdown
-    if response_text.startswith("```"):
-        response_text = response_text.split("```")[1]
-        if response_text.startswith("json"):
-            response_text = response_text[4:]
+    if not CONFIG.anthropic_key:
+        raise ValueError("ANTHROPIC_API_KEY required for auto-selection")
     
-    try:
-        evaluation = json.loads(response_text)
-    except json.JSONDecodeError:
-        # Fallback: extract selection number
-        import re
-        match = re.search(r'"selected":\s*(\d+)', response_text)
-        if match:
-            evaluation = {"selected": int(match.group(1)), "reasoning": response_text}
-        else:
-            log("[WARNING] Could not parse evaluation, defaulting to image 1")
-            evaluation = {"selected": 1, "reasoning": "Parse error, defaulted to first"}
+    log(f"\n🤖 Evaluating {len(image_paths)} images with Claude...")
     
-    selected_idx = evaluation.get("selected", 1) - 1  # Convert to 0-indexed
-    selected_idx = max(0, min(selected_idx, len(image_paths) - 1))  # Bounds check
+    cache = get_evaluation_cache() if use_cache else None
+    keys: List[Optional[str]] = [None] * len(image_paths)
+    cached: Dict[int, Dict[str, Any]] = {}
+    if cache and cache.enabled:
+        known = dict(digests or {})
+        missing = [p for p in image_paths if not known.get(p)]
+        known.update(zip(missing, await asyncio.gather(*(asyncio.to_thread(file_sha256, p) for p in missing))))
+        keys = [evaluation_key(known[p], original_prompt, CONFIG.claude_model, EVALUATION_CRITERIA)
+                for p in image_paths]
+        for i, key in enumerate(keys):
+            entry = await asyncio.to_thread(cache.get, key)
+            if entry is not None:
+                cached[i] = {**entry, "image": i + 1, "cached": True}
+        if cached:
+            log(f"[EVAL] {len(cached)}/{len(image_paths)} candidates already scored (evaluation cache)")
+    fresh = [i for i in range(len(image_paths)) if i not in cached]
+
+    # Best cached candidate per earlier request (entries without one stand alone)
+    batch_best: Dict[str, int] = {}
+    for i, entry in cached.items():
+        batch = entry.get("batch") or f"entry-{i}"
+        if batch not in batch_best or _score(entry) > _score(cached[batch_best[batch]]):
+            batch_best[batch] = i
+    rejudge = sorted(batch_best.values()) if fresh or len(batch_best) > 1 else []
+    if rejudge:
+        log(f"[EVAL] Re-judging {len(rejudge)} cached candidate(s) alongside the others"
+            " (scores from separate evaluations are not comparable)")
+    judged = sorted(fresh + rejudge)
+
+    evaluation: Dict[str, Any] = {}
+    scores: Dict[int, Dict[str, Any]] = {}
+    selected_idx: Optional[int] = None
+    if judged:
+        client = get_async_anthropic_client(CONFIG.anthropic_key)
+        bracket_size = max(2, bracket_size or CONFIG.eval_bracket_size)
+        judged_paths = [image_paths[i] for i in judged]
+
+        # Downscale and re-encode the candidates in parallel, off the event loop
+        start = time.monotonic()
+        prepared = await _aprepare_eval_images(judged_paths, payloads)
+        prep_seconds = time.monotonic() - start
+
+        original_bytes = sum(4 * -(-e.original_bytes // 3) for e in prepared)  # As base64
+        payload_bytes = sum(e.payload_bytes for e in prepared)
+        log(f"[EVAL] Payload {_format_mb(original_bytes)} -> {_format_mb(payload_bytes)}"
+            f" (~{sum(_image_tokens(*e.original_size) for e in prepared):,} -> "
+            f"~{sum(_image_tokens(*e.size) for e in prepared):,} image tokens est.,"
+            f" {CONFIG.eval_max_edge}px {CONFIG.eval_format}) in {prep_seconds:.2f}s")
+
+        won, evaluation, local_scores = await _atournament(
+            client, judged_paths, prepared, original_prompt, bracket_size
+        )
+        evaluation = _renumber(evaluation, judged)
+        selected_idx = judged[won]
+        scores = {
+            judged[i]: {**r, "image": judged[i] + 1}
+            for i, r in local_scores.items() if i in range(len(judged))
+        }
+
+        if cache:
+            for i, ranking in scores.items():
+                entry = {k: v for k, v in ranking.items() if k not in ("image", "cached")}
+                await asyncio.to_thread(cache.put, keys[i], {**entry, "file": image_paths[i].name})
+    else:
+        # Every candidate was scored in the same earlier request: its scores decide
+        selected_idx = next(iter(batch_best.values()))
+        evaluation = {
+            "selected": selected_idx + 1,
+            "reasoning": f"Previously scored {_score(cached[selected_idx]):g}: "
+                         f"{cached[selected_idx].get('strengths', '')}",
+        }
+
+    if cached:
+        rankings = {**cached, **scores}  # A re-judged candidate shows its new ranking
+        evaluation["rankings"] = [rankings[i] for i in sorted(rankings)]
+        evaluation["cached"] = sorted(i + 1 for i in cached if i not in scores)
     
     selected_path = image_paths[selected_idx]
     
@@ -870,6 +1897,16 @@ Respond with ONLY the JSON object, no other text.
     return selected_path, evaluation
 
 
+def auto_select_best(
+    image_paths: List[Path],
+    original_prompt: str,
+    bracket_size: Optional[int] = None,
+    use_cache: bool = True,
+) -> Tuple[Path, Dict[str, Any]]:
+    """Sync wrapper around aauto_select_best."""
+    return _run_sync(aauto_select_best(image_paths, original_prompt, bracket_size, use_cache))
+
+
 # =============================================================================
 # FINALIZATION
 # =============================================================================
@@ -885,7 +1922,7 @@ def finalize_image(
     final_dir = CONFIG.final_dir / category
     final_dir.mkdir(parents=True, exist_ok=True)
     
-    final_path = final_dir / f"{final_name}.png"
+    final_path = final_dir / f"{final_name}{source_path.suffix or '.png'}"
     shutil.copy2(source_path, final_path)
     
     log(f"\n📦 Final image: {final_path}")
@@ -898,49 +1935,106 @@ def log_generation(
     selected_path: Optional[Path],
     evaluation: Optional[Dict],
     category: str,
-) -> None:
-    """Log generation for history and debugging."""
-    
-    CONFIG.log_file.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Load existing log
-    if CONFIG.log_file.exists():
-        with open(CONFIG.log_file) as f:
-            log = json.load(f)
-    else:
-        log = {"generations": []}
-    
-    # Add entry
-    log["generations"].append({
+    name: Optional[str] = None,
+    final_path: Optional[Path] = None,
+) -> int:
+    """Append the run to the generation history; returns its history id."""
+    return get_history(legacy_log=CONFIG.log_file).append({
         "timestamp": datetime.now().isoformat(),
         "prompt": prompt,
         "category": category,
+        "name": name,
         "generated": [str(p) for p in image_paths],
         "selected": str(selected_path) if selected_path else None,
+        "final": str(final_path) if final_path else None,
         "evaluation": evaluation,
     })
-    
-    # Keep last 100 entries
-    log["generations"] = log["generations"][-100:]
-    
-    with open(CONFIG.log_file, 'w') as f:
-        json.dump(log, f, indent=2)
 
 
 # =============================================================================
 # MAIN PIPELINE
 # =============================================================================
 
-def generate_and_select(
+class StageTimings:
+    """Wall-clock span of each pipeline stage, relative to the pipeline start."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self._spans: Dict[str, List[float]] = {}  # name -> [first start, last end, busy seconds]
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Time one run of a stage; repeated runs (one per variation) widen its span."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            end = time.monotonic()
+            span = self._spans.setdefault(name, [start, end, 0.0])
+            span[0], span[1] = min(span[0], start), max(span[1], end)
+            span[2] += end - start
+
+    def summary(self) -> Dict[str, Any]:
+        """{"wall": seconds, "stages": {name: {start, end, busy}}} for the result dict."""
+        return {
+            "wall": round(time.monotonic() - self.started, 3),
+            "stages": {
+                name: {
+                    "start": round(start - self.started, 3),
+                    "end": round(end - self.started, 3),
+                    "busy": round(busy, 3),
+                }
+                for name, (start, end, busy) in self._spans.items()
+            },
+        }
+
+    def format(self) -> str:
+        summary = self.summary()
+        stages = ", ".join(f"{name} {s['start']:.1f}-{s['end']:.1f}s"
+                           for name, s in summary["stages"].items())
+        serial = sum(s["end"] - s["start"] for s in summary["stages"].values())
+        return f"{stages} | wall {summary['wall']:.1f}s vs {serial:.1f}s run back to back"
+
+
+def _verify_image(path: Path) -> Optional[str]:
+    """Problem with a saved variation, or None if it decodes cleanly."""
+    try:
+        validation = validate_image_data(path.read_bytes())
+        if not validation.success:
+            return validation.error.message
+        with Image.open(path) as img:
+            img.verify()
+    except Exception as e:
+        return str(e)
+    return None
+
+
+async def agenerate_and_select(
     prompt: str,
     name: str,
     category: str = "programs",
     count: int = 4,
     aspect_ratio: str = "16:9",
     auto_select: bool = True,
+    concurrency: Optional[int] = None,
+    use_cache: bool = True,
+    output_format: Optional[str] = None,
+    backend: str = "auto",
+    image_size: Optional[str] = None,
+    journal: Optional[GenerationJournal] = None,
 ) -> Dict[str, Any]:
     """
-    Complete pipeline: generate images, optionally auto-select, and finalize.
+    Complete pipeline: generate images, optionally auto-select, and finalize (async).
+
+    Stages overlap instead of running back to back: each variation is
+    validated and its evaluation thumbnail built as soon as it lands, the
+    comparison grid renders in a worker while Claude evaluates, and the
+    winner is finalized the moment it is known. Blocking steps run in worker
+    threads/processes so a single event loop can drive many pipelines.
+
+    With a journal, every saved variation, the evaluation and the finalized
+    image are recorded as they complete; a resumed journal skips the steps
+    whose files still exist with their recorded hash.
     
     Returns dict with:
         - generated: List of generated image paths
@@ -948,59 +2042,174 @@ def generate_and_select(
         - selected: Path to selected image (if auto_select)
         - final: Path to final deployed image (if auto_select)
         - evaluation: Claude's evaluation (if auto_select)
+        - timings: Per-stage start/end/busy seconds and total wall time
     """
     
     output_dir = CONFIG.generated_dir / category
+    timings = StageTimings()
+    selecting = auto_select and bool(CONFIG.anthropic_key)
     
-    # Step 1: Generate images
+    # Stage 1: Generate images, checking each one as it lands
     log("=" * 60)
     log("[GENERATING] EVOLEA IMAGE GENERATION PIPELINE")
     log("=" * 60)
 
-    image_paths = generate_images(
-        prompt=prompt,
-        output_dir=output_dir,
-        base_name=name,
-        count=count,
-        aspect_ratio=aspect_ratio,
-        backend="auto",
-    )
+    done: Dict[int, Path] = {}
+    checks: Dict[int, "asyncio.Task[bool]"] = {}
+    payloads: Dict[Path, EvalImage] = {}
+    digests: Dict[Path, str] = {}  # sha256 of each variation, so evaluation need not re-hash
+
+    async def check(i: int, path: Path) -> bool:
+        with timings.stage("validate"):
+            problem = await asyncio.to_thread(_verify_image, path)
+        if problem:
+            log(f"   [v{i+1}] [WARNING] Dropping invalid image {path.name}: {problem}")
+            return False
+        if selecting:
+            with timings.stage("thumbnails"):
+                try:
+                    payloads[path] = await _aprepare_eval_image(path)
+                except Exception as e:
+                    log(f"   [v{i+1}] [WARNING] Thumbnail failed, retrying at evaluation: {e}")
+        return True
+
+    def landed(i: int, path: Path) -> None:
+        done[i] = path
+        checks[i] = asyncio.ensure_future(check(i, path))
+
+    if journal:
+        for i in range(count):
+            path = await asyncio.to_thread(journal.completed_file, f"v{i+1}")
+            if path:
+                digests[path] = journal.digest(path)
+                landed(i, path)
+        if done:
+            log(f"[JOURNAL] Resuming: {len(done)}/{count} variations already generated")
+
+    # Journal writes hash and fsync, so they run in workers; awaited before evaluation
+    journal_writes: List[asyncio.Future] = []
+
+    def on_saved(i: int, path: Path, sha256: Optional[str]) -> None:
+        if sha256:
+            digests[path] = sha256
+        landed(i, path)
+        if journal:
+            journal_writes.append(asyncio.ensure_future(
+                asyncio.to_thread(journal.record, f"v{i+1}", path, sha256=sha256)
+            ))
+
+    todo = [i for i in range(count) if i not in done]
+    try:
+        if todo:
+            with timings.stage("generate"):
+                await agenerate_images(
+                    prompt=prompt,
+                    output_dir=output_dir,
+                    base_name=name,
+                    count=count,
+                    aspect_ratio=aspect_ratio,
+                    backend=backend,
+                    concurrency=concurrency,
+                    use_cache=use_cache,
+                    output_format=output_format,
+                    image_size=image_size,
+                    indices=todo,
+                    on_saved=on_saved,
+                )
+        valid = await asyncio.gather(*(checks[i] for i in sorted(done)))
+        await asyncio.gather(*journal_writes)
+    except BaseException:
+        for task in checks.values():
+            task.cancel()
+        # Keep the variations that did land, so a resume need not redo them
+        await asyncio.gather(*journal_writes, return_exceptions=True)
+        raise
+    image_paths = [done[i] for i, ok in zip(sorted(done), valid) if ok]
+    if not image_paths:
+        raise RuntimeError("No valid images were generated")
     
-    # Step 2: Create comparison grid
-    grid_path = create_comparison_grid(image_paths, output_dir)
-    if grid_path:
-        log(f"\n[GRID] Comparison grid: {grid_path}")
+    # Stage 2: Comparison grid, rendered in a worker while Claude evaluates
+    async def render_grid_stage() -> Optional[Path]:
+        with timings.stage("grid"):
+            return await asyncio.to_thread(create_comparison_grid, image_paths, output_dir)
+
+    grid_task = asyncio.ensure_future(render_grid_stage())
     
     result = {
         "generated": [str(p) for p in image_paths],
-        "grid": str(grid_path) if grid_path else None,
+        "grid": None,
         "selected": None,
         "final": None,
         "evaluation": None,
     }
     
-    # Step 3: Auto-select if requested
-    if auto_select and CONFIG.anthropic_key:
-        selected_path, evaluation = auto_select_best(image_paths, prompt)
-        result["selected"] = str(selected_path)
-        result["evaluation"] = evaluation
-        
-        # Step 4: Finalize
-        final_path = finalize_image(selected_path, name, category)
-        result["final"] = str(final_path)
+    try:
+        # Stage 3: Auto-select if requested
+        if selecting:
+            hashes = [journal.digest(p) for p in image_paths] if journal else []
+            previous = journal.get("evaluation") if journal else None
+            with timings.stage("select"):
+                if previous and previous.get("images") == hashes and Path(previous["selected"]).exists():
+                    log("[JOURNAL] Reusing evaluation from the interrupted run")
+                    selected_path, evaluation = Path(previous["selected"]), previous["evaluation"]
+                else:
+                    selected_path, evaluation = await aauto_select_best(
+                        image_paths, prompt, use_cache=use_cache, payloads=payloads, digests=digests
+                    )
+                    if journal:
+                        await asyncio.to_thread(
+                            journal.record, "evaluation",
+                            images=hashes, selected=str(selected_path), evaluation=evaluation,
+                        )
+            result["selected"] = str(selected_path)
+            result["evaluation"] = evaluation
+            
+            # Stage 4: Finalize the winner straight away (the grid may still be rendering)
+            with timings.stage("finalize"):
+                final_path = await asyncio.to_thread(journal.completed_file, "finalize") if journal else None
+                previous = journal.get("finalize") if journal else None
+                if final_path and previous.get("source") == journal.digest(selected_path):
+                    log(f"[JOURNAL] Already finalized: {final_path}")
+                else:
+                    final_path = await asyncio.to_thread(finalize_image, selected_path, name, category)
+                    if journal:
+                        await asyncio.to_thread(journal.record, "finalize", final_path, source=journal.digest(selected_path))
+            result["final"] = str(final_path)
+            
+        elif auto_select and not CONFIG.anthropic_key:
+            log("\n[WARNING] ANTHROPIC_API_KEY not set - skipping auto-selection")
+            log("   Set the key or run without --auto-select for manual review")
         
-    elif auto_select and not CONFIG.anthropic_key:
-        log("\n[WARNING] ANTHROPIC_API_KEY not set - skipping auto-selection")
-        log("   Set the key or run without --auto-select for manual review")
-    
-    # Log generation
-    log_generation(
-        prompt=prompt,
-        image_paths=image_paths,
-        selected_path=Path(result["selected"]) if result["selected"] else None,
-        evaluation=result["evaluation"],
-        category=category,
-    )
+        # Log generation (once per run, even across resumes)
+        if not (journal and journal.get("logged")):
+            with timings.stage("log"):
+                history_id = await asyncio.to_thread(
+                    log_generation,
+                    prompt=prompt,
+                    image_paths=image_paths,
+                    selected_path=Path(result["selected"]) if result["selected"] else None,
+                    evaluation=result["evaluation"],
+                    category=category,
+                    name=name,
+                    final_path=Path(result["final"]) if result["final"] else None,
+                )
+            result["history_id"] = history_id
+            if journal:
+                await asyncio.to_thread(journal.record, "logged", history_id=history_id)
+    except BaseException:
+        grid_task.cancel()
+        raise
+
+    grid_path = await grid_task
+    result["grid"] = str(grid_path) if grid_path else None
+    if grid_path:
+        log(f"\n[GRID] Comparison grid: {grid_path}")
+
+    if journal:
+        await asyncio.to_thread(journal.finish)
+        await asyncio.to_thread(prune_journals, journal.path.parent)
+        result["run_id"] = journal.run_id
+    result["timings"] = timings.summary()
     
     # Summary
     log("\n" + "=" * 60)
@@ -1011,10 +2220,16 @@ def generate_and_select(
         log(f"Selected:  {result['final']}")
     else:
         log(f"Review:    {grid_path or image_paths[0]}")
+    log(f"[TIMING] {timings.format()}")
     
     return result
 
 
+def generate_and_select(*args, **kwargs) -> Dict[str, Any]:
+    """Sync wrapper around agenerate_and_select (same arguments)."""
+    return _run_sync(agenerate_and_select(*args, **kwargs))
+
+
 # =============================================================================
 # CLI
 # =============================================================================
@@ -1117,6 +2332,9 @@ Examples:
   # Different aspect ratio for blog images
   %(prog)s "butterfly transformation" --name blog-header --category blog --aspect 4:3
 
+  # Continue an interrupted run (run id is printed at start)
+  %(prog)s --resume mini-garten-hero-20260101-120000-ab12
+
 Environment Variables:
   GEMINI_API_KEY     Required for image generation
   ANTHROPIC_API_KEY  Required for auto-selection (--auto-select)
@@ -1127,7 +2345,7 @@ Reinforcement Learning:
     )
 
     parser.add_argument("prompt", nargs="?", help="Image generation prompt")
-    parser.add_argument("--name", "-n", required=True, help="Output name (no extension)")
+    parser.add_argument("--name", "-n", help="Output name (no extension)")
     parser.add_argument("--category", "-c", default="programs",
                        help="Category folder (programs, blog, decorative, training)")
     parser.add_argument("--count", type=int, default=4,
@@ -1143,15 +2361,39 @@ Reinforcement Learning:
     parser.add_argument("--output-json", "-j", action="store_true",
                        help="Output result as JSON (for scripting)")
     parser.add_argument("--backend", "-b", default="auto",
-                       choices=["auto", "gemini", "replicate"],
+                       choices=["auto", "gemini", "replicate", "hedged"],
                        help="Image generation backend (default: auto)")
+    parser.add_argument("--concurrency", type=int, default=None,
+                       help=f"Max variation requests in flight (default: {CONFIG.default_concurrency})")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Always call the API, bypassing the generation cache")
+    parser.add_argument("--format", dest="output_format", default=None,
+                       choices=["png", "jpeg", "webp"],
+                       help="Convert generated images to this format (default: keep the API's format)")
+    parser.add_argument("--resume", metavar="RUN_ID", default=None,
+                       help="Continue an interrupted run from its journal, skipping completed steps")
 
     args = parser.parse_args()
 
-    if not args.prompt:
+    journal = None
+    if args.resume:
+        try:
+            journal = GenerationJournal.resume(args.resume, kind="generate_and_select")
+        except ValueError as e:
+            log(f"[ERROR] {e}")
+            sys.exit(1)
+        if journal.finished:
+            log(f"[JOURNAL] Run {journal.run_id} already completed; re-checking its outputs")
+        for key, value in journal.params.items():
+            setattr(args, key, value)
+    elif not args.prompt or not args.name:
         parser.print_help()
         sys.exit(1)
 
+    if args.no_cache:
+        get_default_cache().enabled = False
+        get_evaluation_cache().enabled = False
+
     try:
         if args.training:
             # A/B comparison mode with learnings
@@ -1165,6 +2407,18 @@ Reinforcement Learning:
             )
         else:
             # Standard generation mode
+            if journal is None:
+                journal = GenerationJournal.create("generate_and_select", {
+                    "prompt": args.prompt,
+                    "name": args.name,
+                    "category": args.category,
+                    "count": args.count,
+                    "aspect": args.aspect,
+                    "auto_select": args.auto_select,
+                    "backend": args.backend,
+                    "output_format": args.output_format,
+                })
+                log(f"[JOURNAL] Run id: {journal.run_id} (continue with --resume {journal.run_id})")
             result = generate_and_select(
                 prompt=args.prompt,
                 name=args.name,
@@ -1172,8 +2426,17 @@ Reinforcement Learning:
                 count=args.count,
                 aspect_ratio=args.aspect,
                 auto_select=args.auto_select,
+                concurrency=args.concurrency,
+                output_format=args.output_format,
+                backend=args.backend,
+                journal=journal,
             )
 
+        log(f"[POOL] {format_client_stats()}")
+        log(f"[CACHE] {get_default_cache().format_stats()}")
+        log(f"[EVAL CACHE] {get_evaluation_cache().format_stats()}")
+        log(f"[ROUTER] {get_router().format_stats()}")
+
         if args.output_json:
             log("\n" + json.dumps(result, indent=2))
 
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Generation Cache for EVOLEA Image Generation
+
+Stores generated image bytes on disk keyed by a hash of everything that
+determines the output (backend, model, final prompt, aspect ratio, image size,
+variation index). Re-running an unchanged prompt returns the stored bytes
+immediately instead of paying for a fresh generation.
+
+The cache is bounded by total bytes and evicts least-recently-used entries
+(file mtime is bumped on every hit). Entries are written atomically, so
+several processes can share one cache directory.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / ".cache" / "generations"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+
+
+def cache_key(
+    backend: str,
+    model: str,
+    prompt: str,
+    aspect_ratio: Optional[str],
+    image_size: Optional[str],
+    variation: int,
+) -> str:
+    """Stable content hash of the inputs that determine a generated image."""
+    payload = json.dumps(
+        [backend, model, prompt, aspect_ratio, image_size, variation],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for this process."""
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes_served: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class GenerationCache:
+    """On-disk, size-bounded LRU cache of generated image bytes."""
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        enabled: bool = True,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None  # Lazily computed on first store
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached bytes for key, or None on a miss (or when disabled)."""
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            with self._lock:
+                self.stats.misses += 1
+            return None
+
+        try:
+            os.utime(path)  # Mark as most recently used
+        except OSError:
+            pass
+
+        with self._lock:
+            self.stats.hits += 1
+            self.stats.bytes_served += len(data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store bytes under key and evict old entries if over budget."""
+        if not self.enabled or not data or len(data) > self.max_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            existed = path.exists()
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+        except OSError:
+            return  # Caching is best-effort; never fail a generation over it
+
+        self._record_store(len(data), existed)
+
+    def put_file(self, key: str, source: Union[str, Path], size: Optional[int] = None) -> None:
+        """Store a file already on disk under key without reading it into memory."""
+        if not self.enabled:
+            return
+        source = Path(source)
+        try:
+            size = source.stat().st_size if size is None else size
+        except OSError:
+            return
+        if not size or size > self.max_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            existed = path.exists()
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            os.close(fd)
+            try:
+                shutil.copyfile(source, tmp)  # Kernel-side copy where the OS supports it
+                os.replace(tmp, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+        except OSError:
+            return
+
+        self._record_store(size, existed)
+
+    def _record_store(self, size: int, existed: bool) -> None:
+        with self._lock:
+            self.stats.stores += 1
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._entries())
+            elif not existed:
+                self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> List[Tuple[Path, int, float]]:
+        """(path, size, mtime) for every cache entry on disk."""
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith(".tmp-") or not entry.is_file():
+                    continue
+                st = entry.stat()
+                entries.append((Path(entry.path), st.st_size, st.st_mtime))
+        return entries
+
+    def _evict(self) -> None:
+        """Delete least-recently-used entries until under max_bytes. Caller holds the lock."""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+                self.stats.evictions += 1
+            except OSError:
+                pass
+        self._total_bytes = total
+
+    def summary(self) -> Dict[str, Any]:
+        """Process counters plus on-disk footprint."""
+        with self._lock:
+            entries = self._entries()
+            result = asdict(self.stats)
+        result["hit_rate"] = round(self.stats.hit_rate, 3)
+        result["entries"] = len(entries)
+        result["total_bytes"] = sum(size for _, size, _ in entries)
+        result["max_bytes"] = self.max_bytes
+        result["enabled"] = self.enabled
+        return result
+
+    def format_stats(self) -> str:
+        """One-line hit/miss summary for end-of-run logging."""
+        if not self.enabled:
+            return "disabled"
+        s = self.stats
+        return (f"{s.hits} hits / {s.misses} misses ({s.hit_rate:.0%}), "
+                f"{s.stores} stored, {s.evictions} evicted")
+
+
+_default_cache: Optional[GenerationCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> GenerationCache:
+    """Process-wide cache shared by every generation entry point."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            max_bytes = int(os.environ.get("EVOLEA_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+            _default_cache = GenerationCache(DEFAULT_CACHE_DIR, max_bytes=max_bytes)
+        return _default_cache
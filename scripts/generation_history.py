@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+EVOLEA Generation History
+=========================
+Append-only record of every generate-and-select run.
+
+Entries are appended as single JSON lines to .cache/history/generations.jsonl,
+which is rotated to generations-<timestamp>.jsonl once it exceeds a size limit,
+so nothing is ever rewritten or dropped. A small SQLite index (index.sqlite)
+maps timestamp, category, name and prompt hash to the segment and byte offset
+of each entry, so queries read only the matching lines.
+
+Appends and rotation take an exclusive file lock, so overlapping runs (batch
+jobs, the MCP server, several terminals) never interleave or lose entries.
+The index can always be rebuilt from the JSONL segments.
+
+Usage:
+    python scripts/generation_history.py list --category programs --limit 10
+    python scripts/generation_history.py list --name mini-garten-hero --since 2026-01-01
+    python scripts/generation_history.py list --prompt "children in garden" --json
+    python scripts/generation_history.py show 42
+    python scripts/generation_history.py stats
+    python scripts/generation_history.py rebuild
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import argparse
+import threading
+import contextlib
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_HISTORY_DIR = PROJECT_ROOT / ".cache" / "history"
+LEGACY_LOG_FILE = PROJECT_ROOT / "public" / "images" / "generated" / "generation_log.json"
+DEFAULT_SEGMENT_BYTES = 8 * 1024 * 1024  # Rotate the active segment past 8 MB
+
+ACTIVE_SEGMENT = "generations.jsonl"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    id          INTEGER PRIMARY KEY,
+    timestamp   TEXT NOT NULL,
+    category    TEXT,
+    name        TEXT,
+    prompt_hash TEXT,
+    segment     TEXT NOT NULL,
+    offset      INTEGER NOT NULL,
+    length      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_generations_timestamp ON generations(timestamp);
+CREATE INDEX IF NOT EXISTS idx_generations_category ON generations(category, timestamp);
+CREATE INDEX IF NOT EXISTS idx_generations_name ON generations(name, timestamp);
+CREATE INDEX IF NOT EXISTS idx_generations_prompt ON generations(prompt_hash, timestamp);
+"""
+
+
+def prompt_hash(prompt: str) -> str:
+    """Short stable hash of a prompt (whitespace-normalized)."""
+    return hashlib.sha256(" ".join(prompt.split()).encode("utf-8")).hexdigest()[:16]
+
+
+class GenerationHistory:
+    """Rotated JSONL history plus its SQLite query index."""
+
+    def __init__(
+        self,
+        history_dir: Path = DEFAULT_HISTORY_DIR,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        legacy_log: Path = LEGACY_LOG_FILE,
+    ):
+        self.history_dir = Path(history_dir)
+        self.segment_bytes = segment_bytes
+        self.legacy_log = Path(legacy_log)
+        self.index_path = self.history_dir / "index.sqlite"
+        self._lock = threading.Lock()
+
+    # -- locking & storage ---------------------------------------------------
+
+    @contextlib.contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Thread and cross-process exclusive section (flock where available)."""
+        self.history_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.history_dir / ".lock", "a") as lock_file:
+            try:
+                import fcntl
+            except ImportError:  # Windows: in-process lock only
+                yield
+                return
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _segments(self) -> List[Path]:
+        """All segments, oldest first (rotated names sort by timestamp; active is last)."""
+        rotated = sorted(self.history_dir.glob("generations-*.jsonl"))
+        active = self.history_dir / ACTIVE_SEGMENT
+        return rotated + ([active] if active.exists() else [])
+
+    def _rotate(self, conn: sqlite3.Connection) -> None:
+        """Move the active segment aside. Caller holds the exclusive lock."""
+        active = self.history_dir / ACTIVE_SEGMENT
+        rotated = f"generations-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.jsonl"
+        os.replace(active, self.history_dir / rotated)
+        conn.execute("UPDATE generations SET segment = ? WHERE segment = ?", (rotated, ACTIVE_SEGMENT))
+
+    # -- writing ------------------------------------------------------------
+
+    def append(self, entry: Dict[str, Any]) -> int:
+        """Append one generation record; returns its history id."""
+        entry = dict(entry)
+        entry.setdefault("timestamp", datetime.now().isoformat())
+        if entry.get("prompt") and not entry.get("prompt_hash"):
+            entry["prompt_hash"] = prompt_hash(entry["prompt"])
+
+        with self._exclusive():
+            conn = self._connect()
+            try:
+                with conn:
+                    fresh = conn.execute("SELECT COUNT(*) FROM generations").fetchone()[0] == 0
+                    if fresh and not self._segments() and self.legacy_log.exists():
+                        self._import_legacy(conn, self.legacy_log)
+                    return self._append_locked(conn, entry)
+            finally:
+                conn.close()
+
+    def _append_locked(self, conn: sqlite3.Connection, entry: Dict[str, Any]) -> int:
+        active = self.history_dir / ACTIVE_SEGMENT
+        if active.exists() and active.stat().st_size >= self.segment_bytes:
+            self._rotate(conn)
+
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(active, "ab") as f:
+            offset = f.tell()
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+        cursor = conn.execute(
+            "INSERT INTO generations (timestamp, category, name, prompt_hash, segment, offset, length)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (entry["timestamp"], entry.get("category"), entry.get("name"),
+             entry.get("prompt_hash"), ACTIVE_SEGMENT, offset, len(line)),
+        )
+        return cursor.lastrowid
+
+    def _import_legacy(self, conn: sqlite3.Connection, legacy_file: Path) -> int:
+        """Carry the entries of the old generation_log.json into the history once."""
+        try:
+            entries = json.loads(legacy_file.read_text(encoding="utf-8")).get("generations", [])
+        except (OSError, ValueError, AttributeError):
+            return 0
+        for entry in entries:
+            if entry.get("prompt"):
+                entry.setdefault("prompt_hash", prompt_hash(entry["prompt"]))
+            entry.setdefault("timestamp", datetime.now().isoformat())
+            self._append_locked(conn, entry)
+        return len(entries)
+
+    def rebuild_index(self) -> int:
+        """Recreate the index from the JSONL segments; returns the entry count."""
+        with self._exclusive():
+            if self.index_path.exists():
+                self.index_path.unlink()
+            conn = self._connect()
+            count = 0
+            try:
+                with conn:
+                    for segment in self._segments():
+                        offset = 0
+                        with open(segment, "rb") as f:
+                            for line in f:
+                                try:
+                                    entry = json.loads(line)
+                                except ValueError:
+                                    offset += len(line)
+                                    continue  # Torn write from a crash
+                                conn.execute(
+                                    "INSERT INTO generations (timestamp, category, name, prompt_hash, segment, offset, length)"
+                                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                    (entry.get("timestamp", ""), entry.get("category"), entry.get("name"),
+                                     entry.get("prompt_hash"), segment.name, offset, len(line)),
+                                )
+                                offset += len(line)
+                                count += 1
+            finally:
+                conn.close()
+            return count
+
+    # -- reading ------------------------------------------------------------
+
+    def _read(self, row: sqlite3.Row) -> Dict[str, Any]:
+        with open(self.history_dir / row["segment"], "rb") as f:
+            f.seek(row["offset"])
+            entry = json.loads(f.read(row["length"]))
+        entry["id"] = row["id"]
+        return entry
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        name: Optional[str] = None,
+        prompt: Optional[str] = None,
+        prompt_hash_value: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: Optional[int] = 20,
+    ) -> List[Dict[str, Any]]:
+        """Newest-first entries matching every given filter (ISO timestamps for since/until)."""
+        if not self.index_path.exists():
+            return []
+        clauses, params = [], []
+        for column, value in (("category", category), ("name", name),
+                              ("prompt_hash", prompt_hash(prompt) if prompt else prompt_hash_value)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        sql = "SELECT * FROM generations"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp DESC, id DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        with self._lock:
+            conn = self._connect()
+            try:
+                rows = conn.execute(sql, params).fetchall()
+            finally:
+                conn.close()
+        # A rotation between the query and the read would move segments: retry once
+        try:
+            return [self._read(row) for row in rows]
+        except (OSError, ValueError):
+            with self._lock:
+                conn = self._connect()
+                try:
+                    rows = conn.execute(sql, params).fetchall()
+                finally:
+                    conn.close()
+            return [self._read(row) for row in rows]
+
+    def get(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        """One entry by history id."""
+        if not self.index_path.exists():
+            return None
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM generations WHERE id = ?", (entry_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._read(row) if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry counts per category and segment footprint."""
+        segments = self._segments() if self.history_dir.exists() else []
+        result: Dict[str, Any] = {
+            "entries": 0,
+            "categories": {},
+            "segments": len(segments),
+            "bytes": sum(s.stat().st_size for s in segments),
+            "first": None,
+            "last": None,
+        }
+        if not self.index_path.exists():
+            return result
+        conn = self._connect()
+        try:
+            total, first, last = conn.execute(
+                "SELECT COUNT(*), MIN(timestamp), MAX(timestamp) FROM generations"
+            ).fetchone()
+            result.update(entries=total, first=first, last=last)
+            result["categories"] = dict(conn.execute(
+                "SELECT COALESCE(category, '-'), COUNT(*) FROM generations GROUP BY category ORDER BY 2 DESC"
+            ).fetchall())
+        finally:
+            conn.close()
+        return result
+
+
+_default_history: Optional[GenerationHistory] = None
+_default_lock = threading.Lock()
+
+
+def get_history(legacy_log: Optional[Path] = None) -> GenerationHistory:
+    """
+    Process-wide history (EVOLEA_HISTORY_DIR overrides the location). A new
+    history first imports legacy_log (default: LEGACY_LOG_FILE).
+    """
+    global _default_history
+    with _default_lock:
+        if _default_history is None:
+            history_dir = os.environ.get("EVOLEA_HISTORY_DIR") or DEFAULT_HISTORY_DIR
+            _default_history = GenerationHistory(Path(history_dir), legacy_log=legacy_log or LEGACY_LOG_FILE)
+        return _default_history
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def _format_entry(entry: Dict[str, Any]) -> str:
+    selected = entry.get("final") or entry.get("selected") or "-"
+    prompt = " ".join((entry.get("prompt") or "").split())
+    return (f"#{entry['id']:<5} {entry.get('timestamp', '')[:19]}  "
+            f"{entry.get('category') or '-':<11} {entry.get('name') or '-':<24} "
+            f"{len(entry.get('generated') or [])} img  {Path(selected).name if selected != '-' else '-'}\n"
+            f"       {prompt[:100]}{'...' if len(prompt) > 100 else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Query the EVOLEA generation history",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__[__doc__.index("Usage:"):],
+    )
+    sub = parser.add_subparsers(dest="command")
+
+    list_cmd = sub.add_parser("list", help="List matching generations, newest first")
+    list_cmd.add_argument("--category", "-c", help="Category (programs, blog, ...)")
+    list_cmd.add_argument("--name", "-n", help="Output name")
+    list_cmd.add_argument("--prompt", "-p", help="Exact prompt text (matched by hash)")
+    list_cmd.add_argument("--prompt-hash", help="Prompt hash as stored in entries")
+    list_cmd.add_argument("--since", help="ISO date/time, inclusive (e.g. 2026-01-01)")
+    list_cmd.add_argument("--until", help="ISO date/time, exclusive")
+    list_cmd.add_argument("--limit", type=int, default=20, help="Max entries (default: 20, 0 = all)")
+    list_cmd.add_argument("--json", action="store_true", help="Print entries as JSON")
+
+    show_cmd = sub.add_parser("show", help="Print one entry as JSON")
+    show_cmd.add_argument("id", type=int)
+
+    sub.add_parser("stats", help="Entry counts and storage footprint")
+    sub.add_parser("rebuild", help="Rebuild the index from the JSONL segments")
+
+    args = parser.parse_args()
+    history = get_history()
+
+    if args.command == "list":
+        entries = history.query(
+            category=args.category,
+            name=args.name,
+            prompt=args.prompt,
+            prompt_hash_value=args.prompt_hash,
+            since=args.since,
+            until=args.until,
+            limit=args.limit,
+        )
+        if args.json:
+            print(json.dumps(entries, indent=2, ensure_ascii=False))
+        else:
+            for entry in entries:
+                print(_format_entry(entry))
+            print(f"\n{len(entries)} entries")
+    elif args.command == "show":
+        entry = history.get(args.id)
+        if entry is None:
+            print(f"No entry #{args.id}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(entry, indent=2, ensure_ascii=False))
+    elif args.command == "stats":
+        print(json.dumps(history.stats(), indent=2))
+    elif args.command == "rebuild":
+        print(f"Indexed {history.rebuild_index()} entries")
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
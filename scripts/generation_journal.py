@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Crash-Resumable Generation Journal for EVOLEA Image Generation
+
+Each run appends one JSON line per completed step (a generated variation, an
+evaluation, a finalized image) to .cache/journal/<run-id>.jsonl, recording
+produced files by content hash. Re-opening the journal with the run id
+(`--resume <run-id>`) lets a run skip every step whose output still exists
+with the recorded hash and continue from the first missing one.
+
+Lines are flushed and fsynced as they are written; a torn last line from a
+crash is ignored on load. Journals of finished runs are pruned once they are
+a week old (prune_journals); unfinished ones are kept so they stay resumable.
+"""
+
+import hashlib
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+JOURNAL_DIR = Path(__file__).parent.parent / ".cache" / "journal"
+# Finished runs' journals older than this are deleted by prune_journals()
+KEEP_FINISHED_DAYS = 7
+
+
+def new_run_id(label: str) -> str:
+    """Readable, unique run id: <label>-<timestamp>-<random>."""
+    slug = re.sub(r"[^a-z0-9]+", "-", label.lower()).strip("-")[:40] or "run"
+    return f"{slug}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(2)}"
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    """Streamed sha256 of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class GenerationJournal:
+    """Append-only JSONL record of the completed steps of one run."""
+
+    def __init__(self, run_id: str, journal_dir: Path = JOURNAL_DIR):
+        self.run_id = run_id
+        self.path = Path(journal_dir) / f"{run_id}.jsonl"
+        self.kind: Optional[str] = None
+        self.params: Dict[str, Any] = {}
+        self.finished = False
+        self._steps: Dict[str, Dict[str, Any]] = {}
+        self._digests: Dict[str, str] = {}  # path -> sha256 of files this run produced
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(
+        cls,
+        kind: str,
+        params: Dict[str, Any],
+        run_id: Optional[str] = None,
+        journal_dir: Path = JOURNAL_DIR,
+    ) -> "GenerationJournal":
+        """Start a new run journal."""
+        journal = cls(run_id or new_run_id(params.get("name") or kind), journal_dir)
+        journal.path.parent.mkdir(parents=True, exist_ok=True)
+        journal.kind = kind
+        journal.params = params
+        journal._append({"event": "start", "kind": kind, "params": params})
+        return journal
+
+    @classmethod
+    def resume(cls, run_id: str, kind: Optional[str] = None, journal_dir: Path = JOURNAL_DIR) -> "GenerationJournal":
+        """Re-open an existing run journal; raises ValueError if it is missing or of another kind."""
+        journal = cls(run_id, journal_dir)
+        if not journal.path.exists():
+            raise ValueError(f"No journal for run '{run_id}' in {journal.path.parent}")
+        journal._load()
+        if kind and journal.kind != kind:
+            raise ValueError(f"Run '{run_id}' is a '{journal.kind}' run, not '{kind}'")
+        journal._append({"event": "resume"})
+        return journal
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn write from a crash
+                event = entry.get("event")
+                if event == "start":
+                    self.kind = entry.get("kind")
+                    self.params = entry.get("params", {})
+                elif event == "step":
+                    self._remember(entry)
+                elif event == "done":
+                    self.finished = True
+
+    def _remember(self, entry: Dict[str, Any]) -> None:
+        self._steps[entry["step"]] = entry
+        if entry.get("path") and entry.get("sha256"):
+            self._digests[entry["path"]] = entry["sha256"]
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        entry = {"time": datetime.now().isoformat(), **entry}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    # -- steps ---------------------------------------------------------------
+
+    def record(self, step: str, path: Optional[Path] = None, sha256: Optional[str] = None, **data) -> None:
+        """Mark step complete, optionally with the file it produced (hashed if sha256 is not given)."""
+        entry: Dict[str, Any] = {"event": "step", "step": step, **data}
+        if path is not None:
+            entry["path"] = str(path)
+            entry["sha256"] = sha256 or file_sha256(path)
+        with self._lock:
+            self._remember(entry)
+        self._append(entry)
+
+    def get(self, step: str) -> Optional[Dict[str, Any]]:
+        """Latest record for step, if it was completed."""
+        with self._lock:
+            return self._steps.get(step)
+
+    def completed_file(self, step: str) -> Optional[Path]:
+        """Path produced by step if it still exists with its recorded hash."""
+        entry = self.get(step)
+        if not entry or not entry.get("path"):
+            return None
+        path = Path(entry["path"])
+        try:
+            if file_sha256(path) != entry.get("sha256"):
+                return None
+        except OSError:
+            return None
+        return path
+
+    def digest(self, path: Union[str, Path]) -> Optional[str]:
+        """Recorded sha256 of a file this run produced (no re-read)."""
+        with self._lock:
+            return self._digests.get(str(path))
+
+    def finish(self) -> None:
+        """Mark the run complete."""
+        self.finished = True
+        self._append({"event": "done"})
+
+
+def _last_event(path: Path) -> Optional[str]:
+    """Event of the last complete line of a journal file."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        lines = f.read().splitlines()
+    for line in reversed(lines):
+        try:
+            return json.loads(line).get("event")
+        except ValueError:
+            continue  # Torn write (or the 4 KB window cut the line)
+    return None
+
+
+def prune_journals(journal_dir: Path = JOURNAL_DIR, keep_days: float = KEEP_FINISHED_DAYS) -> int:
+    """Delete journals of finished runs last written over keep_days ago; returns how many."""
+    cutoff = time.time() - keep_days * 86400
+    removed = 0
+    for path in Path(journal_dir).glob("*.jsonl"):
+        try:
+            if path.stat().st_mtime < cutoff and _last_event(path) == "done":
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue  # Removed by a concurrent prune
+    return removed
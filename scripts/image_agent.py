@@ -37,6 +37,7 @@ from error_handling import (
     ErrorLogger,
     classify_error,
 )
+from api_clients import get_gemini_client
 
 # ============================================================================
 # EVOLEA BRAND KNOWLEDGE BASE
@@ -308,10 +309,9 @@ def load_api_key() -> Optional[str]:
 
 
 def get_client(api_key: str):
-    """Initialize the Google GenAI client."""
+    """Get the process-wide pooled Google GenAI client for api_key."""
     try:
-        from google import genai
-        return genai.Client(api_key=api_key)
+        return get_gemini_client(api_key)
     except ImportError:
         print("\nERROR: google-genai package not installed")
         print("Please run: pip install google-genai pillow")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Memory-Bounded Comparison Grid Renderer for EVOLEA Image Generation
+
+Lays out any number of images in a labelled grid whose width is capped, so a
+review grid of 4K candidates costs about one reduced image plus the (small)
+output canvas in memory instead of every full-size image at once.
+
+Each image is opened lazily (only its header is read for layout), decoded at
+reduced size where the format allows it (Image.draft for JPEG, Image.reduce
+for everything else), pasted into its cell and released before the next one
+is opened.
+"""
+
+import math
+from pathlib import Path
+from typing import Optional, Sequence, Tuple, Union
+
+from PIL import Image, ImageDraw, ImageFont
+
+DEFAULT_MAX_WIDTH = 2400  # Output grid width cap in pixels
+BACKGROUND = "white"
+DIVIDER_COLOR = "#CCCCCC"
+LABEL_COLOR = "#333333"
+
+
+def _image_size(path: Path) -> Tuple[int, int]:
+    """Pixel size from the image header, without decoding the pixel data."""
+    with Image.open(path) as img:
+        return img.size
+
+
+def _load_fitted(path: Path, box: Tuple[int, int]) -> Image.Image:
+    """Decode path at the smallest size that still covers box, then fit it into box."""
+    with Image.open(path) as src:
+        # JPEG: let the decoder scale by 1/2, 1/4 or 1/8 (never below box)
+        src.draft("RGB", box)
+        img = src
+        # reduce() cannot handle palette or 1-bit images, so convert first
+        if img.mode not in ("RGB", "RGBA", "L"):
+            img = img.convert("RGBA" if img.mode in ("LA", "PA") or "transparency" in img.info else "RGB")
+        # Other formats: integer box-filter reduction straight after decoding
+        factor = min(img.width // box[0], img.height // box[1])
+        img = img.reduce(factor) if factor >= 2 else img.copy()
+    img.thumbnail(box, Image.Resampling.LANCZOS)
+    return img
+
+
+def _font(size: int):
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except OSError:
+        try:
+            return ImageFont.load_default(size)  # Pillow >= 10.1
+        except TypeError:
+            return ImageFont.load_default()
+
+
+def render_grid(
+    image_paths: Sequence[Union[str, Path]],
+    output_path: Union[str, Path],
+    cols: Optional[int] = None,
+    max_width: int = DEFAULT_MAX_WIDTH,
+    labels: Optional[Sequence[str]] = None,
+    label_colors: Optional[Sequence[str]] = None,
+    padding: int = 10,
+    label_height: int = 30,
+    dividers: bool = False,
+) -> Path:
+    """
+    Render image_paths into a grid image at output_path.
+
+    cols defaults to a near-square layout. Cells share the aspect of the
+    largest image and shrink so the whole grid is at most max_width wide
+    (images are never upscaled). labels, if given, are drawn above each cell;
+    dividers draws vertical lines between columns.
+    """
+    paths = [Path(p) for p in image_paths]
+    if not paths:
+        raise ValueError("render_grid needs at least one image")
+
+    sizes = [_image_size(p) for p in paths]
+    max_w = max(w for w, _ in sizes)
+    max_h = max(h for _, h in sizes)
+
+    cols = max(1, min(cols or math.ceil(math.sqrt(len(paths))), len(paths)))
+    rows = math.ceil(len(paths) / cols)
+    label_h = label_height if labels else 0
+
+    cell_w = min(max_w, max(1, (max_width - (cols + 1) * padding) // cols))
+    cell_h = max(1, round(max_h * cell_w / max_w))
+
+    grid_w = cols * cell_w + (cols + 1) * padding
+    grid_h = rows * (cell_h + label_h) + (rows + 1) * padding
+    grid = Image.new("RGB", (grid_w, grid_h), BACKGROUND)
+    draw = ImageDraw.Draw(grid)
+    font = None
+    if labels:
+        # Shrink labels to fit narrow cells (~0.6em average glyph width)
+        longest = max(len(label) for label in labels) or 1
+        font = _font(max(8, min(int(label_h * 0.7), int(cell_w / (0.6 * longest)))))
+
+    for idx, path in enumerate(paths):
+        row, col = divmod(idx, cols)
+        x = padding + col * (cell_w + padding)
+        y = padding + row * (cell_h + label_h + padding)
+
+        if labels and idx < len(labels):
+            color = label_colors[idx % len(label_colors)] if label_colors else LABEL_COLOR
+            left, top, right, bottom = draw.textbbox((0, 0), labels[idx], font=font)
+            text_x = x + (cell_w - (right - left)) // 2
+            text_y = y + (label_h - (bottom - top)) // 2 - top
+            draw.text((text_x, text_y), labels[idx], fill=color, font=font)
+
+        img = _load_fitted(path, (cell_w, cell_h))
+        try:
+            # Center in cell
+            paste_x = x + (cell_w - img.width) // 2
+            paste_y = y + label_h + (cell_h - img.height) // 2
+            grid.paste(img, (paste_x, paste_y), img if img.mode == "RGBA" else None)
+        finally:
+            img.close()
+
+    if dividers:
+        for col in range(1, cols):
+            divider_x = col * (cell_w + padding) + padding // 2
+            draw.line([(divider_x, padding), (divider_x, grid_h - padding)], fill=DIVIDER_COLOR, width=2)
+
+    output_path = Path(output_path)
+    grid.save(output_path)
+    grid.close()
+    return output_path
@@ -25,6 +25,7 @@ import sys
 import json
 import base64
 import asyncio
+import contextlib
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, List, Dict, Any
@@ -52,11 +53,12 @@ load_dotenv(Path(__file__).parent.parent / ".env")
 # Import from generate_image.py
 from generate_image import (
     CONFIG,
-    generate_images,
+    agenerate_images,
     enhance_prompt,
     create_comparison_grid,
     load_learnings,
     apply_learnings_to_prompt,
+    IMAGE_SUFFIXES,
 )
 
 # Initialize MCP server
@@ -466,24 +468,15 @@ async def handle_generate_image(args: Dict[str, Any]) -> List[TextContent]:
         # Enhance prompt with brand guidelines
         enhanced_prompt = enhance_prompt(prompt)
 
-        # Redirect stdout to stderr during generation (MCP requires clean stdout)
-        import io
-        import contextlib
-        old_stdout = sys.stdout
-        sys.stdout = sys.stderr  # Redirect prints to stderr
-
-        try:
-            # Generate image
-            image_paths = generate_images(
-                prompt=enhanced_prompt,
-                output_dir=output_dir,
-                base_name=name,
-                count=1,
-                aspect_ratio=aspect_ratio,
-                backend="auto"
-            )
-        finally:
-            sys.stdout = old_stdout  # Restore stdout
+        # Generate image (awaited natively - the event loop stays free for other calls)
+        image_paths = await agenerate_images(
+            prompt=enhanced_prompt,
+            output_dir=output_dir,
+            base_name=name,
+            count=1,
+            aspect_ratio=aspect_ratio,
+            backend="auto"
+        )
 
         if image_paths:
             result = f"""Image generated successfully!
@@ -531,38 +524,34 @@ async def handle_generate_ab_comparison(args: Dict[str, Any]) -> List[TextConten
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-        # Redirect stdout to stderr during generation (MCP requires clean stdout)
-        old_stdout = sys.stdout
-        sys.stdout = sys.stderr
+        # Option A: base prompt
+        prompt_a = enhance_prompt(prompt)
 
-        try:
-            # Generate Option A
-            prompt_a = enhance_prompt(prompt)
-            images_a = generate_images(
+        # Option B: with variation
+        if variation_b:
+            prompt_b = enhance_prompt(f"{prompt}\n\nStyle variation: {variation_b}")
+        else:
+            prompt_b = enhance_prompt(f"{prompt}\n\nCreate a distinct visual interpretation with different composition or color emphasis.")
+
+        # Generate both options concurrently
+        images_a, images_b = await asyncio.gather(
+            agenerate_images(
                 prompt=prompt_a,
                 output_dir=output_dir,
                 base_name=f"{name}_A",
                 count=1,
                 aspect_ratio="16:9",
                 backend="auto"
-            )
-
-            # Generate Option B with variation
-            if variation_b:
-                prompt_b = enhance_prompt(f"{prompt}\n\nStyle variation: {variation_b}")
-            else:
-                prompt_b = enhance_prompt(f"{prompt}\n\nCreate a distinct visual interpretation with different composition or color emphasis.")
-
-            images_b = generate_images(
+            ),
+            agenerate_images(
                 prompt=prompt_b,
                 output_dir=output_dir,
                 base_name=f"{name}_B",
                 count=1,
                 aspect_ratio="16:9",
                 backend="auto"
-            )
-        finally:
-            sys.stdout = old_stdout
+            ),
+        )
 
         if not images_a or not images_b:
             return [TextContent(type="text", text="Error: Failed to generate both options")]
@@ -633,8 +622,18 @@ async def handle_list_images(args: Dict[str, Any]) -> List[TextContent]:
     if not image_dir.exists():
         return [TextContent(type="text", text=f"No images found in category: {category}")]
 
-    # Find all PNG files, sorted by modification time
-    images = sorted(image_dir.glob("**/*.png"), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]
+    # Find all image files (Gemini may return JPEG/WebP), sorted by modification time.
+    # Hidden directories are skipped: they hold in-flight hedge legs (.hedge-*)
+    suffixes = set(IMAGE_SUFFIXES.values()) | {".jpeg"}
+    images = sorted(
+        (
+            p for p in image_dir.glob("**/*")
+            if p.suffix.lower() in suffixes
+            and not any(part.startswith(".") for part in p.relative_to(image_dir).parts)
+        ),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )[:limit]
 
     if not images:
         return [TextContent(type="text", text=f"No images found in {category}")]
@@ -693,7 +692,12 @@ async def handle_get_template(args: Dict[str, Any]) -> List[TextContent]:
 async def main():
     """Run the MCP server."""
     async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, server.create_initialization_options())
+        # The transport has its own handle on stdout; any stray print() from
+        # here on goes to stderr so it cannot corrupt the JSON-RPC stream.
+        # Done once for the process: swapping it per request races between
+        # concurrent tool calls.
+        with contextlib.redirect_stdout(sys.stderr):
+            await server.run(read_stream, write_stream, server.create_initialization_options())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Cross-Process Request Rate Limiter for EVOLEA Image Generation
+
+Paces requests before they are sent, with one token bucket per route
+("gemini/<model>", "replicate/<model>", "anthropic/<model>" - the same keys as
+backend_router). Bucket state lives in one small JSON file that is only read
+and written under an exclusive file lock, so every thread and every process on
+the machine (generate-asset.py, refine-logo.py, batch runs, the MCP server)
+draws from the same buckets and together they stay under the quota.
+
+A request takes a token on credit and waits until its turn, so queued callers
+start in order. When a request is rate limited anyway, the route's rate is
+halved, the bucket is emptied and nothing is sent until the retry_after hint
+has passed; the rate then climbs back to its configured limit over a few
+minutes.
+
+Limits are requests per minute per route, configured by backend prefix or by
+exact route (EVOLEA_RATE_LIMITS="gemini=10,anthropic/claude-sonnet-4-20250514=40";
+0 turns limiting off for that route).
+
+Usage:
+    python scripts/rate_limiter.py status
+    python scripts/rate_limiter.py reset                 # forget all penalties
+    python scripts/rate_limiter.py reset gemini/gemini-3-pro-image-preview
+"""
+
+import os
+import json
+import time
+import asyncio
+import argparse
+import threading
+import contextlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from error_handling import ErrorCategory, classify_error
+
+DEFAULT_STATE_FILE = Path(__file__).parent.parent / ".cache" / "rate_limits.json"
+
+# Requests per minute by backend (prefix of the route key)
+DEFAULT_LIMITS = {
+    "gemini": 20,
+    "replicate": 300,
+    "anthropic": 50,
+}
+# Bucket size: this many seconds' worth of requests may go out back to back
+BURST_SECONDS = 6.0
+# A penalized rate recovers linearly to its limit within this many seconds
+RECOVERY_SECONDS = 300.0
+# A penalized rate never drops below this fraction of its limit
+MIN_RATE_FRACTION = 1 / 16
+
+
+def _parse_limits(spec: str) -> Dict[str, float]:
+    limits: Dict[str, float] = {}
+    for item in spec.split(","):
+        route, _, value = item.partition("=")
+        try:
+            limits[route.strip()] = float(value)
+        except ValueError:
+            continue
+    return limits
+
+
+class RateLimiter:
+    """Token buckets per route, shared through a locked state file."""
+
+    def __init__(self, state_file: Path = DEFAULT_STATE_FILE, limits: Optional[Dict[str, float]] = None):
+        self.state_file = Path(state_file)
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self._lock = threading.Lock()
+        self.waited = 0.0  # Seconds this process spent waiting for tokens
+        self.penalties = 0
+
+    def limit(self, route: str) -> float:
+        """Requests per minute for route (0 = unlimited)."""
+        if route in self.limits:
+            return self.limits[route]
+        return self.limits.get(route.split("/", 1)[0], 0)
+
+    # -- locked state --------------------------------------------------------
+
+    @contextlib.contextmanager
+    def _state(self) -> Iterator[Dict[str, Dict[str, float]]]:
+        """All buckets, read and written back under a thread and cross-process lock."""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.state_file, "a+", encoding="utf-8") as f:
+            try:
+                import fcntl
+            except ImportError:  # Windows: in-process lock only
+                fcntl = None
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}  # Torn write from a killed process: start fresh
+                yield state
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f, separators=(",", ":"))
+                f.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _bucket(self, state: Dict[str, Dict[str, float]], route: str, now: float) -> Dict[str, float]:
+        """route's bucket, refilled (and its rate recovered) up to now."""
+        full_rate = self.limit(route) / 60.0
+        capacity = max(1.0, full_rate * BURST_SECONDS)
+        bucket = state.setdefault(route, {"tokens": capacity, "rate": full_rate, "updated": now, "blocked_until": 0.0})
+        elapsed = now - bucket["updated"]
+        if elapsed > 0:
+            bucket["rate"] = min(full_rate, bucket["rate"] + full_rate * elapsed / RECOVERY_SECONDS)
+            bucket["tokens"] = min(capacity, bucket["tokens"] + elapsed * bucket["rate"])
+            bucket["updated"] = now
+        return bucket
+
+    def _reserve(self, route: str) -> float:
+        """Take a token (on credit if need be); seconds until it may be used."""
+        now = time.time()
+        with self._state() as state:
+            bucket = self._bucket(state, route, now)
+            bucket["tokens"] -= 1
+            ready = max(now, bucket["blocked_until"], bucket["updated"])
+            if bucket["tokens"] < 0:
+                ready += -bucket["tokens"] / bucket["rate"]
+            return ready - now
+
+    def _blocked_for(self, route: str) -> float:
+        """Seconds until route's current penalty (if any) ends."""
+        now = time.time()
+        with self._state() as state:
+            bucket = state.get(route)
+            return max(0.0, bucket["blocked_until"] - now) if bucket else 0.0
+
+    # -- public API ----------------------------------------------------------
+
+    def acquire(self, route: str) -> float:
+        """Block until a request to route may be sent; returns seconds waited."""
+        if not self.limit(route):
+            return 0.0
+        waited = 0.0
+        wait = self._reserve(route)
+        while wait > 0:
+            time.sleep(wait)
+            waited += wait
+            wait = self._blocked_for(route)  # A 429 seen meanwhile pushes the start back
+        self.waited += waited
+        return waited
+
+    async def aacquire(self, route: str) -> float:
+        """acquire() for coroutines: the wait never blocks the event loop."""
+        if not self.limit(route):
+            return 0.0
+        waited = 0.0
+        wait = await asyncio.to_thread(self._reserve, route)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+            wait = await asyncio.to_thread(self._blocked_for, route)
+        self.waited += waited
+        return waited
+
+    def penalize(self, route: str, retry_after: Optional[float] = None) -> None:
+        """Shrink route's bucket after a rate-limit response."""
+        full_rate = self.limit(route) / 60.0
+        if not full_rate:
+            return
+        now = time.time()
+        with self._state() as state:
+            bucket = self._bucket(state, route, now)
+            bucket["rate"] = max(full_rate * MIN_RATE_FRACTION, bucket["rate"] / 2)
+            bucket["tokens"] = min(bucket["tokens"], 0.0)
+            if retry_after:
+                bucket["blocked_until"] = max(bucket["blocked_until"], now + retry_after)
+                # No refill while blocked: the bucket starts empty when the block ends
+                bucket["updated"] = bucket["blocked_until"]
+        self.penalties += 1
+
+    def observe(self, route: str, error: BaseException) -> None:
+        """Feed a failed request's error back; rate limits shrink the bucket."""
+        info = classify_error(error)
+        if info.category == ErrorCategory.RATE_LIMIT:
+            self.penalize(route, info.retry_after)
+
+    def reset(self, route: Optional[str] = None) -> None:
+        """Forget the state of route (or of every route)."""
+        with self._state() as state:
+            if route is None:
+                state.clear()
+            else:
+                state.pop(route, None)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Current state of every known route."""
+        now = time.time()
+        with self._state() as state:
+            result = {}
+            for route in sorted(state):
+                bucket = self._bucket(state, route, now)
+                result[route] = {
+                    "limit_per_minute": self.limit(route),
+                    "rate_per_minute": round(bucket["rate"] * 60, 2),
+                    "tokens": round(bucket["tokens"], 2),
+                    "blocked_for": round(max(0.0, bucket["blocked_until"] - now), 1),
+                }
+            return result
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Process-wide limiter (EVOLEA_RATE_LIMIT_FILE overrides the state file,
+    EVOLEA_RATE_LIMITS the per-minute limits).
+    """
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            state_file = os.environ.get("EVOLEA_RATE_LIMIT_FILE") or DEFAULT_STATE_FILE
+            limits = _parse_limits(os.environ.get("EVOLEA_RATE_LIMITS", ""))
+            _default_limiter = RateLimiter(Path(state_file), limits)
+        return _default_limiter
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Inspect or reset the shared request rate limiter",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__[__doc__.index("Usage:"):],
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Show every route's bucket")
+    reset = sub.add_parser("reset", help="Forget bucket state and penalties")
+    reset.add_argument("route", nargs="?", help="Only this route (default: all)")
+    args = parser.parse_args()
+
+    limiter = get_rate_limiter()
+    if args.command == "reset":
+        limiter.reset(args.route)
+        print(f"Reset {args.route or 'all routes'}")
+        return
+
+    status = limiter.status()
+    if not status:
+        print("No requests recorded yet")
+        return
+    print(f"{'route':<48} {'limit/min':>9} {'rate/min':>9} {'tokens':>7} {'blocked':>8}")
+    for route, s in status.items():
+        blocked = f"{s['blocked_for']:.0f}s" if s["blocked_for"] else "-"
+        print(f"{route:<48} {s['limit_per_minute']:>9g} {s['rate_per_minute']:>9g} {s['tokens']:>7g} {blocked:>8}")
+
+
+if __name__ == "__main__":
+    main()
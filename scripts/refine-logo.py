@@ -31,11 +31,15 @@ from error_handling import (
     ErrorSeverity,
     ErrorLogger,
     classify_error,
+    get_circuit_breaker,
+    get_retry_budget,
     retry_with_backoff,
     validate_image_data,
     fix_image_data,
     is_media_type_error,
 )
+from api_clients import get_gemini_client
+from rate_limiter import get_rate_limiter
 
 try:
     from google import genai
@@ -150,7 +154,8 @@ def setup_client():
         print("  Mac/Linux: export GOOGLE_API_KEY=your-key-here")
         sys.exit(1)
 
-    return genai.Client(api_key=API_KEY)
+    # Pooled client: "all" runs reuse one keep-alive connection pool
+    return get_gemini_client(API_KEY)
 
 
 def log_error(error_type: str, error_details: dict, prompt_name: str):
@@ -258,9 +263,16 @@ def generate_logo(client, prompt_name: str, custom_prompt: str = None) -> Operat
         print(f"\n  Retry {attempt}: {error.message}")
         print(f"  Waiting {delay:.1f}s before next attempt...")
 
+    route = f"gemini/{MODEL}"
+    limiter = get_rate_limiter()
+
     def single_generation_attempt() -> OperationResult:
         """Single attempt at logo generation."""
         try:
+            # Shared with every other generating process on this machine
+            waited = limiter.acquire(route)
+            if waited >= 1:
+                print(f"  Paced {waited:.1f}s to stay under the {route} rate limit")
             response = client.models.generate_content(
                 model=MODEL,
                 contents=prompt,
@@ -362,6 +374,7 @@ def generate_logo(client, prompt_name: str, custom_prompt: str = None) -> Operat
             ))
 
         except Exception as e:
+            limiter.observe(route, e)
             error_info = classify_error(e)
             if is_media_type_error(e):
                 error_info.details["suggestion"] = "Try different aspect ratio or size"
@@ -378,7 +391,9 @@ def generate_logo(client, prompt_name: str, custom_prompt: str = None) -> Operat
         initial_delay=RETRY_DELAY_SECONDS,
         max_delay=60.0,
         backoff_factor=2.0,
-        on_retry=on_retry
+        on_retry=on_retry,
+        budget=get_retry_budget(),
+        breaker=get_circuit_breaker(route)
     )
 
     # Handle final result
@@ -417,7 +432,12 @@ def generate_logo(client, prompt_name: str, custom_prompt: str = None) -> Operat
         if result.error:
             error_logger.log(result.error, f"generate_logo:{prompt_name}")
 
-        print(f"\n  FAILED after all attempts")
+        if result.metadata.get("circuit_open"):
+            print(f"\n  FAILED FAST - {route} keeps failing, circuit open (next probe in {result.error.retry_after}s)")
+        elif result.metadata.get("retry_budget_exhausted"):
+            print(f"\n  FAILED - retry budget spent (too many failures across this run), not retrying")
+        else:
+            print(f"\n  FAILED after all attempts")
         print(f"  Error: {result.error.message if result.error else 'Unknown error'}")
         print(f"  Check error logs in: {ERROR_LOG_DIR}")
 
@@ -0,0 +1,44 @@
+"""
+Shared fixtures for the image-generation script tests.
+
+The scripts are flat modules that import each other by name, so the scripts
+directory goes on sys.path here (as bench_*.py do). Every test gets its own
+state files: the process-wide singletons are reset and pointed at tmp_path,
+so nothing touches .cache/ or public/ and no test sees another's breakers,
+budgets or rate-limit buckets.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import backend_router  # noqa: E402
+import error_handling  # noqa: E402
+import evaluation_cache  # noqa: E402
+import generation_cache  # noqa: E402
+import generation_history  # noqa: E402
+import rate_limiter  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    """Point every process-wide store at tmp_path and start from fresh singletons."""
+    monkeypatch.setenv("EVOLEA_RATE_LIMIT_FILE", str(tmp_path / "rate_limits.json"))
+    monkeypatch.setenv("EVOLEA_EVAL_CACHE_DIR", str(tmp_path / "evaluations"))
+    monkeypatch.setenv("EVOLEA_HISTORY_DIR", str(tmp_path / "history"))
+    monkeypatch.setenv("EVOLEA_ROUTER_STATE", str(tmp_path / "backend_router.json"))
+    monkeypatch.delenv("EVOLEA_RETRY_BUDGET", raising=False)
+    monkeypatch.delenv("EVOLEA_RATE_LIMITS", raising=False)
+
+    monkeypatch.setattr(rate_limiter, "_default_limiter", None)
+    monkeypatch.setattr(evaluation_cache, "_default_cache", None)
+    monkeypatch.setattr(generation_cache, "_default_cache", None)
+    monkeypatch.setattr(generation_cache, "DEFAULT_CACHE_DIR", tmp_path / "generations")
+    monkeypatch.setattr(generation_history, "_default_history", None)
+    monkeypatch.setattr(backend_router, "_default_router", None)
+    monkeypatch.setattr(error_handling, "_default_budget", None)
+    monkeypatch.setattr(error_handling, "_breakers", {})
+    return tmp_path
@@ -0,0 +1,52 @@
+"""Manifest loading in batch_generate."""
+
+import json
+
+import pytest
+
+from batch_generate import BatchJob, load_manifest
+
+
+def write(tmp_path, data):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return path
+
+
+def test_defaults_apply_to_every_job(tmp_path):
+    path = write(tmp_path, {
+        "defaults": {"category": "team", "count": 2},
+        "jobs": [{"name": "a", "prompt": "p"}, {"name": "b", "prompt": "q", "count": 6, "size": None}],
+    })
+    assert load_manifest(path) == [
+        BatchJob(name="a", prompt="p", category="team", count=2),
+        BatchJob(name="b", prompt="q", category="team", count=6),
+    ]
+
+
+@pytest.mark.parametrize("entry, message", [
+    ({"count": "4"}, "'count' must be int"),
+    ({"count": True}, "'count' must be int"),
+    ({"count": 0}, "at least 1"),
+    ({"count": 2.0}, "'count' must be int"),
+    ({"auto_select": "yes"}, "'auto_select' must be bool"),
+    ({"size": 2}, "'size' must be str or null"),
+    ({"name": ["a"]}, "'name' must be str"),
+    ({"seed": 1}, "unknown field"),
+])
+def test_wrong_types_are_rejected_at_load(tmp_path, entry, message):
+    path = write(tmp_path, [{"name": "a", "prompt": "p", **entry}])
+    with pytest.raises(ValueError, match=message):
+        load_manifest(path)
+
+
+def test_wrong_type_in_defaults_names_the_job(tmp_path):
+    path = write(tmp_path, {"defaults": {"count": "4"}, "jobs": [{"name": "a", "prompt": "p"}]})
+    with pytest.raises(ValueError, match="Job 1: 'count'"):
+        load_manifest(path)
+
+
+def test_duplicate_names_are_rejected(tmp_path):
+    path = write(tmp_path, [{"name": "a", "prompt": "p"}, {"name": "a", "prompt": "q"}])
+    with pytest.raises(ValueError, match="duplicate name"):
+        load_manifest(path)
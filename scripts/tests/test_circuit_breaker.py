@@ -0,0 +1,157 @@
+"""Circuit breakers, and how requests inside BackendRouter.timed() are admitted."""
+
+import asyncio
+import time
+
+import pytest
+
+import error_handling
+from backend_router import get_router, route_request
+from error_handling import CircuitBreaker, CircuitOpenError, OperationResult, aretry_with_backoff
+
+ROUTE = "gemini/test-model"
+SERVER_ERROR = "Error code: 503 - Service Unavailable"
+
+
+@pytest.fixture
+def breaker():
+    """A breaker for ROUTE that opens on one failure, for 50ms."""
+    breaker = CircuitBreaker(ROUTE, min_calls=1, open_seconds=0.05)
+    error_handling._breakers[ROUTE] = breaker
+    return breaker
+
+
+def half_open(breaker):
+    breaker.record(error_handling.ErrorCategory.SERVER)
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(breaker.retry_after() + 0.01)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+# -- breaker -----------------------------------------------------------------
+
+def test_opens_on_failures_and_closes_after_a_good_probe(breaker):
+    assert breaker.admit() == CircuitBreaker.CLOSED
+    half_open(breaker)
+    assert breaker.admit() == CircuitBreaker.HALF_OPEN
+    assert breaker.admit() is None  # Only one probe at a time
+    breaker.record(None)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.rejected == 1
+
+
+def test_failed_probe_doubles_the_open_period(breaker):
+    half_open(breaker)
+    assert breaker.allow()
+    breaker.record(error_handling.ErrorCategory.TIMEOUT)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.retry_after() > 0.05
+
+
+def test_released_probe_can_be_taken_again(breaker):
+    half_open(breaker)
+    assert breaker.admit() == CircuitBreaker.HALF_OPEN
+    breaker.release()
+    assert breaker.admit() == CircuitBreaker.HALF_OPEN
+
+
+def test_cancelled_retry_does_not_release_another_callers_probe(breaker):
+    async def main():
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+            return OperationResult.ok(None)
+
+        task = asyncio.create_task(aretry_with_backoff(slow, breaker=breaker))
+        await started.wait()
+        half_open(breaker)  # Trips while the call is in flight
+        assert breaker.admit() == CircuitBreaker.HALF_OPEN  # Someone else's probe
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert breaker.admit() is None
+
+
+# -- requests inside timed() -------------------------------------------------
+
+def run_attempt(count, request):
+    """Send count concurrent requests to ROUTE inside one timed() attempt."""
+    async def make():
+        async def one(i):
+            async with route_request(ROUTE):
+                return await request(i)
+        return await asyncio.gather(*(one(i) for i in range(count)), return_exceptions=True)
+
+    return asyncio.run(get_router().timed(ROUTE, make))
+
+
+def test_half_open_attempt_waits_for_its_probe(breaker):
+    half_open(breaker)
+    in_flight = []
+
+    async def request(i):
+        in_flight.append(i)
+        seen = len(in_flight)
+        await asyncio.sleep(0.01)
+        in_flight.remove(i)
+        return seen
+
+    # The probe goes out alone; the other two follow once it has succeeded
+    assert sorted(run_attempt(3, request)) == [1, 1, 2]
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_fails_the_waiting_requests(breaker):
+    half_open(breaker)
+    sent = []
+
+    async def request(i):
+        sent.append(i)
+        raise RuntimeError(SERVER_ERROR)
+
+    results = run_attempt(3, request)
+    assert len(sent) == 1
+    assert sum(isinstance(r, RuntimeError) for r in results) == 1
+    assert sum(isinstance(r, CircuitOpenError) for r in results) == 2
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_cancelled_probe_hands_over_to_a_waiting_request(breaker):
+    half_open(breaker)
+
+    async def main():
+        async def make():
+            async def probe():
+                async with route_request(ROUTE):
+                    await asyncio.sleep(10)
+
+            async def follower():
+                async with route_request(ROUTE):
+                    return "sent"
+
+            first = asyncio.create_task(probe())
+            await asyncio.sleep(0)
+            second = asyncio.create_task(follower())
+            await asyncio.sleep(0.01)
+            assert not second.done()  # Waiting on the probe
+            first.cancel()
+            return await second
+
+        return await get_router().timed(ROUTE, make)
+
+    assert asyncio.run(main()) == "sent"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_breaker_rejects_the_attempt(breaker):
+    breaker.record(error_handling.ErrorCategory.NETWORK)
+
+    async def request(i):
+        raise AssertionError("no request may go out")
+
+    results = run_attempt(2, request)
+    assert all(isinstance(r, CircuitOpenError) for r in results)
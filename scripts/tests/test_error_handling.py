@@ -0,0 +1,143 @@
+"""classify_error on the messages and exceptions the SDKs and this pipeline produce."""
+
+import pytest
+
+import error_handling
+from error_handling import ErrorCategory, classify_error
+
+# (message, category): the shapes in bench_classify_error.py's built-in corpus
+CORPUS = [
+    # anthropic
+    ("Error code: 429 - {'type': 'error', 'error': {'type': 'rate_limit_error', 'message': "
+     "'Number of request tokens has exceeded your per-minute rate limit'}}", ErrorCategory.RATE_LIMIT),
+    ("Error code: 400 - {'type': 'error', 'error': {'type': 'invalid_request_error', 'message': "
+     "'messages.0.content.1.image.source.base64.data: Image does not match the provided media type image/png'}}",
+     ErrorCategory.MEDIA_TYPE),
+    ("Error code: 400 - {'type': 'error', 'error': {'type': 'invalid_request_error', 'message': "
+     "'image exceeds 5 MB maximum: 5308416 bytes > 5242880 bytes'}}", ErrorCategory.API_ERROR),
+    ("Error code: 401 - {'type': 'error', 'error': {'type': 'authentication_error', 'message': 'invalid x-api-key'}}",
+     ErrorCategory.AUTH),
+    ("Error code: 529 - {'type': 'error', 'error': {'type': 'overloaded_error', 'message': 'Overloaded'}}",
+     ErrorCategory.SERVER),
+    ("Connection error.", ErrorCategory.NETWORK),
+    ("Request timed out.", ErrorCategory.TIMEOUT),
+    # google-genai
+    ("429 RESOURCE_EXHAUSTED. {'error': {'code': 429, 'message': 'You exceeded your current quota'}}",
+     ErrorCategory.RATE_LIMIT),
+    ("400 FAILED_PRECONDITION. {'error': {'code': 400, 'message': 'User location is not supported'}}",
+     ErrorCategory.API_ERROR),
+    ("403 PERMISSION_DENIED. {'error': {'code': 403, 'message': 'API key not valid.'}}", ErrorCategory.AUTH),
+    ("504 DEADLINE_EXCEEDED. {'error': {'code': 504, 'message': 'Deadline expired'}}", ErrorCategory.SERVER),
+    ("No image data in response (finish_reason=SAFETY)", ErrorCategory.UNKNOWN),
+    # requests / httpx (Replicate)
+    ("500 Server Error: Internal Server Error for url: https://api.replicate.com/v1/predictions",
+     ErrorCategory.SERVER),
+    ("Client error '422 Unprocessable Entity' for url 'https://api.replicate.com/v1/predictions'",
+     ErrorCategory.API_ERROR),
+    ("Server error '502 Bad Gateway' for url 'https://api.replicate.com/v1/predictions/8x2k4b1h5drm80cj'",
+     ErrorCategory.SERVER),
+    ("HTTPSConnectionPool(host='api.replicate.com', port=443): Max retries exceeded with url: /v1/predictions "
+     "(Caused by NewConnectionError('<urllib3.connection.HTTPSConnection object at 0x7f3a2c1d5e50>: "
+     "Failed to establish a new connection: [Errno -3] Temporary failure in name resolution'))",
+     ErrorCategory.NETWORK),
+    ("HTTPSConnectionPool(host='replicate.delivery', port=443): Read timed out. (read timeout=60)",
+     ErrorCategory.TIMEOUT),
+    # ReplicateEngine
+    ("API error: 429 - ", ErrorCategory.RATE_LIMIT),
+    ("API error: 503 - <html><head><title>503 Service Temporarily Unavailable</title></head></html>",
+     ErrorCategory.SERVER),
+    ('API error: 401 - {"title":"Unauthenticated","detail":"You did not pass a valid authentication token"}',
+     ErrorCategory.AUTH),
+    ("Download failed (503): https://replicate.delivery/xezq/8x2k4b1h5drm80cj/out-0.webp", ErrorCategory.SERVER),
+    # Local failures that merely contain numbers
+    ("Replicate prediction did not finish within 1500s", ErrorCategory.UNKNOWN),
+    ("Image too small: 504 bytes", ErrorCategory.UNKNOWN),
+    ("cannot identify image file 'public/images/generated/pending/hero_v2_500x500.png'", ErrorCategory.UNKNOWN),
+    ("Downloaded 2503 bytes, expected 18429; digest mismatch", ErrorCategory.UNKNOWN),
+    ("Invalid image data: PNG truncated after 4096 bytes", ErrorCategory.UNKNOWN),
+]
+
+
+@pytest.mark.parametrize("message, category", CORPUS)
+def test_corpus(message, category):
+    assert classify_error(message).category is category
+
+
+@pytest.mark.parametrize("message, category", [
+    # The highest-priority rule wins wherever it appears in the message
+    ("Connection reset after 30s; then: Error code: 401", ErrorCategory.AUTH),
+    ("Read timed out after a connection was made", ErrorCategory.TIMEOUT),
+    ("Error code: 500 - image does not match the provided media type", ErrorCategory.MEDIA_TYPE),
+    # Status phrases only count with a code right after them
+    ("status: pending, code unknown, took 1500ms", ErrorCategory.UNKNOWN),
+    ("{'status_code': 503}", ErrorCategory.SERVER),
+    ("HTTP 404 for hero_404.png", ErrorCategory.API_ERROR),
+    ("http_503", ErrorCategory.SERVER),
+    ("code: 302", ErrorCategory.UNKNOWN),
+    ("anthropic.RateLimitError: slow down", ErrorCategory.RATE_LIMIT),
+])
+def test_priority_and_status_codes(message, category):
+    assert classify_error(message).category is category
+
+
+class APIStatusError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def test_status_code_beats_message_text():
+    info = classify_error(APIStatusError("Connection error while reading body", 429))
+    assert info.category is ErrorCategory.RATE_LIMIT
+    assert info.details["status_code"] == 429
+
+
+def test_wrapped_errors_are_classified_by_their_cause():
+    try:
+        try:
+            raise APIStatusError("upstream", 503)
+        except APIStatusError as cause:
+            raise RuntimeError("All 4 variations failed") from cause
+    except RuntimeError as error:
+        info = classify_error(error)
+    assert info.category is ErrorCategory.SERVER
+    assert info.details["status_code"] == 503
+
+
+def test_media_type_message_beats_a_400_status():
+    error = APIStatusError("Image does not match the provided media type image/png", 400)
+    info = classify_error(error)
+    assert info.category is ErrorCategory.MEDIA_TYPE
+    assert info.details["status_code"] == 400
+
+
+@pytest.mark.parametrize("message, parsed", [
+    ('API error: 429 - {"detail": "throttled", "retry_after": 7}', {"detail": "throttled", "retry_after": 7}),
+    ("Error code: 429 - {'type': 'error'}", None),  # A Python dict repr, not JSON
+    ("API error: 502 - ", None),
+    ("} before {", None),
+])
+def test_json_details(message, parsed):
+    assert error_handling._extract_json_from_error(message) == parsed
+
+
+def test_retry_after_from_json_body():
+    info = classify_error('API error: 429 - {"detail": "throttled", "retry_after": 7}')
+    assert info.category is ErrorCategory.RATE_LIMIT
+    assert info.retry_after == 7
+
+
+def test_registered_rule_takes_its_priority(monkeypatch):
+    monkeypatch.setattr(error_handling, "_TEXT_RULES", list(error_handling._TEXT_RULES))
+    message = "quota exceeded: content flagged"
+    assert classify_error(message).category is ErrorCategory.RATE_LIMIT
+
+    error_handling.register_error_rule("flagged", ErrorCategory.API_ERROR, ["content_flagged"], before="rate_limit")
+    try:
+        assert classify_error(message).category is ErrorCategory.API_ERROR
+        with pytest.raises(ValueError):
+            error_handling.register_error_rule("flagged", ErrorCategory.API_ERROR, ["x"])
+    finally:
+        monkeypatch.undo()
+        error_handling._compile_rules()
+    assert classify_error(message).category is ErrorCategory.RATE_LIMIT
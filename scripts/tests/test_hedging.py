@@ -0,0 +1,31 @@
+"""Hedged generation across two backends in generate_image."""
+
+import asyncio
+
+import generate_image as gi
+
+
+def test_hedged_winner_reports_variation_indices(tmp_path, monkeypatch):
+    """Indices come from the winning leg's callback, not from parsing file names."""
+    monkeypatch.setattr(gi.CONFIG, "hedge_default_delay", 0.01)
+    reported = []
+
+    async def run(name, leg_dir, on_saved):
+        if name == "gemini":
+            await asyncio.sleep(1)  # Slow primary: the secondary wins
+        paths = []
+        for i in (1, 3):
+            path = leg_dir / f"hero-{name}-{i}.png"
+            path.write_bytes(b"image")
+            on_saved(i, path, f"sha-{i}")
+            paths.append(path)
+        return paths
+
+    def on_saved(i, path, sha256):
+        reported.append((i, path.name, sha256))
+
+    paths = asyncio.run(gi._agenerate_hedged(run, tmp_path, on_saved))
+    assert [p.name for p in paths] == ["hero-replicate-1.png", "hero-replicate-3.png"]
+    assert all(p.parent == tmp_path and p.exists() for p in paths)
+    assert reported == [(1, "hero-replicate-1.png", "sha-1"), (3, "hero-replicate-3.png", "sha-3")]
+    assert not list(tmp_path.glob(".hedge-*"))
@@ -0,0 +1,52 @@
+"""Generation history: appends, rotation, queries and index rebuilds."""
+
+import json
+
+import generation_history
+from generation_history import GenerationHistory
+
+
+def entry(n, category="programs"):
+    return {"timestamp": f"2026-01-{n:02d}T10:00:00", "category": category,
+            "name": f"hero-{n}", "prompt": f"garden {n % 2}"}
+
+
+def test_default_location_is_outside_public():
+    assert generation_history.DEFAULT_HISTORY_DIR.relative_to(generation_history.PROJECT_ROOT).parts[0] == ".cache"
+
+
+def test_queries_span_rotated_segments(tmp_path):
+    history = GenerationHistory(tmp_path, segment_bytes=200, legacy_log=tmp_path / "none.json")
+    ids = [history.append(entry(n, "team" if n == 3 else "programs")) for n in range(1, 6)]
+    assert ids == [1, 2, 3, 4, 5]
+    assert history.stats()["segments"] > 1
+
+    assert [e["name"] for e in history.query(limit=None)] == ["hero-5", "hero-4", "hero-3", "hero-2", "hero-1"]
+    assert [e["name"] for e in history.query(category="team")] == ["hero-3"]
+    assert [e["name"] for e in history.query(prompt="garden  1", since="2026-01-02")] == ["hero-5", "hero-3"]
+    assert history.get(2)["name"] == "hero-2"
+
+
+def test_rebuild_recovers_a_lost_index_and_skips_torn_lines(tmp_path):
+    history = GenerationHistory(tmp_path, segment_bytes=200, legacy_log=tmp_path / "none.json")
+    for n in range(1, 5):
+        history.append(entry(n))
+    with open(tmp_path / generation_history.ACTIVE_SEGMENT, "ab") as f:
+        f.write(b'{"timestamp": "2026-01-09')
+    history.index_path.unlink()
+    assert history.query() == []
+
+    assert history.rebuild_index() == 4
+    assert [e["name"] for e in history.query(limit=2)] == ["hero-4", "hero-3"]
+    assert history.stats()["entries"] == 4
+
+
+def test_legacy_log_is_imported_once(tmp_path):
+    legacy = tmp_path / "generation_log.json"
+    legacy.write_text(json.dumps({"generations": [entry(1), entry(2)]}), encoding="utf-8")
+    history = GenerationHistory(tmp_path / "history", legacy_log=legacy)
+
+    assert history.append(entry(3)) == 3
+    assert history.append(entry(4)) == 4
+    assert [e["name"] for e in history.query(limit=None)] == ["hero-4", "hero-3", "hero-2", "hero-1"]
+    assert history.query(name="hero-1")[0]["prompt_hash"] == generation_history.prompt_hash("garden 1")
@@ -0,0 +1,124 @@
+"""Resuming an interrupted generate-and-select run from its journal."""
+
+import asyncio
+import os
+import random
+import time
+
+import pytest
+from PIL import Image
+
+import generate_image as gi
+from generation_journal import GenerationJournal, prune_journals
+
+
+def save_noise(path, seed):
+    """Write a small PNG that passes validation (noise does not compress away)."""
+    Image.frombytes("RGB", (64, 48), random.Random(seed).randbytes(64 * 48 * 3)).save(path)
+
+
+class FakeBackend:
+    """Stands in for agenerate_images: saves the requested variations, failing at fail_at."""
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.calls = []
+
+    async def __call__(self, prompt, output_dir, base_name, count, indices, on_saved, **kwargs):
+        self.calls.append(list(indices))
+        output_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for i in indices:
+            if i == self.fail_at:
+                raise RuntimeError("Error code: 503 - process killed")
+            path = output_dir / f"{base_name}_v{i + 1}.png"
+            save_noise(path, i)
+            on_saved(i, path, None)
+            paths.append(path)
+        return paths
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(gi.CONFIG, "generated_dir", tmp_path / "generated")
+    monkeypatch.setattr(gi.CONFIG, "log_file", tmp_path / "generation_log.json")
+    return tmp_path
+
+
+def run(journal, backend, monkeypatch, count=4):
+    monkeypatch.setattr(gi, "agenerate_images", backend)
+    return asyncio.run(gi.agenerate_and_select(
+        "a garden", "hero", count=count, auto_select=False, use_cache=False, journal=journal,
+    ))
+
+
+def test_resume_regenerates_only_missing_variations(workspace, monkeypatch):
+    journal_dir = workspace / "journal"
+    journal = GenerationJournal.create("generate_and_select", {"name": "hero"}, journal_dir=journal_dir)
+    with pytest.raises(RuntimeError):
+        run(journal, FakeBackend(fail_at=2), monkeypatch)
+
+    resumed = GenerationJournal.resume(journal.run_id, kind="generate_and_select", journal_dir=journal_dir)
+    assert not resumed.finished
+    assert resumed.completed_file("v1") and resumed.completed_file("v2")
+    backend = FakeBackend()
+    result = run(resumed, backend, monkeypatch)
+    assert backend.calls == [[2, 3]]
+    assert [p.rsplit("_", 1)[1] for p in result["generated"]] == ["v1.png", "v2.png", "v3.png", "v4.png"]
+    assert result["run_id"] == journal.run_id
+
+    # A finished run re-checks its outputs without generating or logging again
+    again = GenerationJournal.resume(journal.run_id, journal_dir=journal_dir)
+    assert again.finished and again.get("logged")
+    backend = FakeBackend()
+    result = run(again, backend, monkeypatch)
+    assert backend.calls == []
+    assert "history_id" not in result
+
+
+def test_changed_variation_is_regenerated(workspace, monkeypatch):
+    journal_dir = workspace / "journal"
+    journal = GenerationJournal.create("generate_and_select", {"name": "hero"}, journal_dir=journal_dir)
+    with pytest.raises(RuntimeError):
+        run(journal, FakeBackend(fail_at=2), monkeypatch)
+    save_noise(journal.completed_file("v1"), "edited")
+
+    resumed = GenerationJournal.resume(journal.run_id, journal_dir=journal_dir)
+    backend = FakeBackend()
+    run(resumed, backend, monkeypatch)
+    assert backend.calls == [[0, 2, 3]]
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    journal = GenerationJournal.create("asset", {"name": "logo"}, journal_dir=tmp_path)
+    journal.record("icon", value=1)
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"event": "step", "step": "pat')
+
+    resumed = GenerationJournal.resume(journal.run_id, journal_dir=tmp_path)
+    assert resumed.params == {"name": "logo"}
+    assert resumed.get("icon")["value"] == 1
+    assert resumed.get("pat") is None
+
+
+def test_resume_checks_run_exists_and_kind(tmp_path):
+    journal = GenerationJournal.create("asset", {"name": "logo"}, journal_dir=tmp_path)
+    with pytest.raises(ValueError, match="not 'generate_and_select'"):
+        GenerationJournal.resume(journal.run_id, kind="generate_and_select", journal_dir=tmp_path)
+    with pytest.raises(ValueError, match="No journal"):
+        GenerationJournal.resume("missing-run", journal_dir=tmp_path)
+
+
+def test_prune_keeps_unfinished_and_recent_runs(tmp_path):
+    old = time.time() - 30 * 86400
+    finished_old = GenerationJournal.create("asset", {"name": "a"}, journal_dir=tmp_path)
+    finished_old.finish()
+    unfinished_old = GenerationJournal.create("asset", {"name": "b"}, journal_dir=tmp_path)
+    finished_new = GenerationJournal.create("asset", {"name": "c"}, journal_dir=tmp_path)
+    finished_new.finish()
+    for journal in (finished_old, unfinished_old):
+        os.utime(journal.path, (old, old))
+
+    assert prune_journals(tmp_path) == 1
+    assert not finished_old.path.exists()
+    assert unfinished_old.path.exists() and finished_new.path.exists()
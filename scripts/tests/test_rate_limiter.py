@@ -0,0 +1,73 @@
+"""Shared token-bucket pacing in rate_limiter."""
+
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter
+
+ROUTE = "gemini/test-model"
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return tmp_path / "rate_limits.json"
+
+
+def test_limits_by_exact_route_then_backend():
+    limiter = RateLimiter(limits=rate_limiter._parse_limits("gemini=10, gemini/fast=40,replicate=oops,anthropic=0"))
+    assert limiter.limit(ROUTE) == 10
+    assert limiter.limit("gemini/fast") == 40
+    assert limiter.limit("replicate/flux") == rate_limiter.DEFAULT_LIMITS["replicate"]
+    assert limiter.limit("anthropic/claude") == 0
+    assert limiter.limit("other/model") == 0
+
+
+def test_burst_then_paced(state_file):
+    limiter = RateLimiter(state_file, {"gemini": 60})  # One per second, burst of six
+    waits = [limiter._reserve(ROUTE) for _ in range(8)]
+    assert waits[:6] == [0.0] * 6
+    assert waits[6] == pytest.approx(1.0, abs=0.05)
+    assert waits[7] == pytest.approx(2.0, abs=0.05)
+
+
+def test_processes_share_buckets_through_the_state_file(state_file):
+    first, second = RateLimiter(state_file, {"gemini": 60}), RateLimiter(state_file, {"gemini": 60})
+    for _ in range(6):
+        assert first._reserve(ROUTE) == 0.0
+    assert second._reserve(ROUTE) == pytest.approx(1.0, abs=0.05)
+
+
+def test_unlimited_route_never_waits(state_file):
+    limiter = RateLimiter(state_file, {"gemini": 0})
+    assert all(limiter.acquire(ROUTE) == 0.0 for _ in range(20))
+    assert not state_file.exists()
+
+
+def test_rate_limit_response_halves_rate_and_blocks(state_file):
+    limiter = RateLimiter(state_file, {"gemini": 60})
+    limiter.observe(ROUTE, RuntimeError('API error: 429 - {"retry_after": 30}'))
+    status = limiter.status()[ROUTE]
+    assert status["rate_per_minute"] == pytest.approx(30, abs=0.1)
+    assert status["blocked_for"] == pytest.approx(30, abs=1)
+    assert limiter._reserve(ROUTE) == pytest.approx(32, abs=1)  # Block, then one token at the halved rate
+    assert limiter.penalties == 1
+
+    limiter.observe(ROUTE, RuntimeError("Error code: 503 - unavailable"))
+    assert limiter.penalties == 1
+
+
+def test_penalized_rate_never_drops_below_the_floor(state_file):
+    limiter = RateLimiter(state_file, {"gemini": 64})
+    for _ in range(10):
+        limiter.penalize(ROUTE)
+    assert limiter.status()[ROUTE]["rate_per_minute"] == pytest.approx(64 * rate_limiter.MIN_RATE_FRACTION, abs=0.1)
+
+
+def test_torn_state_file_starts_fresh_and_reset_forgets(state_file):
+    state_file.write_text('{"gemini/test-model": {"tok', encoding="utf-8")
+    limiter = RateLimiter(state_file, {"gemini": 60})
+    assert limiter._reserve(ROUTE) == 0.0
+    limiter.penalize(ROUTE, 60)
+    limiter.reset(ROUTE)
+    assert limiter.status() == {}
+    assert limiter._reserve(ROUTE) == 0.0
@@ -0,0 +1,55 @@
+"""Retries with a shared RetryBudget in error_handling."""
+
+import pytest
+
+import error_handling
+from error_handling import ErrorCategory, ErrorInfo, OperationResult, RetryBudget, retry_with_backoff
+
+
+def server_error():
+    return OperationResult.fail(ErrorInfo(category=ErrorCategory.SERVER, message="503", is_retryable=True))
+
+
+def test_budget_grants_up_to_capacity_then_refills():
+    budget = RetryBudget(retries=2, window=10)
+    assert [budget.try_acquire() for _ in range(3)] == [True, True, False]
+    budget._updated -= 5  # Half a window later: one token is back
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+    assert budget.summary() == {"tokens": 0.0, "capacity": 2.0, "granted": 3, "denied": 2}
+
+
+@pytest.mark.parametrize("retries, window", [(-1, 60), (float("inf"), 60), (5, 0), (5, float("nan"))])
+def test_budget_rejects_bad_settings(retries, window):
+    with pytest.raises(ValueError):
+        RetryBudget(retries, window)
+
+
+@pytest.mark.parametrize("spec, capacity, rate", [
+    ("6/30", 6.0, 0.2),
+    ("6", 6.0, 6 / error_handling.DEFAULT_RETRY_WINDOW),
+    ("lots", error_handling.DEFAULT_RETRY_BUDGET, None),
+    ("-3/60", error_handling.DEFAULT_RETRY_BUDGET, None),
+])
+def test_budget_from_environment(monkeypatch, spec, capacity, rate):
+    monkeypatch.setenv("EVOLEA_RETRY_BUDGET", spec)
+    budget = error_handling.get_retry_budget()
+    assert budget.capacity == capacity
+    if rate is not None:
+        assert budget.rate == pytest.approx(rate)
+    assert error_handling.get_retry_budget() is budget
+
+
+def test_spent_budget_stops_retrying():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return server_error()
+
+    budget = RetryBudget(retries=1, window=3600)
+    result = retry_with_backoff(fn, max_retries=5, initial_delay=0, jitter="none", budget=budget)
+    assert len(calls) == 2  # The first attempt is free; one retry was in the budget
+    assert not result.success
+    assert result.metadata["retry_budget_exhausted"]
+    assert budget.denied == 1
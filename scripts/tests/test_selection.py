@@ -0,0 +1,181 @@
+"""Tournament selection and bracket renumbering in generate_image."""
+
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+import generate_image as gi
+
+
+class FakeClaude:
+    """
+    Stands in for AsyncAnthropic. Each request is answered by respond(names),
+    where names are the candidate file names in bracket order; the returned
+    dict is sent back as the evaluation JSON.
+    """
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+        self.messages = self
+
+    async def create(self, model, max_tokens, messages):
+        names = [re.search(r"\*\*Image \d+:\*\* (\S+)", c["text"]).group(1)
+                 for c in messages[0]["content"] if c["type"] == "text" and c["text"].startswith("**Image")]
+        self.requests.append(names)
+        return SimpleNamespace(content=[SimpleNamespace(text=json.dumps(self.respond(names)))], usage=None)
+
+
+def by_quality(names):
+    """Rank every candidate by the number in its name (c7.png beats c3.png)."""
+    quality = [int(re.search(r"(\d+)", name).group(1)) for name in names]
+    best = max(range(len(names)), key=lambda k: quality[k])
+    return {
+        "selected": best + 1,
+        "reasoning": f"{names[best]} is best",
+        "rankings": [{"image": k + 1, "score": quality[k], "strengths": names[k]} for k in range(len(names))],
+    }
+
+
+@pytest.fixture
+def candidates(tmp_path):
+    def make(count):
+        paths = []
+        for i in range(count):
+            path = tmp_path / f"c{i}.png"
+            Image.new("RGB", (64, 48), (i * 20 % 256, 0, 0)).save(path)
+            paths.append(path)
+        return paths
+    return make
+
+
+@pytest.fixture
+def claude(monkeypatch):
+    def install(respond):
+        client = FakeClaude(respond)
+        monkeypatch.setattr(gi, "get_async_anthropic_client", lambda key: client)
+        monkeypatch.setattr(gi.CONFIG, "anthropic_key", "test-key")
+        return client
+    return install
+
+
+def select(paths, bracket_size=None, use_cache=False):
+    return asyncio.run(gi.aauto_select_best(paths, "a garden", bracket_size=bracket_size, use_cache=use_cache))
+
+
+# -- renumbering -------------------------------------------------------------
+
+def test_renumber_maps_bracket_numbers_to_global_positions():
+    evaluation = {"selected": 2, "rankings": [{"image": 1, "score": 5}, {"image": 2, "score": 9}]}
+    renumbered = gi._renumber(evaluation, [4, 7])
+    assert renumbered["selected"] == 8
+    assert [r["image"] for r in renumbered["rankings"]] == [5, 8]
+
+
+@pytest.mark.parametrize("bad", [0, 4, -1, True, None, "x", 2.0])
+def test_renumber_drops_rankings_outside_the_bracket(bad):
+    evaluation = {"selected": 1, "rankings": [{"image": bad, "score": 10}, {"image": 3, "score": 1}]}
+    renumbered = gi._renumber(evaluation, [10, 11, 12])
+    assert renumbered["rankings"] == [{"image": 13, "score": 1}]
+
+
+@pytest.mark.parametrize("selected, expected", [(2, 1), ("3", 2), (0, 2), (9, 2), (True, 2), (None, 2)])
+def test_selected_index_falls_back_to_top_ranked(selected, expected):
+    rankings = [{"image": 1, "score": 4}, {"image": 3, "score": 8}, {"image": 5, "score": 99}]
+    assert gi._selected_index({"selected": selected, "rankings": rankings}, 3) == expected
+
+
+def test_selected_index_without_rankings_uses_first_image():
+    assert gi._selected_index({"selected": 7}, 3) == 0
+
+
+# -- tournament --------------------------------------------------------------
+
+def test_single_bracket_picks_claudes_choice(candidates, claude):
+    client = claude(by_quality)
+    selected, evaluation = select(candidates(4), bracket_size=4)
+    assert selected.name == "c3.png"
+    assert evaluation["selected"] == 4
+    assert len(client.requests) == 1
+
+
+def test_tournament_winners_advance_to_a_final(candidates, claude):
+    client = claude(by_quality)
+    selected, evaluation = select(candidates(9), bracket_size=3)
+    assert selected.name == "c8.png"
+    assert len(client.requests) == 4  # Three brackets, then the final
+    assert sorted(len(r) for r in client.requests[:3]) == [3, 3, 3]
+    winners = {f"c{w['winner'] - 1}.png" for w in evaluation["tournament"][0]}
+    assert set(client.requests[-1]) == winners
+    assert evaluation["selected"] == 9
+
+
+def test_out_of_range_rankings_do_not_score_other_candidates(candidates, claude):
+    """A bracket-local "image 4" from a 3-image bracket must not land on global candidate 4."""
+    def respond(names):
+        evaluation = by_quality(names)
+        evaluation["rankings"].append({"image": len(names) + 1, "score": 1000, "strengths": "phantom"})
+        evaluation["rankings"].append({"image": 0, "score": 1000, "strengths": "phantom"})
+        evaluation["rankings"].append({"image": True, "score": 1000, "strengths": "phantom"})
+        return evaluation
+
+    claude(respond)
+    selected, evaluation = select(candidates(6), bracket_size=3)
+    assert selected.name == "c5.png"
+    assert all(r["strengths"] != "phantom" for r in evaluation["rankings"])
+    assert all(1 <= r["image"] <= 6 for r in evaluation["rankings"])
+
+
+# -- evaluation cache --------------------------------------------------------
+
+def test_rankings_outside_the_bracket_are_not_cached(candidates, claude):
+    def respond(names):
+        evaluation = by_quality(names)
+        evaluation["rankings"] += [{"image": len(names) + 1, "score": 50}, {"image": 0, "score": 50}]
+        return evaluation
+
+    claude(respond)
+    paths = candidates(3)
+    selected, evaluation = select(paths, use_cache=True)
+    assert selected.name == "c2.png"
+    assert [r["image"] for r in evaluation["rankings"]] == [1, 2, 3]
+
+    # A second run is answered from the cache with the same three scores
+    client = claude(respond)
+    selected, evaluation = select(paths, use_cache=True)
+    assert selected.name == "c2.png"
+    assert client.requests == []
+    assert [(r["image"], r["score"]) for r in evaluation["rankings"]] == [(1, 0), (2, 1), (3, 2)]
+
+
+def test_new_candidates_are_judged_against_the_best_cached_one(candidates, claude):
+    claude(by_quality)
+    paths = candidates(5)
+    select(paths[:3], use_cache=True)
+
+    client = claude(by_quality)
+    selected, evaluation = select(paths, use_cache=True)
+    assert selected.name == "c4.png"
+    assert client.requests == [["c2.png", "c3.png", "c4.png"]]
+    assert evaluation["cached"] == [1, 2]
+
+
+def test_scores_outside_the_judged_set_are_ignored(candidates, claude, monkeypatch):
+    """Local score indices past the judged candidates (or negative) neither raise nor wrap around."""
+    async def tournament(client, paths, prepared, prompt, bracket_size):
+        scores = {k: {"image": k + 1, "score": k} for k in (-1, 0, 1, len(paths))}
+        return 1, {"selected": 2, "reasoning": "second"}, scores
+
+    claude(by_quality)
+    monkeypatch.setattr(gi, "_atournament", tournament)
+    paths = candidates(2)
+    selected, evaluation = select(paths, use_cache=True)
+    assert selected.name == "c1.png"
+    cache = gi.get_evaluation_cache()
+    for path, score in zip(paths, (0, 1)):
+        key = gi.evaluation_key(gi.file_sha256(path), "a garden", gi.CONFIG.claude_model, gi.EVALUATION_CRITERIA)
+        assert cache.get(key)["score"] == score
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+EVOLEA Training Store
+=====================
+SQLite store for A/B training sessions and their rounds.
+
+Each session is inserted in one transaction together with its rounds, and the
+running totals (session and round counts, last update) are updated in the same
+transaction instead of being recomputed from the full history. WAL mode lets
+several processes log sessions at once without corrupting anything.
+
+training-log.json is no longer written on every session; `export` produces it
+in the same format on demand, and the first open imports an existing one.
+
+Usage:
+    python scripts/training_store.py stats
+    python scripts/training_store.py sessions --target mini-garten-hero --limit 5
+    python scripts/training_store.py export                 # -> training-log.json
+    python scripts/training_store.py export --output - | jq .total_rounds
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+PROJECT_ROOT = Path(__file__).parent.parent
+RL_SKILL_DIR = PROJECT_ROOT / ".claude" / "skills" / "image-generation-rl"
+DEFAULT_DB_FILE = RL_SKILL_DIR / "training.sqlite"
+LEGACY_JSON_FILE = RL_SKILL_DIR / "training-log.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id              TEXT PRIMARY KEY,
+    timestamp       TEXT NOT NULL,
+    target          TEXT,
+    final_image     TEXT,
+    learnings_added TEXT NOT NULL DEFAULT '[]',  -- JSON list
+    round_count     INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_timestamp ON sessions(timestamp);
+CREATE INDEX IF NOT EXISTS idx_sessions_target ON sessions(target, timestamp);
+
+CREATE TABLE IF NOT EXISTS rounds (
+    session_id  TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    round_no    INTEGER NOT NULL,
+    winner      TEXT,
+    data        TEXT NOT NULL,  -- The round dict as JSON
+    PRIMARY KEY (session_id, round_no)
+);
+CREATE INDEX IF NOT EXISTS idx_rounds_winner ON rounds(winner);
+
+CREATE TABLE IF NOT EXISTS totals (
+    id              INTEGER PRIMARY KEY CHECK (id = 1),
+    created         TEXT NOT NULL,
+    last_updated    TEXT NOT NULL,
+    total_sessions  INTEGER NOT NULL DEFAULT 0,
+    total_rounds    INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class TrainingStore:
+    """Sessions, rounds and running totals in one SQLite database."""
+
+    def __init__(self, db_path: Union[str, Path] = DEFAULT_DB_FILE, legacy_json: Optional[Path] = LEGACY_JSON_FILE):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        created = not self.db_path.exists()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._open()
+        try:
+            conn.executescript(_SCHEMA)
+            conn.execute(
+                "INSERT OR IGNORE INTO totals (id, created, last_updated) VALUES (1, ?, ?)",
+                (datetime.now().isoformat(),) * 2,
+            )
+        finally:
+            conn.close()
+        if created and legacy_json and Path(legacy_json).exists():
+            self.import_json(Path(legacy_json))
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _connect(self, write: bool = False) -> "_Transaction":
+        """`with store._connect(write) as conn:` runs one transaction on a fresh connection."""
+        return _Transaction(self._open(), immediate=write)
+
+    # -- writing ------------------------------------------------------------
+
+    def log_session(
+        self,
+        session_id: str,
+        target: str,
+        rounds: List[Dict[str, Any]],
+        final_image: Optional[Union[str, Path]] = None,
+        learnings_added: Optional[List[str]] = None,
+        timestamp: Optional[str] = None,
+    ) -> None:
+        """Record a session and its rounds; totals are updated in the same transaction."""
+        timestamp = timestamp or datetime.now().isoformat()
+        with self._lock, self._connect(write=True) as conn:
+            previous = conn.execute("SELECT round_count FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if previous:
+                # Re-logging a session replaces it
+                conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            conn.execute(
+                "INSERT INTO sessions (id, timestamp, target, final_image, learnings_added, round_count)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, timestamp, target, str(final_image) if final_image else None,
+                 json.dumps(learnings_added or [], ensure_ascii=False), len(rounds)),
+            )
+            conn.executemany(
+                "INSERT INTO rounds (session_id, round_no, winner, data) VALUES (?, ?, ?, ?)",
+                [(session_id, i, _winner(r), json.dumps(r, ensure_ascii=False))
+                 for i, r in enumerate(rounds, 1)],
+            )
+            conn.execute(
+                "UPDATE totals SET last_updated = ?, total_sessions = total_sessions + ?,"
+                " total_rounds = total_rounds + ? WHERE id = 1",
+                (datetime.now().isoformat(), 0 if previous else 1,
+                 len(rounds) - (previous["round_count"] if previous else 0)),
+            )
+
+    def import_json(self, path: Path) -> int:
+        """Import the sessions of a training-log.json; returns how many were imported."""
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return 0
+        sessions = data.get("sessions", []) if isinstance(data, dict) else []
+        for s in sessions:
+            self.log_session(
+                session_id=s.get("id") or s.get("timestamp") or datetime.now().isoformat(),
+                target=s.get("target"),
+                rounds=s.get("rounds") or [],
+                final_image=s.get("final_image"),
+                learnings_added=s.get("learnings_added") or [],
+                timestamp=s.get("timestamp"),
+            )
+        if isinstance(data, dict) and data.get("created"):
+            with self._lock, self._connect(write=True) as conn:
+                conn.execute("UPDATE totals SET created = MIN(created, ?) WHERE id = 1", (data["created"],))
+        return len(sessions)
+
+    # -- reading ------------------------------------------------------------
+
+    def totals(self) -> Dict[str, Any]:
+        """Running totals, without touching the session rows."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM totals WHERE id = 1").fetchone()
+        return {k: row[k] for k in ("created", "last_updated", "total_sessions", "total_rounds")}
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals plus per-target session counts and round winners."""
+        result = self.totals()
+        with self._connect() as conn:
+            result["targets"] = dict(conn.execute(
+                "SELECT COALESCE(target, '-'), COUNT(*) FROM sessions GROUP BY target ORDER BY 2 DESC"
+            ).fetchall())
+            result["winners"] = dict(conn.execute(
+                "SELECT winner, COUNT(*) FROM rounds WHERE winner IS NOT NULL GROUP BY winner ORDER BY 2 DESC"
+            ).fetchall())
+        return result
+
+    def sessions(
+        self,
+        target: Optional[str] = None,
+        since: Optional[str] = None,
+        limit: Optional[int] = None,
+        newest_first: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Sessions with their rounds, in the training-log.json shape."""
+        clauses, params = [], []
+        if target:
+            clauses.append("target = ?")
+            params.append(target)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        sql = "SELECT * FROM sessions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY timestamp {'DESC' if newest_first else 'ASC'}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+            result = []
+            for row in rows:
+                rounds = conn.execute(
+                    "SELECT data FROM rounds WHERE session_id = ? ORDER BY round_no", (row["id"],)
+                ).fetchall()
+                result.append({
+                    "id": row["id"],
+                    "timestamp": row["timestamp"],
+                    "target": row["target"],
+                    "rounds": [json.loads(r["data"]) for r in rounds],
+                    "final_image": row["final_image"],
+                    "learnings_added": json.loads(row["learnings_added"]),
+                })
+        return result
+
+    def export_json(self) -> Dict[str, Any]:
+        """The full history in the legacy training-log.json format."""
+        totals = self.totals()
+        return {
+            "version": "1.0",
+            **totals,
+            "sessions": self.sessions(newest_first=False),
+        }
+
+
+def _winner(round_data: Any) -> Optional[str]:
+    winner = round_data.get("winner") if isinstance(round_data, dict) else None
+    return None if winner is None else str(winner)
+
+
+class _Transaction:
+    """One transaction on a connection that is closed afterwards (IMMEDIATE for writes)."""
+
+    def __init__(self, conn: sqlite3.Connection, immediate: bool = False):
+        self._conn = conn
+        self._immediate = immediate
+
+    def __enter__(self) -> sqlite3.Connection:
+        # IMMEDIATE takes the write lock up front, so concurrent writers queue
+        # on busy_timeout instead of failing on lock upgrade
+        self._conn.execute("BEGIN IMMEDIATE" if self._immediate else "BEGIN")
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._conn.close()
+
+
+_stores: Dict[Path, TrainingStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_training_store(db_path: Optional[Path] = None, legacy_json: Optional[Path] = None) -> TrainingStore:
+    """Process-wide store for db_path (default: EVOLEA_TRAINING_DB or DEFAULT_DB_FILE)."""
+    db_path = Path(db_path or os.environ.get("EVOLEA_TRAINING_DB") or DEFAULT_DB_FILE)
+    with _stores_lock:
+        if db_path not in _stores:
+            _stores[db_path] = TrainingStore(db_path, legacy_json or LEGACY_JSON_FILE)
+        return _stores[db_path]
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Query and export the EVOLEA training history",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__[__doc__.index("Usage:"):],
+    )
+    parser.add_argument("--db", type=Path, default=None, help=f"Database file (default: {DEFAULT_DB_FILE})")
+    sub = parser.add_subparsers(dest="command")
+
+    sub.add_parser("stats", help="Totals, sessions per target and round winners")
+
+    sessions_cmd = sub.add_parser("sessions", help="Print sessions as JSON, newest first")
+    sessions_cmd.add_argument("--target", help="Only sessions for this target")
+    sessions_cmd.add_argument("--since", help="ISO date/time, inclusive")
+    sessions_cmd.add_argument("--limit", type=int, default=10, help="Max sessions (default: 10, 0 = all)")
+
+    export_cmd = sub.add_parser("export", help="Write the full history as training-log.json")
+    export_cmd.add_argument("--output", "-o", default=None,
+                            help=f"Output file, '-' for stdout (default: {LEGACY_JSON_FILE})")
+
+    import_cmd = sub.add_parser("import", help="Import sessions from a training-log.json")
+    import_cmd.add_argument("path", type=Path)
+
+    args = parser.parse_args()
+    store = get_training_store(args.db)
+
+    if args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+    elif args.command == "sessions":
+        print(json.dumps(store.sessions(args.target, args.since, args.limit), indent=2, ensure_ascii=False))
+    elif args.command == "export":
+        payload = json.dumps(store.export_json(), indent=2, ensure_ascii=False)
+        if args.output == "-":
+            print(payload)
+        else:
+            output = Path(args.output) if args.output else LEGACY_JSON_FILE
+            output.write_text(payload + "\n", encoding="utf-8")
+            print(f"Exported {store.totals()['total_sessions']} sessions to {output}", file=sys.stderr)
+    elif args.command == "import":
+        print(f"Imported {store.import_json(args.path)} sessions")
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()